@@ -0,0 +1,132 @@
+"""Measure the import time of the package and the CLI startup time.
+
+Runs `python -X importtime` in fresh interpreters and reports the best
+cumulative import time of each module, the slowest imports under it, and
+the wall time of one CLI run next to a bare interpreter. The run fails if
+importing `beautipy.cli` takes longer than the budget, or if it loads any
+of the modules that the package only needs on demand. Bytecode is written
+on a first warm-up run, so compiling the sources is not counted.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 10] [--budget-ms 50] [--top 8]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+MODULES = ["beautipy", "beautipy.cli"]
+
+# Default budget for `import beautipy.cli`, in milliseconds. Measured at 18 to
+# 43 ms on different machines, most of it `argparse` and `typing`; loading
+# any of the modules in ON_DEMAND adds more than 20 ms on its own.
+BUDGET_MS = 50.0
+
+# Modules that must not be loaded by `import beautipy.cli`.
+ON_DEMAND = [
+    "asyncio",
+    "concurrent.futures",
+    "importlib.metadata",
+    "multiprocessing",
+]
+
+
+def _env() -> Dict[str, str]:
+    """Return the environment for the child interpreters."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Import `module` in a fresh interpreter and return what it imported.
+
+    Each entry is the name of an imported module, its own time and its
+    cumulative time in microseconds, in the order `-X importtime` prints,
+    which ends with `module` itself. Modules imported at startup are left
+    out.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        if not name.startswith("  "):
+            # A top-level import: everything before it belongs to another.
+            if name.strip() != module:
+                entries.clear()
+                continue
+        entries.append((name.strip(), int(own), int(cumulative)))
+    return entries
+
+
+def best_import(module: str, repeat: int) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """Return the best cumulative time of `module` and the log of that run."""
+    import_times(module)
+    best = None
+    for _ in range(repeat):
+        entries = import_times(module)
+        total = next(cumulative for name, _, cumulative in reversed(entries) if name == module)
+        if best is None or total < best[0]:
+            best = (total, entries)
+    return best
+
+
+def best_run(argv: List[str], repeat: int) -> float:
+    """Return the best wall time of running `argv`, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, capture_output=True, env=_env(), check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=BUDGET_MS,
+        help="Allowed cumulative import time of beautipy.cli",
+    )
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    ns = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        total, entries = best_import(module, ns.repeat)
+        print(f"import {module:<16} {total / 1000:8.2f} ms")
+        for name, own, _ in sorted(entries, key=lambda entry: -entry[1])[:ns.top]:
+            print(f"    {name:<32} {own / 1000:8.2f} ms self")
+        if module == "beautipy.cli":
+            if total / 1000 > ns.budget_ms:
+                failures.append(f"import beautipy.cli takes {total / 1000:.2f} ms, budget {ns.budget_ms:.2f} ms")
+            loaded = {name for name, _, _ in entries}
+            failures.extend(f"import beautipy.cli loads {name}" for name in ON_DEMAND if name in loaded)
+
+    bare = best_run([sys.executable, "-c", "pass"], ns.repeat)
+    cli = best_run([sys.executable, "-m", "beautipy", "[1, 2]"], ns.repeat)
+    print(f"python -c pass          {bare:8.2f} ms")
+    print(f"python -m beautipy      {cli:8.2f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
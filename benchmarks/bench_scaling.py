@@ -0,0 +1,64 @@
+"""Check that beautify() scales linearly on whitespace-heavy input.
+
+Re-formats pre-indented, deeply nested JSON of increasing size and compares
+the time per megabyte of the largest input against the smallest one.
+
+Usage:
+    python benchmarks/bench_scaling.py [--size-mb 50] [--tolerance 1.5]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from beautipy import beautify
+
+
+def make_indented_json(size: int) -> str:
+    """Return pre-indented, deeply nested JSON text of about `size` characters."""
+    record = {"id": 0, "tags": [], "meta": {}}
+    for depth in range(12):
+        record = {"level": depth, "items": [record, [], {}], "name": "n, {x}"}
+    block = json.dumps(record, indent=8)
+    count = max(size // (len(block) + 2), 1)
+    return "[\n" + ",\n".join([block] * count) + "\n]"
+
+
+def measure(text: str) -> float:
+    """Return the seconds per megabyte needed to format `text`."""
+    start = time.perf_counter()
+    beautify(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (len(text) / 1e6)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50.0)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Maximum allowed ratio of the largest to the smallest time per MB",
+    )
+    ns = parser.parse_args()
+
+    largest = int(ns.size_mb * 1e6)
+    results = []
+    for size in (largest // 16, largest // 4, largest):
+        text = make_indented_json(size)
+        seconds_per_mb = measure(text)
+        results.append(seconds_per_mb)
+        print(f"{len(text) / 1e6:8.1f} MB  {1 / seconds_per_mb:7.2f} MB/s")
+
+    ratio = results[-1] / results[0]
+    print(f"time per MB, largest / smallest: {ratio:.2f}")
+    if ratio > ns.tolerance:
+        print(f"FAIL: scaling is worse than linear (tolerance {ns.tolerance})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Measure the per-call cost of formatting small inputs.
+
+Compares `beautify()`, which looks up a cached style on every call, with a
+reused `Style` and with a `Formatter` built for every input, which sets up
+its options and tables from scratch.
+
+Usage:
+    python benchmarks/bench_small_inputs.py [--number 20000]
+"""
+
+import argparse
+import sys
+import timeit
+
+from beautipy import Formatter, Style, beautify
+
+INPUTS = {
+    "short text": "[1, 2]",
+    "log line": "Error: {code:500, msg:'Not found', at:[1, 2, 3]}",
+    "small list": [1, 2, 3],
+    "small dict": {"id": 7, "tags": ["a", "b"], "meta": {"on": True}},
+}
+
+
+def fresh_formatter(obj: object) -> str:
+    """Format `obj` with a new `Formatter`, as one-off callers do."""
+    formatter = Formatter()
+    return formatter.feed(str(obj)) + formatter.close()
+
+
+def best_of(func, obj: object, number: int) -> float:
+    """Return the best time per call of `func(obj)` in microseconds."""
+    times = timeit.repeat(lambda: func(obj), number=number, repeat=5)
+    return min(times) / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing")
+    ns = parser.parse_args()
+
+    style = Style()
+    print(f"{'input':<12} {'Formatter()':>12} {'beautify()':>12} {'Style':>12}   (us per call)")
+    for name, obj in INPUTS.items():
+        assert style.format(obj) == beautify(obj) == fresh_formatter(obj)
+        fresh = best_of(fresh_formatter, obj, ns.number)
+        plain = best_of(beautify, obj, ns.number)
+        reused = best_of(style.format, obj, ns.number)
+        print(f"{name:<12} {fresh:12.2f} {plain:12.2f} {reused:12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Measure throughput and peak memory on deterministic corpora.
+
+Formats each corpus with each engine and option set, and reports MB/s
+(best of several runs), the peak memory allocated while formatting, as
+traced by `tracemalloc`, and the UTF-8 output bytes per input byte. Results
+can be saved as a baseline and later runs compared against it; the run fails
+if throughput drops, memory grows or the output grows by more than the given
+tolerances. Baselines are only comparable on the same
+machine and Python version.
+
+Usage:
+    python benchmarks/bench_suite.py [--size-mb 5] [--repeat 3] [--only deep,text]
+    python benchmarks/bench_suite.py --scanner compare
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json [--max-slowdown 0.2]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from bench_scaling import make_indented_json
+
+from beautipy import beautify, beautify_bytes, beautify_iter, use_engine
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+class Corpus(NamedTuple):
+    """A benchmark input: its text, and the object it is the `str()` of."""
+
+    name: str
+    text: str
+    obj: Optional[object]
+
+
+def deep_nesting(size: int, rng: random.Random) -> object:
+    """Return chains of dicts and lists nested 40 levels deep."""
+    items = []
+    length = 0
+    while length < size:
+        node: object = rng.randint(0, 1000)
+        for depth in range(40):
+            node = {"d": depth, "next": node} if depth % 2 else [node, "x"]
+        items.append(node)
+        length += len(str(node)) + 2
+    return items
+
+
+def wide_list(size: int, rng: random.Random) -> object:
+    """Return one flat list of numbers."""
+    items = []
+    length = 0
+    while length < size:
+        item = rng.choice([rng.randint(-10**6, 10**6), rng.random(), None, True])
+        items.append(item)
+        length += len(str(item)) + 2
+    return items
+
+
+def string_heavy(size: int, rng: random.Random) -> object:
+    """Return records whose strings hold quotes, escapes and brackets."""
+    words = ["alpha", "it's", 'say "hi"', "a, b", "{x: [1]}", "tab\there", "back\\slash", "café"]
+    items = []
+    length = 0
+    while length < size:
+        record = {
+            "id": len(items),
+            "message": " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))),
+            "tags": [rng.choice(words) for _ in range(3)],
+        }
+        items.append(record)
+        length += len(str(record)) + 2
+    return items
+
+
+def repeated(path: Path, size: int, separator: str) -> str:
+    """Return the file at `path` repeated to about `size` characters."""
+    text = path.read_text(encoding="utf-8").strip()
+    return separator.join([text] * max(size // (len(text) + len(separator)), 1))
+
+
+def objects(make: Callable[[int, random.Random], object]) -> Callable[[str, int], Corpus]:
+    """Return a corpus factory for objects built by `make`."""
+    def corpus(name: str, size: int) -> Corpus:
+        obj = make(size, random.Random(name))
+        return Corpus(name, str(obj), obj)
+    return corpus
+
+
+def indented_json(name: str, size: int) -> Corpus:
+    """Return pre-indented, deeply nested JSON, as in `bench_scaling.py`."""
+    return Corpus(name, make_indented_json(size), None)
+
+
+def example_json(name: str, size: int) -> Corpus:
+    """Return a JSON list of copies of `examples/json/input.json`."""
+    return Corpus(name, "[" + repeated(EXAMPLES / "json" / "input.json", size, ",\n") + "]", None)
+
+
+def example_txt(name: str, size: int) -> Corpus:
+    """Return lines of copies of `examples/txt/input.txt`."""
+    return Corpus(name, repeated(EXAMPLES / "txt" / "input.txt", size, "\n"), None)
+
+
+# Corpus factories by name, taking the name and the size in characters.
+CORPORA: Dict[str, Callable[[str, int], Corpus]] = {
+    "deep": objects(deep_nesting),
+    "wide": objects(wide_list),
+    "strings": objects(string_heavy),
+    "indented-json": indented_json,
+    "example-json": example_json,
+    "example-txt": example_txt,
+}
+
+
+def _stream(corpus: Corpus, options: dict) -> None:
+    """Format the text of `corpus` in chunks without joining them."""
+    for _ in beautify_iter(corpus.text, **options):
+        pass
+
+
+@lru_cache(maxsize=1)
+def _utf8(text: str) -> bytes:
+    """Return `text` encoded once, outside of the timed runs."""
+    return text.encode("utf-8")
+
+
+# Ways of formatting a corpus. `object` only applies to corpora with an object.
+ENGINES: Dict[str, Callable[[Corpus, dict], object]] = {
+    "text": lambda corpus, options: beautify(corpus.text, **options),
+    "object": lambda corpus, options: beautify(corpus.obj, **options),
+    "stream": _stream,
+    "bytes": lambda corpus, options: beautify_bytes(_utf8(corpus.text), **options),
+}
+
+OPTION_SETS: Dict[str, dict] = {
+    "default": {},
+    "compact": {"compact_operators": True, "opener_same_line": True, "indent": "\t"},
+    "blank": {"blank_line_depth": 2, "expand_empty": True},
+    "limits": {"max_depth": 4, "max_items_per_container": 100, "max_string_length": 40},
+    "markers": {"max_indent_width": 16},
+}
+
+
+def measure(run: Callable[[], object], size: int, repeat: int) -> Dict[str, float]:
+    """Return the best MB/s of `run` and its peak traced memory in MB."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"mb_per_s": size / 1e6 / best, "peak_mb": peak / 1e6}
+
+
+@lru_cache(maxsize=None)
+def output_ratio(text: str, option_name: str) -> float:
+    """Return the UTF-8 output bytes per input byte, the same for each engine."""
+    output = beautify(text, **OPTION_SETS[option_name])
+    return len(output.encode("utf-8")) / max(len(_utf8(text)), 1)
+
+
+def run_suite(size: int, repeat: int, only: List[str], scanner: str = "auto") -> Dict[str, Dict[str, float]]:
+    """Run every selected case and return the results by case name.
+
+    A case is selected if its corpus, engine and option set are each named
+    in `only`, or if none of that kind is. With `scanner` set to `compare`,
+    each case also runs on the Python scanner, and the results, which are
+    those of the compiled scanner, get its speedup over the Python one.
+    """
+    def chosen(names: Iterable[str]) -> List[str]:
+        names = list(names)
+        return [name for name in names if name in only] or names
+
+    results = {}
+    for corpus_name in chosen(CORPORA):
+        corpus = CORPORA[corpus_name](corpus_name, size)
+        for engine in chosen(ENGINES):
+            if engine == "object" and corpus.obj is None:
+                continue
+            for option_name in chosen(OPTION_SETS):
+                options = OPTION_SETS[option_name]
+                name = f"{corpus_name}/{engine}/{option_name}"
+                if scanner == "compare":
+                    use_engine("python")
+                    python = measure(lambda: ENGINES[engine](corpus, options), len(corpus.text), repeat)
+                use_engine("c" if scanner == "compare" else scanner)
+                result = measure(lambda: ENGINES[engine](corpus, options), len(corpus.text), repeat)
+                result["output_ratio"] = output_ratio(corpus.text, option_name)
+                line = (
+                    f"{name:<36} {result['mb_per_s']:8.2f} MB/s {result['peak_mb']:9.1f} MB peak"
+                    f" {result['output_ratio']:6.2f} out/in"
+                )
+                if scanner == "compare":
+                    result["speedup"] = result["mb_per_s"] / python["mb_per_s"]
+                    line += f" {python['mb_per_s']:8.2f} MB/s python {result['speedup']:6.1f}x"
+                results[name] = result
+                print(line)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    max_slowdown: float,
+    max_memory_growth: float,
+    max_output_growth: float = 0.0,
+) -> List[str]:
+    """Return a description of each case that regressed against `baseline`."""
+    failures = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["mb_per_s"] < before["mb_per_s"] * (1 - max_slowdown):
+            failures.append(f"{name}: {result['mb_per_s']:.2f} MB/s, baseline {before['mb_per_s']:.2f} MB/s")
+        if result["peak_mb"] > before["peak_mb"] * (1 + max_memory_growth) + 1:
+            failures.append(f"{name}: {result['peak_mb']:.1f} MB peak, baseline {before['peak_mb']:.1f} MB")
+        if "output_ratio" in before and result["output_ratio"] > before["output_ratio"] * (1 + max_output_growth):
+            failures.append(
+                f"{name}: {result['output_ratio']:.3f} output bytes per input byte, "
+                f"baseline {before['output_ratio']:.3f}"
+            )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Size of each corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument(
+        "--only",
+        default="",
+        help="Comma-separated names of the corpora, engines and option sets to run",
+    )
+    parser.add_argument(
+        "--scanner",
+        choices=["auto", "c", "numpy", "python", "compare"],
+        default="auto",
+        help="Scanner to measure; compare also runs the Python scanner and reports the speedup",
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a saved baseline")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=0.2,
+        help="Allowed drop in MB/s against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--max-memory-growth",
+        type=float,
+        default=0.2,
+        help="Allowed growth of the peak memory against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--max-output-growth",
+        type=float,
+        default=0.0,
+        help="Allowed growth of the output bytes per input byte against the baseline, as a fraction",
+    )
+    ns = parser.parse_args()
+
+    only = [part for part in ns.only.split(",") if part]
+    results = run_suite(int(ns.size_mb * 1e6), ns.repeat, only, ns.scanner)
+
+    if ns.save:
+        data = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size_mb": ns.size_mb,
+            "scanner": ns.scanner,
+            "results": results,
+        }
+        Path(ns.save).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    if ns.compare:
+        baseline = json.loads(Path(ns.compare).read_text(encoding="utf-8"))
+        if baseline["size_mb"] != ns.size_mb:
+            print(f"warning: baseline was measured with --size-mb {baseline['size_mb']}")
+        failures = compare(
+            results, baseline["results"], ns.max_slowdown, ns.max_memory_growth, ns.max_output_growth
+        )
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if failures:
+            return 1
+        print(f"no regressions against {ns.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Build the optional compiled scanner, `beautipy._speedups`.
+
+Used by hatchling as a wheel build hook. The extension is compiled with the
+compiler and flags Python itself was built with; if that fails, e.g. when
+no compiler is installed, a pure-Python wheel is built instead. Set
+`BEAUTIPY_PURE_PYTHON=1` to skip the extension.
+
+For development, build the extension next to the sources with:
+
+    python hatch_build.py
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+import sysconfig
+import tempfile
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent / "src" / "beautipy" / "_speedups.c"
+
+
+def extension_name() -> str:
+    """Return the file name of the extension for this interpreter."""
+    return "_speedups" + sysconfig.get_config_var("EXT_SUFFIX")
+
+
+def compile_extension(directory: Path) -> Path:
+    """Compile the extension into `directory` and return its path.
+
+    Raises:
+        OSError: If the compiler cannot be run.
+        subprocess.CalledProcessError: If compiling fails.
+        RuntimeError: If this Python does not say how to build extensions.
+    """
+    linker = sysconfig.get_config_var("LDSHARED")
+    if not linker:
+        raise RuntimeError("this Python has no LDSHARED build setting")
+    target = directory / extension_name()
+    command = [
+        *shlex.split(linker),
+        *shlex.split(sysconfig.get_config_var("CFLAGS") or ""),
+        *shlex.split(sysconfig.get_config_var("CCSHARED") or ""),
+        "-I" + sysconfig.get_paths()["include"],
+        str(SOURCE),
+        "-o",
+        str(target),
+    ]
+    subprocess.run(command, check=True)
+    return target
+
+
+try:
+    from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+except ImportError:
+    BuildHookInterface = None
+
+if BuildHookInterface is not None:
+
+    class SpeedupsBuildHook(BuildHookInterface):
+        """Add the compiled scanner to platform wheels when it can be built."""
+
+        def initialize(self, version: str, build_data: dict) -> None:
+            if self.target_name != "wheel" or version == "editable":
+                return
+            if os.environ.get("BEAUTIPY_PURE_PYTHON"):
+                return
+            directory = Path(tempfile.mkdtemp(prefix="beautipy-build-"))
+            try:
+                target = compile_extension(directory)
+            except (OSError, RuntimeError, subprocess.CalledProcessError) as err:
+                self.app.display_warning(f"building beautipy._speedups failed, using pure Python: {err}")
+                return
+            build_data["force_include"][str(target)] = f"beautipy/{target.name}"
+            build_data["pure_python"] = False
+            build_data["infer_tag"] = True
+
+
+if __name__ == "__main__":
+    print(compile_extension(SOURCE.parent))
+    sys.exit(0)
@@ -1,12 +1,68 @@
 """BeautiPy: prettify data structures into human-readable strings."""
 
-from importlib.metadata import PackageNotFoundError, version
+from importlib import import_module
 
-from beautipy.core import beautify
+__all__ = [
+    "Document",
+    "FormatStats",
+    "Formatter",
+    "ResultCache",
+    "Style",
+    "beautify",
+    "beautify_bytes",
+    "beautify_cached",
+    "beautify_file",
+    "beautify_iter",
+    "beautify_lines",
+    "beautify_many",
+    "beautify_parallel",
+    "beautify_to",
+    "use_engine",
+    "__version__",
+]
 
-__all__ = ["beautify", "__version__"]
+# The module defining each public name. Modules are imported on first use,
+# so that e.g. the CLI does not pay for multiprocessing or package metadata
+# unless it needs them.
+_EXPORTS = {
+    "Document": "beautipy.incremental",
+    "FormatStats": "beautipy.stats",
+    "Formatter": "beautipy.core",
+    "ResultCache": "beautipy.cache",
+    "Style": "beautipy.core",
+    "beautify": "beautipy.core",
+    "beautify_bytes": "beautipy.binary",
+    "beautify_cached": "beautipy.cache",
+    "beautify_file": "beautipy.files",
+    "beautify_iter": "beautipy.core",
+    "beautify_lines": "beautipy.lines",
+    "beautify_many": "beautipy.parallel",
+    "beautify_parallel": "beautipy.parallel",
+    "beautify_to": "beautipy.writer",
+    "use_engine": "beautipy.core",
+}
 
-try:
-    __version__ = version("beautipy")
-except PackageNotFoundError:
-    __version__ = "0.1.1"
+
+def __getattr__(name: str) -> object:
+    if name == "__version__":
+        value = _version()
+    elif name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+def _version() -> str:
+    """Return the installed version, or the version of this source tree."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("beautipy")
+    except PackageNotFoundError:
+        return "0.1.1"
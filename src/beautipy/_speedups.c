@@ -0,0 +1,706 @@
+/* Compiled scanner for beautipy.core.
+ *
+ * `format_chunk(formatter, chunk)` does what `Formatter._format()` does for
+ * text: it formats `chunk` from the state kept on the formatter, returns the
+ * output and stores the new state back, so that it can be used in place of
+ * the Python scanner at any point of an input. The Python scanner in core.py
+ * is the reference; the output of both must always be identical.
+ *
+ * The Python scanner steps over runs of text with regular expressions. Here
+ * the text is read one character at a time, which gives the same result:
+ * outside string literals, whitespace is dropped, `,` is followed by the
+ * line break of the current depth, and `:` and `=` get spaces unless
+ * operators are compact. String literals are copied as they are. Spans of
+ * characters that are copied unchanged are copied at once.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* The most recent output fragment, `Formatter._last`, in a form that is only
+ * turned into a string when it is needed. */
+enum {
+    TAIL_NONE,    /* None: nothing was written yet. */
+    TAIL_CHAR,    /* The single character `ch`. */
+    TAIL_COMMA,   /* ',' + breaks[level] */
+    TAIL_COLON,   /* ': ' */
+    TAIL_EQUALS,  /* ' = ' */
+    TAIL_OPENER,  /* ch + breaks[level] */
+    TAIL_EMPTY,   /* ch + closer, or ch + breaks[level] + closer if expanded. */
+    TAIL_OBJECT,  /* The string `object`, as found on the formatter. */
+};
+
+typedef struct {
+    int kind;
+    Py_UCS4 ch;
+    Py_UCS4 closer;
+    int expanded;
+    Py_ssize_t level;
+    PyObject *object;  /* Borrowed from the scanner's reference to `_last`. */
+} Tail;
+
+typedef struct {
+    PyObject *formatter;
+    PyObject *tables;     /* The tuple from `_grow_tables()`, or NULL. */
+    PyObject *lines;      /* Borrowed from `tables` or the formatter. */
+    PyObject *breaks;
+    PyObject *closings;
+    Py_ssize_t depth;     /* len(breaks) */
+    PyObject *indent;
+    Py_ssize_t indent_length;
+    int spaced;
+    int same_line;
+    int expand_empty;
+    int kind;             /* The string kind of `out`. */
+    void *out;
+    Py_ssize_t length;
+    Py_ssize_t capacity;
+} Scanner;
+
+static PyObject *spaced_colon;   /* ': ' */
+static PyObject *spaced_equals;  /* ' = ' */
+
+static int
+reserve(Scanner *s, Py_ssize_t extra)
+{
+    Py_ssize_t needed = s->length + extra;
+    if (needed <= s->capacity) {
+        return 0;
+    }
+    Py_ssize_t capacity = s->capacity ? s->capacity : 1024;
+    while (capacity < needed) {
+        capacity *= 2;
+    }
+    void *out = PyMem_Realloc(s->out, capacity * s->kind);
+    if (out == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    s->out = out;
+    s->capacity = capacity;
+    return 0;
+}
+
+static inline int
+put(Scanner *s, Py_UCS4 c)
+{
+    if (s->length == s->capacity && reserve(s, 1) < 0) {
+        return -1;
+    }
+    PyUnicode_WRITE(s->kind, s->out, s->length, c);
+    s->length++;
+    return 0;
+}
+
+/* Copy `data[start:end]`, whose kind is at most the output's. */
+static int
+put_span(Scanner *s, int kind, const void *data, Py_ssize_t start, Py_ssize_t end)
+{
+    Py_ssize_t n = end - start;
+    if (reserve(s, n) < 0) {
+        return -1;
+    }
+    if (kind == s->kind) {
+        memcpy((char *)s->out + s->length * kind, (const char *)data + start * kind, n * kind);
+    }
+    else {
+        for (Py_ssize_t i = 0; i < n; i++) {
+            PyUnicode_WRITE(s->kind, s->out, s->length + i, PyUnicode_READ(kind, data, start + i));
+        }
+    }
+    s->length += n;
+    return 0;
+}
+
+/* Return 1 if `c` is copied as it is outside string literals. */
+static inline int
+ordinary(Py_UCS4 c)
+{
+    switch (c) {
+    case '{': case '[': case '(': case '}': case ']': case ')':
+    case '\'': case '"': case ',': case ':': case '=':
+        return 0;
+    default:
+        return !Py_UNICODE_ISSPACE(c);
+    }
+}
+
+/* Store the output with at least `kind` bytes per character. */
+static int
+widen(Scanner *s, int kind)
+{
+    void *out = PyMem_Malloc((s->capacity ? s->capacity : 1) * kind);
+    if (out == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (Py_ssize_t i = 0; i < s->length; i++) {
+        PyUnicode_WRITE(kind, out, i, PyUnicode_READ(s->kind, s->out, i));
+    }
+    PyMem_Free(s->out);
+    s->out = out;
+    s->kind = kind;
+    return 0;
+}
+
+static int
+put_string(Scanner *s, PyObject *text)
+{
+    Py_ssize_t n = PyUnicode_GET_LENGTH(text);
+    if (n == 0) {
+        return 0;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(text) < 0) {
+        return -1;
+    }
+#endif
+    int kind = PyUnicode_KIND(text);
+    const void *data = PyUnicode_DATA(text);
+    if ((kind > s->kind && widen(s, kind) < 0) || reserve(s, n) < 0) {
+        return -1;
+    }
+    if (kind == s->kind) {
+        memcpy((char *)s->out + s->length * kind, data, n * kind);
+    }
+    else {
+        for (Py_ssize_t i = 0; i < n; i++) {
+            PyUnicode_WRITE(s->kind, s->out, s->length + i, PyUnicode_READ(kind, data, i));
+        }
+    }
+    s->length += n;
+    return 0;
+}
+
+static int
+set_tables(Scanner *s, PyObject *lines, PyObject *breaks, PyObject *closings)
+{
+    if (!PyTuple_Check(lines) || !PyTuple_Check(breaks) || !PyTuple_Check(closings)) {
+        PyErr_SetString(PyExc_TypeError, "the per-depth tables must be tuples");
+        return -1;
+    }
+    s->lines = lines;
+    s->breaks = breaks;
+    s->closings = closings;
+    s->depth = PyTuple_GET_SIZE(breaks);
+    return 0;
+}
+
+/* Extend the tables to cover `level`, as `Formatter._grow_tables()`. */
+static int
+grow(Scanner *s, Py_ssize_t level)
+{
+    PyObject *tables = PyObject_CallMethod(s->formatter, "_grow_tables", "n", level);
+    if (tables == NULL) {
+        return -1;
+    }
+    if (!PyTuple_Check(tables) || PyTuple_GET_SIZE(tables) < 3) {
+        Py_DECREF(tables);
+        PyErr_SetString(PyExc_TypeError, "_grow_tables() must return a tuple");
+        return -1;
+    }
+    Py_XSETREF(s->tables, tables);
+    return set_tables(s, PyTuple_GET_ITEM(tables, 0), PyTuple_GET_ITEM(tables, 1),
+                      PyTuple_GET_ITEM(tables, 2));
+}
+
+static PyObject *
+concat(Py_UCS4 first, PyObject *middle, Py_UCS4 last)
+{
+    Py_ssize_t n = PyUnicode_GET_LENGTH(middle);
+    Py_UCS4 max = PyUnicode_MAX_CHAR_VALUE(middle);
+    if (first > max) {
+        max = first;
+    }
+    if (last > max) {
+        max = last;
+    }
+    PyObject *result = PyUnicode_New(n + 1 + (last != 0), max);
+    if (result == NULL) {
+        return NULL;
+    }
+    PyUnicode_WRITE(PyUnicode_KIND(result), PyUnicode_DATA(result), 0, first);
+    if (n && PyUnicode_CopyCharacters(result, 1, middle, 0, n) < 0) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    if (last) {
+        PyUnicode_WRITE(PyUnicode_KIND(result), PyUnicode_DATA(result), n + 1, last);
+    }
+    return result;
+}
+
+/* Return the tail as the string `Formatter._format()` would have kept. */
+static PyObject *
+tail_string(Scanner *s, const Tail *tail)
+{
+    switch (tail->kind) {
+    case TAIL_NONE:
+        Py_RETURN_NONE;
+    case TAIL_CHAR:
+        return PyUnicode_FromOrdinal(tail->ch);
+    case TAIL_COMMA:
+        return concat(',', PyTuple_GET_ITEM(s->breaks, tail->level), 0);
+    case TAIL_COLON:
+        Py_INCREF(spaced_colon);
+        return spaced_colon;
+    case TAIL_EQUALS:
+        Py_INCREF(spaced_equals);
+        return spaced_equals;
+    case TAIL_OPENER:
+        return concat(tail->ch, PyTuple_GET_ITEM(s->breaks, tail->level), 0);
+    case TAIL_EMPTY:
+        if (tail->expanded) {
+            return concat(tail->ch, PyTuple_GET_ITEM(s->breaks, tail->level), tail->closer);
+        }
+        else {
+            Py_UCS4 chars[2] = {tail->ch, tail->closer};
+            return PyUnicode_FromKindAndData(PyUnicode_4BYTE_KIND, chars, 2);
+        }
+    default:
+        Py_INCREF(tail->object);
+        return tail->object;
+    }
+}
+
+/* Return 1 if a line break is written before an opening character after
+ * `tail`: `tail is not None and not tail.endswith(indent)`. */
+static int
+needs_line(Scanner *s, const Tail *tail)
+{
+    PyObject *text;
+    Py_ssize_t match;
+    switch (tail->kind) {
+    case TAIL_NONE:
+        return 0;
+    case TAIL_CHAR:
+        if (s->indent_length == 0) {
+            return 0;
+        }
+        return !(s->indent_length == 1 && PyUnicode_READ_CHAR(s->indent, 0) == tail->ch);
+    case TAIL_COMMA:
+    case TAIL_OPENER:
+        text = PyTuple_GET_ITEM(s->breaks, tail->level);
+        if (PyUnicode_GET_LENGTH(text) >= s->indent_length) {
+            match = PyUnicode_Tailmatch(text, s->indent, 0, PY_SSIZE_T_MAX, 1);
+            return match < 0 ? -1 : !match;
+        }
+        break;
+    case TAIL_COLON:
+    case TAIL_EQUALS:
+    case TAIL_OBJECT:
+        text = tail->kind == TAIL_COLON ? spaced_colon
+             : tail->kind == TAIL_EQUALS ? spaced_equals : tail->object;
+        match = PyUnicode_Tailmatch(text, s->indent, 0, PY_SSIZE_T_MAX, 1);
+        return match < 0 ? -1 : !match;
+    default:
+        break;
+    }
+    text = tail_string(s, tail);
+    if (text == NULL) {
+        return -1;
+    }
+    match = PyUnicode_Tailmatch(text, s->indent, 0, PY_SSIZE_T_MAX, 1);
+    Py_DECREF(text);
+    return match < 0 ? -1 : !match;
+}
+
+/* Copy string literal content from `data[pos:n]`, as `_scan_string()`.
+ * Returns the position after the closing quote, or `n`. */
+static Py_ssize_t
+scan_string(Scanner *s, int kind, const void *data, Py_ssize_t pos, Py_ssize_t n,
+            Py_UCS4 *quote, int *escaped)
+{
+    if (*escaped) {
+        if (pos == n) {
+            return pos;
+        }
+        if (put(s, PyUnicode_READ(kind, data, pos)) < 0) {
+            return -1;
+        }
+        pos++;
+        *escaped = 0;
+    }
+    while (pos < n) {
+        Py_ssize_t start = pos;
+        Py_UCS4 c = 0;
+        while (pos < n && (c = PyUnicode_READ(kind, data, pos)) != *quote && c != '\\') {
+            pos++;
+        }
+        if (put_span(s, kind, data, start, pos) < 0) {
+            return -1;
+        }
+        if (pos == n) {
+            break;
+        }
+        if (put(s, c) < 0) {
+            return -1;
+        }
+        pos++;
+        if (c == *quote) {
+            *quote = 0;
+            return pos;
+        }
+        if (c == '\\') {
+            if (pos == n) {
+                *escaped = 1;
+                return pos;
+            }
+            if (put(s, PyUnicode_READ(kind, data, pos)) < 0) {
+                return -1;
+            }
+            pos++;
+        }
+    }
+    return pos;
+}
+
+static PyObject *
+get_attribute(PyObject *object, const char *name)
+{
+    return PyObject_GetAttrString(object, name);
+}
+
+static int
+get_flag(PyObject *object, const char *name)
+{
+    PyObject *value = get_attribute(object, name);
+    if (value == NULL) {
+        return -1;
+    }
+    int flag = PyObject_IsTrue(value);
+    Py_DECREF(value);
+    return flag;
+}
+
+static int
+get_char(PyObject *object, const char *name, Py_UCS4 *c)
+{
+    PyObject *value = get_attribute(object, name);
+    if (value == NULL) {
+        return -1;
+    }
+    *c = 0;
+    if (value != Py_None) {
+        if (!PyUnicode_Check(value) || PyUnicode_GET_LENGTH(value) != 1) {
+            Py_DECREF(value);
+            PyErr_Format(PyExc_TypeError, "%s must be a character or None", name);
+            return -1;
+        }
+        *c = PyUnicode_READ_CHAR(value, 0);
+    }
+    Py_DECREF(value);
+    return 0;
+}
+
+static int
+set_char(PyObject *object, const char *name, Py_UCS4 c)
+{
+    PyObject *value = Py_None;
+    if (c) {
+        value = PyUnicode_FromOrdinal(c);
+        if (value == NULL) {
+            return -1;
+        }
+    }
+    else {
+        Py_INCREF(value);
+    }
+    int result = PyObject_SetAttrString(object, name, value);
+    Py_DECREF(value);
+    return result;
+}
+
+static PyObject *
+format_chunk(PyObject *module, PyObject *args)
+{
+    PyObject *formatter, *chunk;
+    if (!PyArg_ParseTuple(args, "OU:format_chunk", &formatter, &chunk)) {
+        return NULL;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(chunk) < 0) {
+        return NULL;
+    }
+#endif
+
+    Scanner s = {0};
+    s.formatter = formatter;
+    PyObject *last = NULL, *lines = NULL, *breaks = NULL, *closings = NULL, *level_object = NULL;
+    PyObject *result = NULL;
+    Tail tail = {TAIL_NONE};
+    Py_UCS4 quote, pending;
+    int escaped;
+    Py_ssize_t level;
+
+    s.indent = get_attribute(formatter, "_indent");
+    if (s.indent == NULL) {
+        goto done;
+    }
+    if (!PyUnicode_Check(s.indent)) {
+        PyErr_SetString(PyExc_TypeError, "indent must be a string");
+        goto done;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(s.indent) < 0) {
+        goto done;
+    }
+#endif
+    s.indent_length = PyUnicode_GET_LENGTH(s.indent);
+    if ((s.spaced = get_flag(formatter, "_compact_operators")) < 0
+        || (s.same_line = get_flag(formatter, "_opener_same_line")) < 0
+        || (s.expand_empty = get_flag(formatter, "_expand_empty")) < 0
+        || (escaped = get_flag(formatter, "_last_was_escape")) < 0
+        || get_char(formatter, "_string_opener", &quote) < 0
+        || get_char(formatter, "_pending_opener", &pending) < 0) {
+        goto done;
+    }
+    s.spaced = !s.spaced;
+    if ((level_object = get_attribute(formatter, "_indent_level")) == NULL
+        || (level = PyLong_AsSsize_t(level_object)) == -1) {
+        goto done;
+    }
+    if ((lines = get_attribute(formatter, "_lines")) == NULL
+        || (breaks = get_attribute(formatter, "_breaks")) == NULL
+        || (closings = get_attribute(formatter, "_closings")) == NULL
+        || set_tables(&s, lines, breaks, closings) < 0) {
+        goto done;
+    }
+    if (level >= s.depth && grow(&s, level) < 0) {
+        goto done;
+    }
+    if ((last = get_attribute(formatter, "_last")) == NULL) {
+        goto done;
+    }
+    if (last != Py_None) {
+        if (!PyUnicode_Check(last)) {
+            PyErr_SetString(PyExc_TypeError, "_last must be a string or None");
+            goto done;
+        }
+        tail.kind = TAIL_OBJECT;
+        tail.object = last;
+    }
+
+    int kind = PyUnicode_KIND(chunk);
+    const void *data = PyUnicode_DATA(chunk);
+    Py_ssize_t n = PyUnicode_GET_LENGTH(chunk);
+    Py_ssize_t pos = 0;
+    /* Line breaks are made of the indent, so the output needs the wider of
+     * its kind and the input's. */
+    s.kind = kind;
+    if (PyUnicode_KIND(s.indent) > s.kind) {
+        s.kind = PyUnicode_KIND(s.indent);
+    }
+    if (reserve(&s, n + n / 2 + 16) < 0) {
+        goto done;
+    }
+
+    if (quote) {
+        pos = scan_string(&s, kind, data, 0, n, &quote, &escaped);
+        if (pos < 0) {
+            goto done;
+        }
+        if (pos) {
+            tail.kind = TAIL_CHAR;
+            tail.ch = PyUnicode_READ(kind, data, pos - 1);
+        }
+    }
+
+    while (pos < n) {
+        Py_UCS4 c = PyUnicode_READ(kind, data, pos);
+        if (pending) {
+            if (Py_UNICODE_ISSPACE(c)) {
+                pos++;
+                continue;
+            }
+            if (c == '}' || c == ']' || c == ')') {
+                /* An empty structure, as `_open_empty()`. */
+                if (s.expand_empty) {
+                    if (!s.same_line) {
+                        int line = needs_line(&s, &tail);
+                        if (line < 0 || (line && put_string(&s, PyTuple_GET_ITEM(s.lines, level)) < 0)) {
+                            goto done;
+                        }
+                    }
+                    if (put(&s, pending) < 0
+                        || put_string(&s, PyTuple_GET_ITEM(s.breaks, level)) < 0
+                        || put(&s, c) < 0) {
+                        goto done;
+                    }
+                    tail.expanded = 1;
+                    tail.level = level;
+                }
+                else {
+                    if (put(&s, pending) < 0 || put(&s, c) < 0) {
+                        goto done;
+                    }
+                    tail.expanded = 0;
+                }
+                tail.kind = TAIL_EMPTY;
+                tail.ch = pending;
+                tail.closer = c;
+                pending = 0;
+                pos++;
+                continue;
+            }
+            /* A non-empty structure, as `_write_pending()`. */
+            if (!s.same_line) {
+                int line = needs_line(&s, &tail);
+                if (line < 0 || (line && put_string(&s, PyTuple_GET_ITEM(s.lines, level)) < 0)) {
+                    goto done;
+                }
+            }
+            level++;
+            if (level >= s.depth && grow(&s, level) < 0) {
+                goto done;
+            }
+            if (put(&s, pending) < 0 || put_string(&s, PyTuple_GET_ITEM(s.breaks, level)) < 0) {
+                goto done;
+            }
+            tail.kind = TAIL_OPENER;
+            tail.ch = pending;
+            tail.level = level;
+            pending = 0;
+        }
+
+        switch (c) {
+        case '{':
+        case '[':
+        case '(':
+            pending = c;
+            pos++;
+            break;
+        case '}':
+        case ']':
+        case ')':
+            if (put_string(&s, PyTuple_GET_ITEM(s.closings, level)) < 0 || put(&s, c) < 0) {
+                goto done;
+            }
+            tail.kind = TAIL_CHAR;
+            tail.ch = c;
+            if (level) {
+                level--;
+            }
+            pos++;
+            break;
+        case '\'':
+        case '"':
+            if (put(&s, c) < 0) {
+                goto done;
+            }
+            quote = c;
+            pos = scan_string(&s, kind, data, pos + 1, n, &quote, &escaped);
+            if (pos < 0) {
+                goto done;
+            }
+            tail.kind = TAIL_CHAR;
+            tail.ch = PyUnicode_READ(kind, data, pos - 1);
+            break;
+        case ',':
+            if (put(&s, ',') < 0 || put_string(&s, PyTuple_GET_ITEM(s.breaks, level)) < 0) {
+                goto done;
+            }
+            tail.kind = TAIL_COMMA;
+            tail.level = level;
+            pos++;
+            break;
+        case ':':
+        case '=':
+            if (s.spaced) {
+                if (put_string(&s, c == ':' ? spaced_colon : spaced_equals) < 0) {
+                    goto done;
+                }
+                tail.kind = c == ':' ? TAIL_COLON : TAIL_EQUALS;
+            }
+            else {
+                if (put(&s, c) < 0) {
+                    goto done;
+                }
+                tail.kind = TAIL_CHAR;
+                tail.ch = c;
+            }
+            pos++;
+            break;
+        default:
+            if (Py_UNICODE_ISSPACE(c)) {
+                pos++;
+                break;
+            }
+            Py_ssize_t start = pos;
+            do {
+                pos++;
+            } while (pos < n && ordinary(c = PyUnicode_READ(kind, data, pos)));
+            if (put_span(&s, kind, data, start, pos) < 0) {
+                goto done;
+            }
+            tail.kind = TAIL_CHAR;
+            tail.ch = PyUnicode_READ(kind, data, pos - 1);
+            break;
+        }
+    }
+
+    /* Store the state back. */
+    PyObject *value = tail_string(&s, &tail);
+    if (value == NULL) {
+        goto done;
+    }
+    int failed = PyObject_SetAttrString(formatter, "_last", value);
+    Py_DECREF(value);
+    if (failed) {
+        goto done;
+    }
+    value = PyLong_FromSsize_t(level);
+    if (value == NULL) {
+        goto done;
+    }
+    failed = PyObject_SetAttrString(formatter, "_indent_level", value);
+    Py_DECREF(value);
+    if (failed
+        || set_char(formatter, "_string_opener", quote) < 0
+        || set_char(formatter, "_pending_opener", pending) < 0
+        || PyObject_SetAttrString(formatter, "_last_was_escape", escaped ? Py_True : Py_False) < 0) {
+        goto done;
+    }
+    result = PyUnicode_FromKindAndData(s.kind, s.out, s.length);
+
+done:
+    PyMem_Free(s.out);
+    Py_XDECREF(s.tables);
+    Py_XDECREF(s.indent);
+    Py_XDECREF(level_object);
+    Py_XDECREF(lines);
+    Py_XDECREF(breaks);
+    Py_XDECREF(closings);
+    Py_XDECREF(last);
+    return result;
+}
+
+static PyMethodDef methods[] = {
+    {"format_chunk", format_chunk, METH_VARARGS,
+     "format_chunk(formatter, chunk)\n--\n\n"
+     "Format `chunk` as `formatter._format()` does for text."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT,
+    "beautipy._speedups",
+    "Compiled scanner for beautipy.core.",
+    -1,
+    methods,
+    NULL,
+    NULL,
+    NULL,
+    NULL,
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    spaced_colon = PyUnicode_InternFromString(": ");
+    spaced_equals = PyUnicode_InternFromString(" = ");
+    if (spaced_colon == NULL || spaced_equals == NULL) {
+        return NULL;
+    }
+    return PyModule_Create(&module);
+}
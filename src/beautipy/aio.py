@@ -0,0 +1,153 @@
+"""Format inside an asyncio event loop without blocking it."""
+
+import asyncio
+import codecs
+import io
+from time import perf_counter
+from typing import Iterable
+
+from beautipy.core import _CONTAINERS, Formatter, _slices
+from beautipy.walker import walk
+
+# Default number of characters formatted between checks of the budget.
+_SLICE_SIZE = 16 * 1024
+# Default time in seconds the loop may be held before control is given back.
+_BUDGET = 0.005
+
+
+async def abeautify(
+    obj: object,
+    *,
+    slice_size: int = _SLICE_SIZE,
+    budget: float = _BUDGET,
+    **options: object
+) -> str:
+    """Format an object as `beautify()` does, yielding to the event loop.
+
+    The input is formatted in slices of `slice_size` characters, and
+    control is given back to the event loop whenever `budget` seconds have
+    passed since it last was, so other tasks keep running while a large
+    input is formatted. Built-in containers are walked as by `beautify()`,
+    `slice_size` characters or items at a time; other objects are
+    converted with `str()` in one step.
+
+    Args:
+        obj: The object to format. If not a string, `str(obj)` is used internally.
+        slice_size: Number of characters formatted between checks of the
+            budget. Must be `>= 1`. Defaults to 16 KiB.
+        budget: Time in seconds the event loop may be held at a time.
+            Must be `>= 0`. Defaults to `0.005`.
+        **options: Options of `beautify()`.
+
+    Returns:
+        The formatted string.
+
+    Raises:
+        ValueError: If an option is invalid, `slice_size` is less than 1 or
+            `budget` is negative.
+        TypeError: If an option is unknown.
+
+    Notes:
+        The output is joined into one string at the end, in a single step
+        that holds the loop for about a millisecond per megabyte of output.
+        Use `abeautify_stream()` to keep very large outputs off the loop.
+
+    Examples:
+        >>> print(asyncio.run(abeautify([1, 2])))
+        [
+            1,
+            2
+        ]
+    """
+    _check(slice_size, budget)
+    formatter = Formatter(**options)
+    if type(obj) in _CONTAINERS:
+        chunks = walk(formatter, obj, slice_size)
+    else:
+        text = obj if isinstance(obj, str) else str(obj)
+        chunks = map(formatter.feed, _slices(text, slice_size))
+    output = []
+    async for chunk in _cooperative(chunks, budget):
+        output.append(chunk)
+    output.append(formatter.close())
+    return ''.join(output)
+
+
+async def abeautify_stream(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    *,
+    encoding: str = 'utf-8',
+    errors: str = 'strict',
+    slice_size: int = _SLICE_SIZE,
+    budget: float = _BUDGET,
+    **options: object
+) -> None:
+    """Format the text read from `reader` and write the output to `writer`.
+
+    Reads up to `slice_size` bytes at a time until EOF, and writes the
+    output of each read as soon as it is formatted, waiting for `writer` to
+    drain, so memory use stays flat and a slow peer slows down reading.
+    Line endings are translated as by `open()` in text mode. `writer` is
+    not closed.
+
+    Args:
+        reader: The stream to read encoded text from.
+        writer: The stream to write the encoded output to.
+        encoding: Encoding of the input and of the output. Defaults to
+            `'utf-8'`.
+        errors: How decoding and encoding errors are handled, as in
+            `open()`. Defaults to `'strict'`.
+        slice_size: Number of bytes read and formatted at a time. Must be
+            `>= 1`. Defaults to 16 KiB.
+        budget: See `abeautify()`.
+        **options: Options of `beautify()`.
+
+    Raises:
+        OSError: If reading or writing fails.
+        UnicodeError: If the input is not valid in `encoding`, or the output
+            cannot be encoded.
+        ValueError: If an option is invalid, `slice_size` is less than 1 or
+            `budget` is negative.
+        TypeError: If an option is unknown.
+    """
+    _check(slice_size, budget)
+    formatter = Formatter(**options)
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    encoder = codecs.getincrementalencoder(encoding)(errors)
+    deadline = perf_counter() + budget
+    while True:
+        data = await reader.read(slice_size)
+        output = formatter.feed(decoder.decode(data, final=not data))
+        if not data:
+            output += formatter.close()
+        encoded = encoder.encode(output, final=not data)
+        if encoded:
+            writer.write(encoded)
+            await writer.drain()
+        if not data:
+            return
+        if perf_counter() >= deadline:
+            # Reads of buffered data do not give control back by themselves.
+            await asyncio.sleep(0)
+            deadline = perf_counter() + budget
+
+
+def _check(slice_size: int, budget: float) -> None:
+    """Raise ValueError if `slice_size` or `budget` is out of range."""
+    if slice_size < 1:
+        raise ValueError('slice_size must be greater than or equal to 1')
+    if budget < 0:
+        raise ValueError('budget must be greater than or equal to 0')
+
+
+async def _cooperative(chunks: Iterable[str], budget: float):
+    """Yield from `chunks`, giving control back to the loop every `budget` seconds."""
+    deadline = perf_counter() + budget
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+        if perf_counter() >= deadline:
+            await asyncio.sleep(0)
+            deadline = perf_counter() + budget
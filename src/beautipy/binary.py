@@ -0,0 +1,154 @@
+"""Format bytes without decoding them to text first."""
+
+import codecs
+from typing import Iterable, Optional, Union
+
+from beautipy.core import _CHUNK_SIZE, Style, _cached_style, _iter_chunks, _slices
+
+# Byte-formatting copies of recent styles, by style and encoding.
+_ENCODED = {}
+_ENCODED_CACHE_SIZE = 32
+
+_ASCII = bytes(range(128))
+
+
+def beautify_bytes(
+    data: Union[bytes, bytearray, memoryview],
+    out: Optional[Union[bytearray, memoryview]] = None,
+    *,
+    encoding: str = 'utf-8',
+    blank_line_depth: int = 0,
+    opener_same_line: bool = False,
+    compact_operators: bool = False,
+    expand_empty: bool = False,
+    indent: str = '    ',
+    max_indent_width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items_per_container: Optional[int] = None,
+    max_string_length: Optional[int] = None
+) -> Union[bytes, int]:
+    """Format encoded text, scanning the bytes directly.
+
+    Accepts the same options as `beautify()`. The characters that drive
+    formatting are all ASCII, so in an ASCII-compatible encoding they can be
+    found in the bytes themselves: the input is neither decoded nor copied
+    as a whole, and the output is produced as bytes in the same encoding.
+
+    Args:
+        data: The encoded text, as any object supporting the buffer
+            protocol, e.g. `bytes`, `bytearray`, `memoryview` or `mmap`.
+        out: A writable buffer, such as a `bytearray` or a `memoryview` of
+            one, to write the output into from its start. Defaults to
+            `None`, which returns the output as `bytes` instead.
+        encoding: Encoding of `data`, also used for `indent` and the
+            output. Must be UTF-8 or a single-byte encoding that extends
+            ASCII, such as `'latin-1'` or `'cp1252'`. Defaults to
+            `'utf-8'`.
+        blank_line_depth: See `beautify()`.
+        opener_same_line: See `beautify()`.
+        compact_operators: See `beautify()`.
+        expand_empty: See `beautify()`.
+        indent: See `beautify()`.
+        max_indent_width: See `beautify()`.
+        max_depth: See `beautify()`.
+        max_items_per_container: See `beautify()`.
+        max_string_length: See `beautify()`.
+
+    Returns:
+        The formatted bytes if `out` is None, otherwise the number of bytes
+        written into `out`.
+
+    Raises:
+        TypeError: If `data` is a `str` or not a bytes-like object, or if
+            `out` is not a writable bytes-like object.
+        ValueError: If `encoding` is not supported, if `out` is too small
+            for the output, or if `blank_line_depth`, `max_indent_width`
+            or any limit is negative.
+        LookupError: If `encoding` is unknown.
+
+    Examples:
+        >>> print(beautify_bytes(b'{"a": [1, 2]}', indent='  ').decode())
+        {
+          "a": 
+          [
+            1,
+            2
+          ]
+        }
+
+    Notes:
+        Only ASCII spaces, tabs and line breaks count as whitespace, while
+        `beautify()` also removes other Unicode whitespace between tokens,
+        such as no-break spaces. Otherwise the output is the same as that of
+        `beautify()` on the decoded text, encoded again. With any of the
+        `max_*` limits, the input is decoded and formatted as text.
+    """
+    if isinstance(data, str):
+        raise TypeError('data must be a bytes-like object, not str')
+    style = _cached_style(
+        blank_line_depth,
+        opener_same_line,
+        compact_operators,
+        expand_empty,
+        indent,
+        max_indent_width,
+        max_depth,
+        max_items_per_container,
+        max_string_length,
+    )
+    view = memoryview(data).cast('B')
+    encoded = _encoded_style(style, encoding)
+    if style._limits is not None:
+        chunks = [style.format(str(view, encoding)).encode(encoding)]
+    elif len(view) <= _CHUNK_SIZE and out is None:
+        # Small inputs skip the generators.
+        formatter = encoded.formatter()
+        return formatter.feed(view) + formatter.close()
+    else:
+        chunks = _iter_chunks(encoded.formatter(), _slices(view))
+    if out is None:
+        return b''.join(chunks)
+    return _write_into(out, chunks)
+
+
+def _encoded_style(style: Style, encoding: str) -> Style:
+    """Return a copy of `style` that formats bytes in `encoding`."""
+    key = (style, encoding)
+    encoded = _ENCODED.get(key)
+    if encoded is None:
+        _check_encoding(encoding)
+        encoded = style._encoded(encoding)
+        if len(_ENCODED) >= _ENCODED_CACHE_SIZE:
+            _ENCODED.clear()
+        _ENCODED[key] = encoded
+    return encoded
+
+
+def _check_encoding(encoding: str) -> None:
+    """Raise ValueError unless ASCII bytes always mean ASCII in `encoding`."""
+    if codecs.lookup(encoding).name == 'utf-8':
+        return
+    try:
+        ascii_compatible = _ASCII.decode(encoding) == _ASCII.decode('ascii')
+        # In multi-byte encodings, bytes after the first of a character may
+        # look like brackets or quotes.
+        single_byte = len(bytes(range(128, 256)).decode(encoding, 'replace')) == 128
+    except UnicodeError:
+        ascii_compatible = single_byte = False
+    if not (ascii_compatible and single_byte):
+        raise ValueError(f'encoding must be UTF-8 or a single-byte ASCII-compatible encoding, not {encoding!r}')
+
+
+def _write_into(out: Union[bytearray, memoryview], chunks: Iterable[bytes]) -> int:
+    """Copy `chunks` into `out` from its start and return the bytes written."""
+    target = memoryview(out).cast('B')
+    if target.readonly:
+        raise TypeError('out must be a writable bytes-like object')
+    written = 0
+    for chunk in chunks:
+        end = written + len(chunk)
+        if end > len(target):
+            raise ValueError(f'out is too small: {len(target)} bytes, at least {end} needed')
+        target[written:end] = chunk
+        written = end
+    return written
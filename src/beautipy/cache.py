@@ -0,0 +1,183 @@
+"""Cache the output for inputs that are formatted again and again."""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from beautipy.core import _CONTAINERS, _cached_style
+from beautipy.walker import is_small
+
+
+class CacheInfo(NamedTuple):
+    """Counters and size of a `ResultCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+class ResultCache:
+    """A least-recently-used cache of formatted output.
+
+    Entries are keyed on the input text and the options, so only an equal
+    input formatted with equal options is a hit. The text and the output
+    of each entry count towards `max_bytes`, and the least recently used
+    entries are evicted to stay within both bounds. Inputs longer than
+    `max_input_length` characters bypass the cache, so that one large input
+    cannot evict everything else. A `ResultCache` may be shared between
+    threads.
+
+    Args:
+        max_entries: Maximum number of entries. Must be `>= 0`.
+            Defaults to `1024`.
+        max_bytes: Maximum memory used by the texts and outputs held, as
+            counted by `sys.getsizeof()`. Must be `>= 0`. Defaults to 16 MiB.
+        max_input_length: Inputs with longer text are formatted without the
+            cache. Must be `>= 0`. Defaults to `65536`.
+
+    Raises:
+        ValueError: If a bound is negative.
+
+    Examples:
+        >>> cache = ResultCache(max_entries=100)
+        >>> first = cache.beautify('{ok:true}', compact_operators=True)
+        >>> cache.beautify('{ok:true}', compact_operators=True) is first
+        True
+        >>> cache.cache_info()
+        CacheInfo(hits=1, misses=1, evictions=0, entries=1, bytes=...)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_input_length: int = 64 * 1024
+    ) -> None:
+        for name, bound in (
+            ('max_entries', max_entries),
+            ('max_bytes', max_bytes),
+            ('max_input_length', max_input_length),
+        ):
+            if bound < 0:
+                raise ValueError(f'{name} must be greater than or equal to 0')
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_input_length = max_input_length
+        self._lock = threading.Lock()
+        # Output and size of each entry, least recently used first.
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def beautify(
+        self,
+        obj: object,
+        *,
+        blank_line_depth: int = 0,
+        opener_same_line: bool = False,
+        compact_operators: bool = False,
+        expand_empty: bool = False,
+        indent: str = '    ',
+        max_indent_width: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items_per_container: Optional[int] = None,
+        max_string_length: Optional[int] = None
+    ) -> str:
+        """Return `beautify(obj, ...)`, from the cache if possible.
+
+        Accepts the same options as `beautify()`. Strings are looked up as
+        they are, and other objects by their `str()`, except for built-in
+        containers with more than a few hundred items, which bypass the
+        cache without being converted to text. Calls that bypass the cache
+        count as misses.
+
+        Raises:
+            ValueError: If `blank_line_depth`, `max_indent_width` or any limit is negative.
+        """
+        options = (
+            blank_line_depth,
+            opener_same_line,
+            compact_operators,
+            expand_empty,
+            indent,
+            max_indent_width,
+            max_depth,
+            max_items_per_container,
+            max_string_length,
+        )
+        style = _cached_style(*options)
+        if isinstance(obj, str):
+            text = obj
+        elif type(obj) in _CONTAINERS and not is_small(obj):
+            text = None
+        else:
+            text = str(obj)
+        if text is None or len(text) > self._max_input_length:
+            with self._lock:
+                self._misses += 1
+            return style.format(obj if text is None else text)
+
+        key = (options, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        output = style.format(text)
+        size = sys.getsizeof(text) + sys.getsizeof(output)
+        with self._lock:
+            if key not in self._entries and size <= self._max_bytes and self._max_entries:
+                self._entries[key] = (output, size)
+                self._bytes += size
+                while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self._evictions += 1
+        return output
+
+    def cache_info(self) -> CacheInfo:
+        """Return the counters and the current size of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, len(self._entries), self._bytes)
+
+    def cache_clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+_DEFAULT_CACHE = ResultCache()
+
+
+def beautify_cached(obj: object, **options: object) -> str:
+    """Format `obj` as `beautify()` does, keeping recent results.
+
+    Uses a shared `ResultCache` with the default bounds. Like functions
+    wrapped by `functools.lru_cache()`, it has `cache_info()` and
+    `cache_clear()` attributes. Create a `ResultCache` for other bounds.
+
+    Args:
+        obj: The object to format.
+        **options: Options of `beautify()`.
+
+    Returns:
+        The formatted string.
+
+    Raises:
+        ValueError: If `blank_line_depth`, `max_indent_width` or any limit is negative.
+    """
+    return _DEFAULT_CACHE.beautify(obj, **options)
+
+
+beautify_cached.cache_info = _DEFAULT_CACHE.cache_info
+beautify_cached.cache_clear = _DEFAULT_CACHE.cache_clear
@@ -2,10 +2,18 @@
 
 from __future__ import annotations
 import argparse
+import codecs
+import io
 import sys
-from importlib.metadata import PackageNotFoundError, version
+import time
+from itertools import chain
+from functools import partial
+from typing import Iterable, Iterator, TextIO
 
-from beautipy import beautify
+from beautipy.core import beautify
+from beautipy.parallel import iter_parallel
+from beautipy.stats import FormatStats
+from beautipy.writer import beautify_to
 
 
 class CustomFormatter(
@@ -18,26 +26,40 @@ EXIT_OK = 0
 EXIT_ERROR = 1
 EXIT_INTERRUPTED = 130
 
+# Size of the blocks read from stdin in streaming mode.
+READ_SIZE = 64 * 1024
+
 EXAMPLES = """
 examples:
   beautipy '{"a": 1, "b": [2, 3]}'
   echo '[1, 2, 3]' | beautipy
   cat messy.json | beautipy -b 1 -i "  "
   beautipy -o '{"key":"value"}' > formatted.txt
+  tail -n 1 request.log | beautipy --max-depth 3 --max-items 20
+  beautipy --jobs 0 -f dump.txt > formatted.txt
+  tail -f app.log | beautipy --lines --max-string 80
+  beautipy --follow app.log --lines
+  beautipy --serve & beautipy --client '[1, 2]'
 """
 
 
 def _resolve_version() -> str:
     """Return the installed package version with a safe fallback."""
-    try:
-        return version("beautipy")
-    except PackageNotFoundError:
-        # Fall back to the package attribute when metadata is unavailable (e.g. in tests).
-        try:
-            from beautipy import __version__  # type: ignore import-not-found
-        except ImportError:
-            return "unknown"
-        return __version__
+    # Package metadata is slow to load, so it is only read for --version.
+    from beautipy import __version__
+
+    return __version__
+
+
+class _VersionAction(argparse.Action):
+    """Print the version and exit, looking it up only when asked for."""
+
+    def __init__(self, option_strings: list[str], dest: str, **kwargs: object) -> None:
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:  # type: ignore[no-untyped-def]
+        print(f"{parser.prog} {_resolve_version()}")
+        parser.exit()
 
 
 def parse_args(args: list[str] | None = None) -> argparse.Namespace:
@@ -49,13 +71,19 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--version",
-        action="version",
-        version=f"%(prog)s {_resolve_version()}",
+        action=_VersionAction,
+        help="show program's version number and exit",
     )
     parser.add_argument(
         "text",
         nargs="*",
-        help="Input text (concatenated). If omitted, read from stdin.",
+        help="Input text (concatenated). If omitted, read from --file or stdin.",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        metavar="PATH",
+        help="Read input from the file at PATH (UTF-8) without loading it into memory",
     )
     parser.add_argument(
         "-b",
@@ -90,7 +118,415 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         metavar="STR",
         help="Indentation string",
     )
-    return parser.parse_args(args)
+    parser.add_argument(
+        "--max-indent-width",
+        type=int,
+        metavar="N",
+        help="Start lines indented wider than N characters with a |depth| marker instead",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        metavar="N",
+        help="Replace the contents of structures nested more than N levels deep with ...",
+    )
+    parser.add_argument(
+        "--max-items",
+        type=int,
+        metavar="N",
+        help="Show at most N items of each structure",
+    )
+    parser.add_argument(
+        "--max-string",
+        type=int,
+        metavar="N",
+        help="Cut string literals after N characters",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Format large input on N processes (0: one per CPU)",
+    )
+    parser.add_argument(
+        "--lines",
+        action="store_true",
+        help="Format each input line as a separate record, with --jobs "
+        "sending batches of lines to worker processes",
+    )
+    parser.add_argument(
+        "--follow",
+        metavar="PATH",
+        help="Format the file at PATH, then keep formatting what is appended "
+        "to it, like tail -f, starting over if it is truncated or rotated",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print sizes, token counts and the time of each phase to stderr "
+        "(reads all input first, on one process)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve format requests on --socket until interrupted, using the "
+        "formatting options as defaults (see the README for the protocol)",
+    )
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="Send the input to the server on --socket, formatting it in "
+        "this process if no server is running",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Unix socket of --serve and --client, or - for --serve to speak "
+        "over stdin and stdout (default: $BEAUTIPY_SOCKET, "
+        "$XDG_RUNTIME_DIR/beautipy.sock or a per-user directory in the temp dir)",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Number of requests --serve formats at a time",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        metavar="SECONDS",
+        help="Seconds --client waits for the server before failing",
+    )
+    ns = parser.parse_args(args)
+    if ns.file is not None and ns.text:
+        parser.error("text arguments cannot be used with --file")
+    if ns.lines and ns.stats:
+        parser.error("--stats cannot be used with --lines")
+    if ns.serve and ns.client:
+        parser.error("--serve cannot be used with --client")
+    for mode in ("serve", "client"):
+        if getattr(ns, mode) and (ns.lines or ns.stats):
+            parser.error(f"--{mode} cannot be used with --lines or --stats")
+    if ns.serve and (ns.text or ns.file is not None):
+        parser.error("--serve does not take input")
+    if ns.follow is not None:
+        if ns.text or ns.file is not None:
+            parser.error("--follow does not take other input")
+        for name in ("stats", "serve", "client"):
+            if getattr(ns, name):
+                parser.error(f"--follow cannot be used with --{name}")
+        if ns.jobs != 1:
+            parser.error("--follow cannot be used with --jobs")
+    if ns.client and ns.socket == "-":
+        parser.error("--client needs a socket path")
+    if ns.timeout <= 0:
+        parser.error("--timeout must be greater than 0")
+    return ns
+
+
+def _format_options(ns: argparse.Namespace) -> dict:
+    """Return the keyword options for the formatter from parsed arguments."""
+    return {
+        "blank_line_depth": ns.blank_line_depth,
+        "opener_same_line": ns.opener_same_line,
+        "compact_operators": ns.compact_operators,
+        "expand_empty": ns.expand_empty,
+        "indent": ns.indent,
+        "max_indent_width": ns.max_indent_width,
+        "max_depth": ns.max_depth,
+        "max_items_per_container": ns.max_items,
+        "max_string_length": ns.max_string,
+    }
+
+
+def _workers(ns: argparse.Namespace) -> int | None:
+    """Return the number of workers for `--jobs`, or None for one per CPU."""
+    if ns.jobs < 0:
+        raise ValueError("--jobs must be greater than or equal to 0")
+    return ns.jobs or None
+
+
+def _read_blocks(stream: TextIO) -> Iterator[str]:
+    """Yield non-empty blocks of text from `stream` until EOF.
+
+    Reads from the underlying binary buffer when there is one, so that a
+    block is returned as soon as any data is available instead of waiting
+    for a full `READ_SIZE` block.
+    """
+    raw = getattr(stream, "buffer", None)
+    if raw is None or not hasattr(raw, "read1"):
+        while True:
+            block = stream.read(READ_SIZE)
+            if not block:
+                return
+            yield block
+
+    decoder = codecs.getincrementaldecoder(stream.encoding or "utf-8")(
+        getattr(stream, "errors", None) or "strict"
+    )
+    # Translate newlines the same way the text layer does.
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    while True:
+        data = raw.read1(READ_SIZE)
+        block = decoder.decode(data, final=not data)
+        if block:
+            yield block
+        if not data:
+            return
+
+
+def _no_input() -> int:
+    print("beautipy: no input provided", file=sys.stderr)
+    print("Try 'beautipy --help' for usage information.", file=sys.stderr)
+    return EXIT_ERROR
+
+
+def _stream(stdin: TextIO, ns: argparse.Namespace) -> int:
+    """Format stdin block by block, writing output as it is produced."""
+    try:
+        blocks = _read_blocks(stdin)
+        first = next(blocks, "")
+        if first == "":
+            return _no_input()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: read error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+
+    try:
+        chunks = iter_parallel(
+            chain([first], blocks), workers=_workers(ns), **_format_options(ns)
+        )
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+
+    stdout = sys.stdout
+    try:
+        for output in chunks:
+            stdout.write(output)
+            stdout.flush()
+        stdout.write("\n")
+        stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def _format_file(path: str, ns: argparse.Namespace) -> int:
+    """Format the file at `path`, writing output as it is produced."""
+    from beautipy.files import beautify_file
+
+    try:
+        beautify_file(path, sys.stdout, workers=_workers(ns), **_format_options(ns))
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def _flush_before_reads(blocks: Iterator[str], stream: TextIO) -> Iterator[str]:
+    """Yield from `blocks`, flushing `stream` before each block is read."""
+    while True:
+        # Output of complete lines is not held back while waiting for input.
+        stream.flush()
+        block = next(blocks, None)
+        if block is None:
+            return
+        yield block
+
+
+def _format_lines(pieces: Iterable[str], ns: argparse.Namespace) -> int:
+    """Format each line of `pieces` as its own record, writing as they are done."""
+    from beautipy.lines import beautify_lines
+
+    stdout = sys.stdout
+    try:
+        records = beautify_lines(
+            _flush_before_reads(iter(pieces), stdout),
+            workers=_workers(ns),
+            **_format_options(ns),
+        )
+        for record in records:
+            stdout.write(record + "\n")
+        stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def _follow(path: str, ns: argparse.Namespace) -> int:
+    """Format the file at `path` and what is appended to it until interrupted."""
+    from beautipy.follow import follow_file
+
+    stdout = sys.stdout
+    try:
+        for output in follow_file(path, lines=ns.lines, **_format_options(ns)):
+            stdout.write(output)
+            stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def _serve(ns: argparse.Namespace) -> int:
+    """Serve format requests until interrupted or, on stdin, until EOF."""
+    import signal
+
+    from beautipy.server import serve, serve_stdio
+
+    # Stop on SIGTERM as on Ctrl-C, so that the socket file is removed.
+    previous = signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        if ns.socket == "-":
+            serve_stdio(max_concurrent=ns.max_concurrent, **_format_options(ns))
+        else:
+            serve(ns.socket, max_concurrent=ns.max_concurrent, **_format_options(ns))
+    except KeyboardInterrupt:
+        return EXIT_OK
+    except (EOFError, OSError) as err:
+        print(f"beautipy: server error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    return EXIT_OK
+
+
+def _client(ns: argparse.Namespace, stdin: TextIO, stdin_is_tty: bool) -> int:
+    """Format the input on the server, or in this process if none is running."""
+    import socket
+
+    from beautipy.server import request
+
+    try:
+        if ns.file is not None:
+            with open(ns.file, encoding="utf-8") as fp:
+                text = fp.read()
+        elif ns.text:
+            text = " ".join(ns.text)
+        elif not stdin_is_tty:
+            text = "".join(_read_blocks(stdin))
+            if text == "":
+                return _no_input()
+        else:
+            return _no_input()
+
+        result = None
+        # Without Unix sockets, there can be no server.
+        if hasattr(socket, "AF_UNIX"):
+            try:
+                result = request(text, path=ns.socket, timeout=ns.timeout, **_format_options(ns))
+            except (FileNotFoundError, ConnectionRefusedError):
+                # No server is running.
+                pass
+        if result is None:
+            result = beautify(text, **_format_options(ns))
+        sys.stdout.write(result + "\n")
+        sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def _format_with_stats(ns: argparse.Namespace, stdin: TextIO, stdin_is_tty: bool) -> int:
+    """Read all input, format it in timed phases and print the stats."""
+    stats = FormatStats()
+    try:
+        start = time.perf_counter()
+        if ns.file is not None:
+            with open(ns.file, encoding="utf-8") as fp:
+                text = fp.read()
+        elif ns.text:
+            text = " ".join(ns.text)
+        elif not stdin_is_tty:
+            text = "".join(_read_blocks(stdin))
+            if text == "":
+                return _no_input()
+        else:
+            return _no_input()
+        stats.read_seconds = time.perf_counter() - start
+
+        result = beautify(text, stats=stats, **_format_options(ns))
+
+        start = time.perf_counter()
+        sys.stdout.write(result + "\n")
+        sys.stdout.flush()
+        stats.write_seconds = time.perf_counter() - start
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except ValueError as err:
+        print(f"beautipy: {err}", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as err:
+        print(f"beautipy: unexpected error: {err}", file=sys.stderr)
+        return EXIT_ERROR
+
+    print(stats.summary(), file=sys.stderr)
+    return EXIT_OK
 
 
 def main(args: list[str] | None = None) -> int:
@@ -103,18 +539,35 @@ def main(args: list[str] | None = None) -> int:
         stdin = sys.stdin
         stdin_is_tty = getattr(stdin, "isatty", lambda: False)()
 
+        if ns.follow is not None:
+            return _follow(ns.follow, ns)
+        if ns.serve:
+            return _serve(ns)
+        if ns.client:
+            return _client(ns, stdin, stdin_is_tty)
+        if ns.stats:
+            return _format_with_stats(ns, stdin, stdin_is_tty)
+        if ns.lines:
+            if ns.file is not None:
+                with open(ns.file, encoding="utf-8") as fp:
+                    return _format_lines(iter(partial(fp.read, READ_SIZE), ""), ns)
+            if ns.text:
+                return _format_lines([" ".join(ns.text)], ns)
+            if stdin_is_tty:
+                return _no_input()
+            blocks = _read_blocks(stdin)
+            first = next(blocks, "")
+            if first == "":
+                return _no_input()
+            return _format_lines(chain([first], blocks), ns)
+        if ns.file is not None:
+            return _format_file(ns.file, ns)
         if ns.text:
             text = " ".join(ns.text)
         elif not stdin_is_tty:
-            text = stdin.read()
-            if text == "":
-                print("beautipy: no input provided", file=sys.stderr)
-                print("Try 'beautipy --help' for usage information.", file=sys.stderr)
-                return EXIT_ERROR
+            return _stream(stdin, ns)
         else:
-            print("beautipy: no input provided", file=sys.stderr)
-            print("Try 'beautipy --help' for usage information.", file=sys.stderr)
-            return EXIT_ERROR
+            return _no_input()
 
     except KeyboardInterrupt:
         print("\nInterrupted", file=sys.stderr)
@@ -127,22 +580,21 @@ def main(args: list[str] | None = None) -> int:
         return EXIT_ERROR
 
     try:
-        result = beautify(
-            text,
-            blank_line_depth=ns.blank_line_depth,
-            opener_same_line=ns.opener_same_line,
-            compact_operators=ns.compact_operators,
-            expand_empty=ns.expand_empty,
-            indent=ns.indent,
-        )
+        beautify_to(text, sys.stdout, workers=_workers(ns), **_format_options(ns))
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as err:
+        print(f"beautipy: I/O error: {err}", file=sys.stderr)
+        return EXIT_ERROR
     except ValueError as err:
         print(f"beautipy: {err}", file=sys.stderr)
         return EXIT_ERROR
     except Exception as err:
         print(f"beautipy: unexpected error: {err}", file=sys.stderr)
         return EXIT_ERROR
-
-    print(result)
     return EXIT_OK
 
 
@@ -1,8 +1,139 @@
 """Core formatting logic."""
 
-_OPENERS = {'{', '[', '('}
-_CLOSERS = {'}', ']', ')'}
-_QUOTES = {"'", '"'}
+import os
+import re
+from time import perf_counter
+from typing import Iterable, Iterator, Optional
+
+from beautipy.limits import Limiter
+from beautipy.stats import FormatStats
+from beautipy.walker import is_small, walk
+
+try:
+    from beautipy._speedups import format_chunk as _compiled_format
+except ImportError:
+    _compiled_format = None
+
+# Types whose `str()` is walked piece by piece instead of built in one go.
+_CONTAINERS = {dict, list, tuple, set, frozenset}
+
+# One step of the scanner: a run of ordinary text and whitespace, followed by
+# a string literal, a bracket, an unterminated string literal or the end.
+# String literals without whitespace, escapes, commas or operators need no
+# special care and stay inside the run, so most steps cover many characters.
+_SEGMENT = r"""
+    ([^'"{}\[\]()]*(?:(?:'[^'\\\s,:=]*'|"[^"\\\s,:=]*")[^'"{}\[\]()]*)*)
+    (?:('[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")
+    |([{}\[\]()]|['"].*|\Z))
+"""
+# The content of a string literal up to and including its closing quote,
+# skipping escapes, or up to a backslash that ends the chunk. The second
+# pattern continues after a backslash that ended the previous chunk.
+_STRING_BODY = r"[^%s\\]*(?:\\.[^%s\\]*)*([%s\\])?"
+_ESCAPED_STRING_BODY = "." + _STRING_BODY
+
+
+class _Syntax:
+    """The literals and compiled patterns of the scanner for one text type.
+
+    The scanner works the same on `str` and on `bytes`; everything that
+    depends on the type is looked up here.
+    """
+
+    __slots__ = (
+        'empty',
+        'comma',
+        'newline',
+        'depth_marker',
+        'colon',
+        'spaced_colon',
+        'equals',
+        'spaced_equals',
+        'openers',
+        'closers',
+        'spaced_operators',
+        'segment',
+        'string_bodies',
+    )
+
+    def __init__(self, convert):
+        self.empty = convert('')
+        self.comma = convert(',')
+        self.newline = convert('\n')
+        self.depth_marker = convert('|%d|')
+        self.colon = convert(':')
+        self.spaced_colon = convert(': ')
+        self.equals = convert('=')
+        self.spaced_equals = convert(' = ')
+        self.openers = {convert(char) for char in '{[('}
+        self.closers = {convert(char) for char in '}])'}
+        self.spaced_operators = {self.equals: self.spaced_equals, self.colon: self.spaced_colon}
+        self.segment = re.compile(convert(_SEGMENT), re.VERBOSE | re.DOTALL)
+        # Patterns by quote and by whether an escape is pending.
+        self.string_bodies = {
+            (convert(quote), escaped): re.compile(convert(pattern % (quote, quote, quote)), re.DOTALL)
+            for quote in '\'"'
+            for escaped, pattern in ((False, _STRING_BODY), (True, _ESCAPED_STRING_BODY))
+        }
+
+
+_TEXT = _Syntax(str)
+# Built by `Style._encoded()` on first use, so that importing the module does
+# not compile patterns that only `beautify_bytes()` needs.
+_BYTES = None
+
+# Maximum number of distinct formatted runs cached per depth.
+_RUN_CACHE_SIZE = 1024
+
+# Number of input characters scanned before `beautify_iter()` yields a chunk.
+_CHUNK_SIZE = 64 * 1024
+
+# The scanner used for text by new formatters, compiled or vectorised, or
+# None for the Python one. Set by `use_engine()`.
+_scan = None
+
+
+def use_engine(engine: str) -> None:
+    """Choose the scanner used for text by formatters created from now on.
+
+    The compiled scanner in `beautipy._speedups` is used when it was built,
+    and the pure-Python scanner otherwise; all give identical output. The
+    NumPy engine in `beautipy.vectorized` is only used when chosen: it is
+    faster than the Python scanner on deeply nested input, but slower on
+    long runs of plain text. The choice can also be made with the
+    `BEAUTIPY_ENGINE` environment variable, which is read at import, also in
+    worker processes.
+
+    Args:
+        engine: `'c'` for the compiled scanner, `'numpy'` for the NumPy
+            engine, `'python'` for the pure-Python scanner, or `'auto'` for
+            the compiled one if available.
+
+    Raises:
+        ValueError: If `engine` is not one of these.
+        ImportError: If `engine` is `'c'` and the compiled scanner is not
+            available, or `'numpy'` and NumPy is not installed.
+    """
+    global _scan
+    if engine == 'auto':
+        _scan = _compiled_format
+    elif engine == 'c':
+        if _compiled_format is None:
+            raise ImportError('the compiled scanner beautipy._speedups is not available')
+        _scan = _compiled_format
+    elif engine == 'numpy':
+        from beautipy import vectorized
+
+        if vectorized.load() is None:
+            raise ImportError('the NumPy engine needs numpy, which is not installed')
+        _scan = vectorized.format_chunk
+    elif engine == 'python':
+        _scan = None
+    else:
+        raise ValueError(f"engine must be 'auto', 'c', 'numpy' or 'python', not {engine!r}")
+
+
+use_engine(os.environ.get('BEAUTIPY_ENGINE', 'auto'))
 
 
 def beautify(
@@ -12,13 +143,20 @@ def beautify(
     opener_same_line: bool = False,
     compact_operators: bool = False,
     expand_empty: bool = False,
-    indent: str = '    '
+    indent: str = '    ',
+    max_indent_width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items_per_container: Optional[int] = None,
+    max_string_length: Optional[int] = None,
+    stats: Optional[FormatStats] = None
 ) -> str:
     """Format a data structure into a human-readable string.
 
     Prettifies the `str()` representation of an object by applying indentation,
     line breaks, and spacing rules, making deeply nested structures easier to
-    read and understand.
+    read and understand. Built-in containers (`dict`, `list`, `tuple`, `set`
+    and `frozenset`) are walked directly, so their full representation is
+    never built as one string.
 
     Args:
         obj: The object to format. If not a string, `str(obj)` is used internally.
@@ -32,12 +170,30 @@ def beautify(
             or `[]` are expanded into multiple lines. Defaults to `False`.
         indent: String used for each level of indentation.
             Defaults to `    ` (4 spaces).
+        max_indent_width: If set, lines whose indentation would be wider
+            than this many characters start with a depth marker such as
+            `|12|` followed by one `indent` instead, so that deeply nested
+            output stops growing with the depth. Must be `>= 0`. Defaults
+            to `None` (no limit).
+        max_depth: If set, the contents of structures nested more than this
+            many levels deep are replaced by `...`. Must be `>= 0`.
+            Defaults to `None` (no limit).
+        max_items_per_container: If set, items of a structure after the
+            first this many are replaced by a marker such as `<+1234 items>`.
+            Must be `>= 0`. Defaults to `None` (no limit).
+        max_string_length: If set, string literals are cut after this many
+            characters, followed by a marker such as `<+1234 chars>`.
+            Must be `>= 0`. Defaults to `None` (no limit).
+        stats: If set, a `FormatStats` that is filled in with the sizes,
+            token counts and time spent in each phase. The object is then
+            converted with `str()` as a whole, so that the phases can be
+            timed apart. Defaults to `None`.
 
     Returns:
         The formatted string representation of the input object.
 
     Raises:
-        ValueError: If `blank_line_depth` is negative.
+        ValueError: If `blank_line_depth`, `max_indent_width` or any limit is negative.
 
     Examples:
         >>> data = ['Mango','Cherry']
@@ -61,88 +217,753 @@ def beautify(
         without semantic understanding of the input structure.
         As a result, the function can produce reasonable output even for
         non-standard or malformed syntax (see Examples).
+
+        Limits are applied to the text as well: items are counted by their
+        separating commas and nesting by the opening characters, and the
+        elided text is skipped without being formatted. For built-in
+        containers, elided items are never converted to text at all.
     """
 
-    def newline(count=0):
-        count = count if count else 2 if indent_level < blank_line_depth else 1
-        return count * ('\n' + indent_level * indent)
-
-    if blank_line_depth < 0:
-        raise ValueError('blank_line_depth must be greater than or equal to 0')
-
-    indent_level = 0
-    string_opener = None
-    last_was_escape = False
-    buffer = []
-    source_text = obj if isinstance(obj, str) else str(obj)
-    i = -1
-    
-    while i < len(source_text) - 1:
-        i += 1
-        char = source_text[i]
-
-        if string_opener:
-            buffer.append(char)
-            if last_was_escape:
-                last_was_escape = False
+    style = _cached_style(
+        blank_line_depth,
+        opener_same_line,
+        compact_operators,
+        expand_empty,
+        indent,
+        max_indent_width,
+        max_depth,
+        max_items_per_container,
+        max_string_length,
+    )
+    if stats is not None:
+        return _format_with_stats(style, obj, stats)
+    return style.format(obj)
+
+
+def beautify_iter(
+    obj: object,
+    *,
+    blank_line_depth: int = 0,
+    opener_same_line: bool = False,
+    compact_operators: bool = False,
+    expand_empty: bool = False,
+    indent: str = '    ',
+    max_indent_width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items_per_container: Optional[int] = None,
+    max_string_length: Optional[int] = None
+) -> Iterator[str]:
+    """Format a data structure, yielding the output in chunks.
+
+    Accepts the same options as `beautify()`. Output is produced while the
+    input is scanned, so callers can start writing before the whole input
+    has been processed, and only a small amount of state is kept between
+    chunks. Joining the chunks gives exactly the result of `beautify()`.
+
+    Args:
+        obj: The object to format. If not a string, `str(obj)` is used internally.
+        blank_line_depth: See `beautify()`.
+        opener_same_line: See `beautify()`.
+        compact_operators: See `beautify()`.
+        expand_empty: See `beautify()`.
+        indent: See `beautify()`.
+        max_indent_width: See `beautify()`.
+        max_depth: See `beautify()`.
+        max_items_per_container: See `beautify()`.
+        max_string_length: See `beautify()`.
+
+    Returns:
+        An iterator over consecutive chunks of the formatted string.
+
+    Raises:
+        ValueError: If `blank_line_depth`, `max_indent_width` or any limit
+            is negative. Raised immediately, not on the first iteration.
+
+    Examples:
+        >>> for chunk in beautify_iter([1, 2]):
+        ...     print(chunk, end='')
+        [
+            1,
+            2
+        ]
+    """
+    style = _cached_style(
+        blank_line_depth,
+        opener_same_line,
+        compact_operators,
+        expand_empty,
+        indent,
+        max_indent_width,
+        max_depth,
+        max_items_per_container,
+        max_string_length,
+    )
+    return _iter_format(style.formatter(), obj)
+
+
+def _format_with_stats(style: 'Style', obj: object, stats: FormatStats) -> str:
+    """Format `obj` in separately timed phases and fill in `stats`."""
+    start = perf_counter()
+    text = obj if isinstance(obj, str) else str(obj)
+    scan_start = perf_counter()
+    formatter = style.formatter()
+    chunks = [formatter.feed(piece) for piece in _slices(text)]
+    chunks.append(formatter.close())
+    join_start = perf_counter()
+    output = ''.join(chunks)
+    end = perf_counter()
+    stats.repr_seconds = scan_start - start
+    stats.scan_seconds = join_start - scan_start
+    stats.join_seconds = end - join_start
+    stats._count(text, output)
+    return output
+
+
+def _iter_format(formatter: 'Formatter', obj: object) -> Iterator[str]:
+    """Format `obj` with a new or reset `formatter` and yield the output."""
+    if isinstance(obj, str):
+        pieces = _slices(obj)
+    elif type(obj) in _CONTAINERS:
+        return _iter_walk(formatter, obj)
+    else:
+        pieces = _slices(str(obj))
+    return _iter_chunks(formatter, pieces)
+
+
+def _iter_walk(formatter: 'Formatter', obj: object) -> Iterator[str]:
+    """Format a built-in container with `formatter` and yield the output."""
+    for output in walk(formatter, obj):
+        if output:
+            yield output
+    output = formatter.close()
+    if output:
+        yield output
+
+
+def _slices(source_text: str, size: int = _CHUNK_SIZE) -> Iterator[str]:
+    """Yield consecutive `size` slices of `source_text`."""
+    for start in range(0, len(source_text), size):
+        yield source_text[start:start + size]
+
+
+def _iter_chunks(formatter: 'Formatter', pieces: Iterable[str]) -> Iterator[str]:
+    """Feed consecutive pieces of input to `formatter` and yield the output."""
+    for piece in pieces:
+        output = formatter.feed(piece)
+        if output:
+            yield output
+    output = formatter.close()
+    if output:
+        yield output
+
+
+class Style:
+    """Formatting options, validated once, with their precomputed tables.
+
+    A `Style` checks its options once: the newline and indentation strings
+    for each depth, including the blank-line variants, and the cache of
+    formatted runs of text are kept and shared by everything it formats.
+    The tables grow as deeper levels are reached. `beautify()` keeps the
+    styles of up to 32 recent option sets in a cache that is cleared when
+    it is full, so calls that cycle through more option sets set up a new
+    style each time. Holding one instance avoids that, along with the cache
+    lookup on each call. A `Style` may be shared between threads.
+
+    Args:
+        blank_line_depth: See `beautify()`.
+        opener_same_line: See `beautify()`.
+        compact_operators: See `beautify()`.
+        expand_empty: See `beautify()`.
+        indent: See `beautify()`.
+        max_indent_width: See `beautify()`.
+        max_depth: See `beautify()`.
+        max_items_per_container: See `beautify()`.
+        max_string_length: See `beautify()`.
+
+    Raises:
+        ValueError: If `blank_line_depth`, `max_indent_width` or any limit is negative.
+
+    Examples:
+        >>> style = Style(indent='  ', compact_operators=True)
+        >>> print(style.format({'a': 1}))
+        {
+          'a':1
+        }
+    """
+
+    __slots__ = (
+        '_blank_line_depth',
+        '_opener_same_line',
+        '_compact_operators',
+        '_expand_empty',
+        '_indent',
+        '_max_indent_width',
+        '_marked_depth',
+        '_tail_width',
+        '_limits',
+        '_syntax',
+        '_tables',
+    )
+
+    def __init__(
+        self,
+        *,
+        blank_line_depth: int = 0,
+        opener_same_line: bool = False,
+        compact_operators: bool = False,
+        expand_empty: bool = False,
+        indent: str = '    ',
+        max_indent_width: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items_per_container: Optional[int] = None,
+        max_string_length: Optional[int] = None
+    ) -> None:
+        if blank_line_depth < 0:
+            raise ValueError('blank_line_depth must be greater than or equal to 0')
+        if max_indent_width is not None and max_indent_width < 0:
+            raise ValueError('max_indent_width must be greater than or equal to 0')
+        self._limits = None
+        if max_depth is not None or max_items_per_container is not None or max_string_length is not None:
+            for name, limit in (
+                ('max_depth', max_depth),
+                ('max_items_per_container', max_items_per_container),
+                ('max_string_length', max_string_length),
+            ):
+                if limit is not None and limit < 0:
+                    raise ValueError(f'{name} must be greater than or equal to 0')
+            self._limits = (max_depth, max_items_per_container, max_string_length)
+
+        self._blank_line_depth = blank_line_depth
+        self._opener_same_line = opener_same_line
+        self._compact_operators = compact_operators
+        self._expand_empty = expand_empty
+        self._indent = indent
+        self._max_indent_width = max_indent_width
+        # The first depth whose lines start with a depth marker, if any. In
+        # characters of `indent`, also when it is encoded for bytes.
+        self._marked_depth = None
+        if max_indent_width is not None and indent:
+            self._marked_depth = max_indent_width // len(indent) + 1
+        # The length of the last character of the output, as kept in
+        # `Formatter._last`, see `_encoded()`.
+        self._tail_width = 1
+        self._syntax = _TEXT
+        # Per-depth newline strings and run caches, see `Formatter._bind()`.
+        # Tuples that are replaced, never changed, when they grow.
+        self._tables = ((), (), (), ())
+        self._grow_tables(0)
+
+    @property
+    def options(self) -> dict:
+        """The options as keyword arguments of `beautify()`."""
+        limits = self._limits or (None, None, None)
+        return {
+            'blank_line_depth': self._blank_line_depth,
+            'opener_same_line': self._opener_same_line,
+            'compact_operators': self._compact_operators,
+            'expand_empty': self._expand_empty,
+            'indent': self._indent,
+            'max_indent_width': self._max_indent_width,
+            'max_depth': limits[0],
+            'max_items_per_container': limits[1],
+            'max_string_length': limits[2],
+        }
+
+    def __repr__(self) -> str:
+        options = ', '.join(f'{name}={value!r}' for name, value in self.options.items())
+        return f'Style({options})'
+
+    def format(self, obj: object) -> str:
+        """Format `obj` as `beautify()` does with these options."""
+        formatter = self.formatter()
+        if isinstance(obj, str):
+            text = obj
+        elif type(obj) not in _CONTAINERS:
+            text = str(obj)
+        elif self._limits is None and is_small(obj):
+            text = repr(obj)
+        else:
+            return ''.join(_iter_walk(formatter, obj))
+        if len(text) > _CHUNK_SIZE:
+            return ''.join(_iter_chunks(formatter, _slices(text)))
+        # Small inputs skip the generators.
+        return formatter.feed(text) + formatter.close()
+
+    def format_iter(self, obj: object) -> Iterator[str]:
+        """Format `obj` as `beautify_iter()` does with these options."""
+        return _iter_format(self.formatter(), obj)
+
+    def formatter(self) -> 'Formatter':
+        """Return a new `Formatter` with these options."""
+        formatter = Formatter.__new__(Formatter)
+        formatter._bind(self)
+        return formatter
+
+    def _encoded(self, encoding):
+        """Return a copy that formats bytes, with `indent` in `encoding`.
+
+        Limits are not copied: they are only applied to text.
+        """
+        global _BYTES
+        style = Style.__new__(Style)
+        for name in Style.__slots__:
+            setattr(style, name, getattr(self, name))
+        style._indent = self._indent.encode(encoding)
+        # Output ends with a one-character indent if its last character is
+        # that indent, which takes several bytes in UTF-8. An indent of more
+        # characters is never matched by the last character alone.
+        if len(self._indent) == 1:
+            style._tail_width = len(style._indent)
+        style._limits = None
+        if _BYTES is None:
+            _BYTES = _Syntax(lambda text: text.encode('ascii'))
+        style._syntax = _BYTES
+        style._tables = ((), (), (), ())
+        style._grow_tables(0)
+        return style
+
+    def _grow_tables(self, level):
+        """Return the per-depth tables, extended to cover `level`.
+
+        The tables at least double in size, and they are replaced in one
+        step, so that a formatter in another thread sees either the old or
+        the new tables.
+        """
+        tables = self._tables
+        lines, breaks, closings, runs = tables
+        if level < len(breaks):
+            return tables
+        indent = self._indent
+        syntax = self._syntax
+        marked = self._marked_depth
+        new_lines, new_breaks, new_closings = [], [], []
+        outer = lines[-1] if lines else None
+        for depth in range(len(breaks), max(level + 1, 2 * len(breaks))):
+            if marked is None or depth < marked:
+                line = syntax.newline + depth * indent
+                brk = 2 * line if depth < self._blank_line_depth else line
+                closing = brk[:-len(indent)] if brk.endswith(indent) else brk
+            else:
+                # The marker is followed by an indent like any other line, so
+                # the scanners tell the start of a line the same way. Blank
+                # lines stay empty, and closing characters go on a line of
+                # the enclosing depth.
+                line = syntax.newline + syntax.depth_marker % depth + indent
+                brk = syntax.newline + line if depth < self._blank_line_depth else line
+                closing = brk[:-len(line)] + outer
+            new_lines.append(line)
+            new_breaks.append(brk)
+            new_closings.append(closing)
+            outer = line
+        tables = (
+            lines + tuple(new_lines),
+            breaks + tuple(new_breaks),
+            closings + tuple(new_closings),
+            runs + tuple({} for _ in new_lines),
+        )
+        if len(tables[1]) > len(self._tables[1]):
+            self._tables = tables
+        return tables
+
+
+# Styles of recent `beautify()` calls, by their options.
+_STYLES = {}
+_STYLE_CACHE_SIZE = 32
+
+
+def _cached_style(*options) -> Style:
+    """Return a `Style` for the positional `beautify()` options."""
+    style = _STYLES.get(options)
+    if style is None:
+        names = (
+            'blank_line_depth',
+            'opener_same_line',
+            'compact_operators',
+            'expand_empty',
+            'indent',
+            'max_indent_width',
+            'max_depth',
+            'max_items_per_container',
+            'max_string_length',
+        )
+        style = Style(**dict(zip(names, options)))
+        if len(_STYLES) >= _STYLE_CACHE_SIZE:
+            _STYLES.clear()
+        _STYLES[options] = style
+    return style
+
+
+class Formatter:
+    """Incremental formatter for input that arrives in pieces.
+
+    Feed consecutive chunks of text with `feed()` and finish with `close()`.
+    The formatter keeps the string and escape state, the indentation level
+    and any opening character whose empty-structure check is still pending,
+    so the concatenated output is identical to `beautify()` on the joined
+    input, however it is split.
+
+    Args:
+        blank_line_depth: See `beautify()`.
+        opener_same_line: See `beautify()`.
+        compact_operators: See `beautify()`.
+        expand_empty: See `beautify()`.
+        indent: See `beautify()`.
+        max_indent_width: See `beautify()`.
+        max_depth: See `beautify()`.
+        max_items_per_container: See `beautify()`.
+        max_string_length: See `beautify()`.
+
+    Raises:
+        ValueError: If `blank_line_depth`, `max_indent_width` or any limit is negative.
+
+    Examples:
+        >>> formatter = Formatter()
+        >>> out = formatter.feed('{"a": [')
+        >>> out += formatter.feed('1, 2]}')
+        >>> out += formatter.close()
+        >>> print(out)
+        {
+            "a": 
+            [
+                1,
+                2
+            ]
+        }
+    """
+
+    def __init__(
+        self,
+        *,
+        blank_line_depth: int = 0,
+        opener_same_line: bool = False,
+        compact_operators: bool = False,
+        expand_empty: bool = False,
+        indent: str = '    ',
+        max_indent_width: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items_per_container: Optional[int] = None,
+        max_string_length: Optional[int] = None
+    ) -> None:
+        self._bind(Style(
+            blank_line_depth=blank_line_depth,
+            opener_same_line=opener_same_line,
+            compact_operators=compact_operators,
+            expand_empty=expand_empty,
+            indent=indent,
+            max_indent_width=max_indent_width,
+            max_depth=max_depth,
+            max_items_per_container=max_items_per_container,
+            max_string_length=max_string_length,
+        ))
+
+    def _bind(self, style):
+        """Take the options and the per-depth tables from `style`."""
+        self._style = style
+        self._opener_same_line = style._opener_same_line
+        self._compact_operators = style._compact_operators
+        self._expand_empty = style._expand_empty
+        self._indent = style._indent
+        self._tail_width = style._tail_width
+        self._limits = style._limits
+        self._syntax = style._syntax
+        self._scan = _scan if style._syntax is _TEXT else None
+        # Per-depth output for `newline(1)`, `newline()` and the newline
+        # before a closing character, and the per-depth cache of formatted
+        # runs of ordinary text. Shared with other formatters of the style.
+        self._lines, self._breaks, self._closings, self._runs = style._tables
+        self._reset()
+
+    def _reset(self):
+        """Set up the state for the start of an input."""
+        self._indent_level = 0
+        self._string_opener = None
+        self._last_was_escape = False
+        # The most recent output fragment, or None if nothing was written yet.
+        # Runs of ordinary characters count as single-character fragments.
+        self._last = None
+        # An opening character waiting for the next non-space character.
+        self._pending_opener = None
+        self._closed = False
+        self._limiter = None if self._limits is None else Limiter(self, *self._limits)
+
+    def _resume(self, level, tail):
+        """Continue from a point of the input outside any string literal.
+
+        `level` is the indentation level there, and `tail` the character
+        just before it: a comma, or the closing character of a non-empty
+        structure. Used by `beautipy.parallel` to format a segment of the
+        input on its own.
+        """
+        if level >= len(self._breaks):
+            self._grow_tables(level)
+        self._indent_level = level
+        comma = self._syntax.comma
+        self._last = comma + self._breaks[level] if tail == comma else tail
+
+    def _checkpoint(self):
+        """Return the state reached so far, without limits, for `_restore()`.
+
+        Formatters in equal states give equal output for equal input from
+        there on. Used by `beautipy.incremental` to resume at a checkpoint
+        and to tell when a re-run has caught up with an earlier one.
+        """
+        return (
+            self._indent_level,
+            self._string_opener,
+            self._last_was_escape,
+            self._last,
+            self._pending_opener,
+        )
+
+    def _restore(self, state):
+        """Go back to a state returned by `_checkpoint()`."""
+        (
+            self._indent_level,
+            self._string_opener,
+            self._last_was_escape,
+            self._last,
+            self._pending_opener,
+        ) = state
+        if self._indent_level >= len(self._breaks):
+            self._grow_tables(self._indent_level)
+        self._closed = False
+
+    def feed(self, chunk: str) -> str:
+        """Process the next piece of input.
+
+        Args:
+            chunk: The next piece of the input text.
+
+        Returns:
+            The output that became final with this chunk. May be empty.
+
+        Raises:
+            ValueError: If the formatter has already been closed.
+        """
+        if self._closed:
+            raise ValueError('feed() called after close()')
+        if self._limiter is not None:
+            return self._limiter.feed(chunk)
+        return self._format(chunk)
+
+    def _format(self, chunk):
+        """Format the next piece of input, as `feed()` without limits."""
+        if self._scan is not None:
+            return self._scan(self, chunk)
+        return self._scan_python(chunk)
+
+    def _scan_python(self, chunk):
+        """Format the next piece of input with the pure-Python scanner."""
+        buffer = []
+        append = buffer.append
+        syntax = self._syntax
+        empty = syntax.empty
+        separator = syntax.comma
+        colon, spaced_colon = syntax.colon, syntax.spaced_colon
+        equals, spaced_equals = syntax.equals, syntax.spaced_equals
+        openers = syntax.openers
+        closers = syntax.closers
+        spaced_operators = not self._compact_operators
+        opener_same_line = self._opener_same_line
+        indent = self._indent
+        width = self._tail_width
+        lines = self._lines
+        breaks = self._breaks
+        closings = self._closings
+        runs = self._runs
+        level = self._indent_level
+        cache = runs[level]
+        comma = separator + breaks[level]
+        tail = self._last
+        # The last run of ordinary text, if it was written after `tail`.
+        tail_run = None
+        pending = self._pending_opener
+        pos = 0
+
+        if self._string_opener:
+            pos = self._scan_string(chunk, 0, append)
+            if pos:
+                tail = buffer[-1][-width:]
+
+        for run, string, token in syntax.segment.findall(chunk, pos):
+            if pending:
+                if not (string or run and not run.isspace()):
+                    if not token:
+                        continue
+                    if token in closers:
+                        tail = self._open_empty(buffer, pending, tail, tail_run, level, token)
+                        tail_run = pending = None
+                        continue
+                if not opener_same_line:
+                    if tail_run is not None:
+                        tail = self._run_tail(tail_run, level, tail)
+                    if tail is not None and not tail.endswith(indent):
+                        append(lines[level])
+                level += 1
+                if level == len(breaks):
+                    lines, breaks, closings, runs = self._grow_tables(level)
+                tail = pending + breaks[level]
+                append(tail)
+                tail_run = pending = None
+                cache = runs[level]
+                comma = separator + breaks[level]
+
+            if run:
+                output = cache.get(run)
+                if output is None:
+                    output = empty.join(run.split())
+                    if spaced_operators:
+                        output = output.replace(colon, spaced_colon).replace(equals, spaced_equals)
+                    output = output.replace(separator, comma)
+                    if len(cache) < _RUN_CACHE_SIZE:
+                        cache[run] = output
+                if output:
+                    append(output)
+                    tail_run = run
+
+            if string:
+                append(string)
+                tail = string[-width:]
+                tail_run = None
+            elif not token:
                 continue
-            if char == '\\':
-                last_was_escape = True
-            elif char == string_opener:
-                string_opener = None
-            continue
-        
-        if char.isspace():
-            continue
-
-        if char in _OPENERS:
-            next_char = None
-            next_index = i
-            for j in range(i + 1, len(source_text)):
-                if not source_text[j].isspace():
-                    next_char = source_text[j]
-                    next_index = j
-                    break
-            if next_char in _CLOSERS:
-                if expand_empty:
-                    if not opener_same_line and buffer and not buffer[-1].endswith(indent):
-                        buffer.append(newline(1))
-                    buffer.append(char + newline() + next_char)
-                else:
-                    buffer.append(char + next_char)
-                i = next_index
+            elif token in openers:
+                pending = token
+            elif token in closers:
+                append(closings[level] + token)
+                tail = token
+                tail_run = None
+                if level:
+                    level -= 1
+                    cache = runs[level]
+                    comma = separator + breaks[level]
             else:
-                if not opener_same_line and buffer and not buffer[-1].endswith(indent):
-                    buffer.append(newline(1))
-                indent_level += 1
-                buffer.append((char + newline()))
-            continue
-            
-        if char == ',':
-            buffer.append(char + newline())
-            continue
-        
-        if char in _CLOSERS:
-            buffer.append(newline())
-            if buffer and buffer[-1].endswith(indent):
-                buffer[-1] = buffer[-1][:-len(indent)]
-            indent_level = max(indent_level - 1, 0)
-            buffer.append(char)
-            continue
-        
-        if char == '=' and not compact_operators:
-            buffer.append(' = ')
-            continue
-        
-        if char == ':' and not compact_operators:
-            buffer.append(': ')
-            continue
-        
-        if char in _QUOTES:
-            string_opener = char
-            buffer.append(char)
-            continue
-
-        buffer.append(char)
-    
-    return ''.join(buffer)
+                # A string literal that continues in the next chunk.
+                append(token[:1])
+                self._string_opener = token[:1]
+                self._scan_string(token, 1, append)
+                tail = token[-width:]
+                tail_run = None
+
+        if tail_run is not None:
+            tail = self._run_tail(tail_run, level, tail)
+        self._indent_level = level
+        self._last = tail
+        self._pending_opener = pending
+        return empty.join(buffer)
+
+    def close(self) -> str:
+        """Finish formatting and return any remaining output.
+
+        Returns:
+            The output that was held back waiting for more input. May be empty.
+        """
+        if self._closed:
+            return self._syntax.empty
+        self._closed = True
+
+        output = self._limiter.close() if self._limiter is not None else self._syntax.empty
+        if not self._pending_opener:
+            return output
+        return output + self._write_pending()
+
+    # The `_write_*` methods below format text that is already known to be
+    # tokenized, as `feed()` would format it. They are used by
+    # `beautipy.walker` to write containers of atoms without scanning them,
+    # and by `beautipy.limits` to write elision markers.
+
+    def _write_pending(self):
+        """Write the pending opening character of a non-empty structure."""
+        opener = self._pending_opener
+        self._pending_opener = None
+        output = self._syntax.empty
+        tail = self._last
+        if not self._opener_same_line and tail is not None and not tail.endswith(self._indent):
+            output = self._lines[self._indent_level]
+        self._indent_level += 1
+        if self._indent_level == len(self._breaks):
+            self._grow_tables(self._indent_level)
+        self._last = opener + self._breaks[self._indent_level]
+        return output + self._last
+
+    def _write_marker(self, text):
+        """Write an elision marker as it is."""
+        if self._string_opener:
+            return self._format(text)
+        output = self._write_pending() + text if self._pending_opener else text
+        self._last = text[-1]
+        return output
+
+    def _write_items(self, keys, values=None):
+        """Write the items of a container whose contents are all atoms.
+
+        Same as feeding the representations in `keys` (each followed by
+        `': '` and its value) separated by `', '`. `keys` must not be empty.
+        """
+        if values is not None:
+            colon = ':' if self._compact_operators and not self._string_opener else ': '
+            keys = [key + colon + value for key, value in zip(keys, values)]
+        if self._string_opener:
+            return self._format(', '.join(keys))
+        output = self._write_pending() if self._pending_opener else ''
+        self._last = keys[-1][-1]
+        return output + (',' + self._breaks[self._indent_level]).join(keys)
+
+    def _open_empty(self, buffer, opener, tail, tail_run, level, closer):
+        """Write an opening character directly followed by `closer`.
+
+        Returns the new last output fragment.
+        """
+        if self._expand_empty:
+            if tail_run is not None:
+                tail = self._run_tail(tail_run, level, tail)
+            if not self._opener_same_line and tail is not None and not tail.endswith(self._indent):
+                buffer.append(self._lines[level])
+            tail = opener + self._breaks[level] + closer
+        else:
+            tail = opener + closer
+        buffer.append(tail)
+        return tail
+
+    def _grow_tables(self, level):
+        """Extend the per-depth tables to cover `level` and return them."""
+        tables = self._style._grow_tables(level)
+        self._lines, self._breaks, self._closings, self._runs = tables
+        return tables
+
+    def _run_tail(self, run, level, tail):
+        """Return the last output fragment of a formatted run of text.
+
+        `tail` is the fragment before the run. In bytes, the last character
+        of the run may start there, when it was split between chunks.
+        """
+        syntax = self._syntax
+        text = run.rstrip()
+        char = text[-1:]
+        if char == syntax.comma:
+            return syntax.comma + self._breaks[level]
+        if not self._compact_operators and char in syntax.spaced_operators:
+            return syntax.spaced_operators[char]
+        width = self._tail_width
+        if len(text) < width and tail is not None:
+            text = tail + text
+        return text[-width:]
+
+    def _scan_string(self, chunk, pos, append):
+        """Copy string literal content from `chunk[pos:]`.
+
+        Returns the position after the closing quote, or the end of `chunk`
+        if the literal continues in the next chunk.
+        """
+        quote = self._string_opener
+        match = self._syntax.string_bodies[quote, self._last_was_escape].match(chunk, pos)
+        if match is None:
+            # An escape is pending and `chunk[pos:]` is empty.
+            return pos
+        end = match.group(1)
+        self._last_was_escape = end is not None and end != quote
+        if end == quote:
+            self._string_opener = None
+        if match.end() > pos:
+            append(match.group())
+        return match.end()
@@ -0,0 +1,103 @@
+"""Format files without reading them into memory first."""
+
+import codecs
+import io
+import mmap
+import os
+from functools import partial
+from typing import Iterator, Optional, TextIO, Union
+
+from beautipy.parallel import iter_parallel
+
+# Number of bytes decoded at a time. A multiple of the page size, so that
+# the pages of a window can be released once it is decoded.
+_WINDOW_SIZE = 1 << 20
+
+
+def beautify_file(
+    path: Union[str, os.PathLike],
+    out: Union[str, os.PathLike, TextIO, None] = None,
+    *,
+    encoding: str = 'utf-8',
+    errors: str = 'strict',
+    workers: int = 1,
+    **options: object
+) -> Optional[str]:
+    """Format the contents of a file, reading it window by window.
+
+    The file is memory-mapped and decoded one window at a time, and the
+    output is written as it is produced, so memory use stays far below the
+    size of the file. Line endings are translated as by `open()` in text
+    mode.
+
+    Args:
+        path: The file to format.
+        out: Where to write the output: a path, which is created or
+            overwritten, or a text stream. Defaults to `None`, which returns
+            the output as a string instead.
+        encoding: Encoding of the file, also used to write `out` if it is a
+            path. Defaults to `'utf-8'`.
+        errors: How decoding and encoding errors are handled, as in
+            `open()`. Defaults to `'strict'`.
+        workers: Number of worker processes, as in `beautify_parallel()`.
+            Defaults to `1`, which formats in the calling thread.
+        **options: Options of `beautify()`.
+
+    Returns:
+        The formatted string if `out` is None, otherwise None.
+
+    Raises:
+        OSError: If the file cannot be read or `out` cannot be written.
+        UnicodeDecodeError: If the file is not valid in `encoding`.
+        ValueError: If an option is invalid, if `workers` is less than 1,
+            or if `out` is the file at `path`.
+        TypeError: If an option is unknown.
+    """
+    with open(path, 'rb') as fp:
+        chunks = iter_parallel(_decode(_windows(fp), encoding, errors), workers=workers, **options)
+        if out is None:
+            return ''.join(chunks)
+        if isinstance(out, (str, os.PathLike)):
+            # Opening `out` for writing would truncate the input before it
+            # is read.
+            if os.path.exists(out) and os.path.samestat(os.fstat(fp.fileno()), os.stat(out)):
+                raise ValueError('out must not be the file being formatted')
+            with open(out, 'w', encoding=encoding, errors=errors) as stream:
+                stream.writelines(chunks)
+        else:
+            out.writelines(chunks)
+    return None
+
+
+def _windows(fp: io.BufferedReader) -> Iterator[bytes]:
+    """Yield the contents of the open file `fp` one window at a time."""
+    try:
+        view = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Empty files, pipes and devices cannot be mapped.
+        yield from iter(partial(fp.read, _WINDOW_SIZE), b'')
+        return
+
+    with view:
+        release = hasattr(view, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+        if release:
+            view.madvise(mmap.MADV_SEQUENTIAL)
+        size = len(view)
+        for start in range(0, size, _WINDOW_SIZE):
+            yield view[start:start + _WINDOW_SIZE]
+            if release:
+                # The pages were copied, so they need not stay resident.
+                view.madvise(mmap.MADV_DONTNEED, start, min(_WINDOW_SIZE, size - start))
+
+
+def _decode(windows: Iterator[bytes], encoding: str, errors: str) -> Iterator[str]:
+    """Decode `windows` into text, translating line endings."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    for window in windows:
+        text = decoder.decode(window)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
@@ -0,0 +1,156 @@
+"""Format a file as it grows, like `tail -f`."""
+
+import codecs
+import io
+import os
+import time
+from typing import BinaryIO, Iterator, Tuple, Union
+
+from beautipy.core import Style
+
+# Size of the blocks read from the file.
+_READ_SIZE = 64 * 1024
+
+
+def follow_file(
+    path: Union[str, os.PathLike],
+    *,
+    lines: bool = False,
+    poll_interval: float = 0.25,
+    encoding: str = 'utf-8',
+    errors: str = 'strict',
+    **options: object
+) -> Iterator[str]:
+    """Format the file at `path` from its start, then follow what is appended.
+
+    The formatter state is kept across reads, so the output is the same as
+    formatting the whole file at once, and it is yielded as soon as it is
+    formatted. When no data is available, the file is checked again every
+    `poll_interval` seconds, which bounds the delay of new output and keeps
+    the process idle in between. If the file is truncated or replaced,
+    e.g. by log rotation, the current output is finished with a newline and
+    the new contents are formatted from the start with fresh state. The
+    iterator never ends on its own.
+
+    Args:
+        path: The file to follow.
+        lines: If True, format each line as a separate record, as
+            `beautify_lines()` does, and yield each record with a newline
+            once its line is complete. Defaults to `False`.
+        poll_interval: Seconds to wait between checks of the file when no
+            data is available. Must be `> 0`. Defaults to `0.25`.
+        encoding: Encoding of the file. Defaults to `'utf-8'`.
+        errors: How decoding errors are handled, as in `open()`. Defaults
+            to `'strict'`.
+        **options: Options of `beautify()`.
+
+    Returns:
+        An iterator over consecutive pieces of output.
+
+    Raises:
+        OSError: If the file cannot be opened. Raised immediately, not on
+            the first iteration.
+        UnicodeDecodeError: If the file is not valid in `encoding`.
+        ValueError: If an option is invalid or `poll_interval` is not
+            positive.
+        TypeError: If an option is unknown.
+
+    Notes:
+        An opening bracket is held back until the next non-space character
+        shows whether its structure is empty. A truncation is only noticed
+        if the file is shorter than what was read when it is next checked.
+    """
+    if poll_interval <= 0:
+        raise ValueError('poll_interval must be greater than 0')
+    style = Style(**options)
+    codecs.lookup(encoding)
+    fp = open(path, 'rb')
+    return _follow(path, fp, style, lines, poll_interval, encoding, errors)
+
+
+def _follow(path, fp, style, lines, poll_interval, encoding, errors):
+    """Yield the output of `fp` and of the files that replace it at `path`."""
+    while True:
+        with fp:
+            yield from _follow_one(path, fp, style, lines, poll_interval, encoding, errors)
+        fp = _wait_for(path, poll_interval)
+
+
+def _follow_one(path, fp, style, lines, poll_interval, encoding, errors):
+    """Yield the output of `fp` until it is truncated or replaced at `path`."""
+    identity = _identity(os.fstat(fp.fileno()))
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    formatter = style.formatter()
+    # Pieces of a line that is not complete yet, in `lines` mode. They are
+    # only joined once the line ends, so a long line costs linear time.
+    partial = []
+    written = False
+
+    def format_text(text):
+        if not lines:
+            return formatter.feed(text)
+        if '\n' not in text:
+            if text:
+                partial.append(text)
+            return ''
+        records = text.split('\n')
+        partial.append(records[0])
+        records[0] = ''.join(partial)
+        partial.clear()
+        if records[-1]:
+            partial.append(records[-1])
+        del records[-1]
+        return ''.join(style.format(record) + '\n' for record in records)
+
+    while True:
+        data = fp.read(_READ_SIZE)
+        if data:
+            output = format_text(decoder.decode(data))
+            if output:
+                written = True
+                yield output
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and _identity(stat) == identity and stat.st_size >= fp.tell():
+            time.sleep(poll_interval)
+            continue
+        if stat is not None and _identity(stat) == identity:
+            # Truncated: nothing more of the old contents is coming.
+            break
+        # Replaced or removed: read what was written before that.
+        data = fp.read()
+        if data:
+            output = format_text(decoder.decode(data))
+            if output:
+                written = True
+                yield output
+        break
+
+    output = format_text(decoder.decode(b'', final=True))
+    if lines:
+        if partial:
+            output += style.format(''.join(partial)) + '\n'
+    else:
+        output += formatter.close()
+        if written or output:
+            output += '\n'
+    if output:
+        yield output
+
+
+def _wait_for(path, poll_interval: float) -> BinaryIO:
+    """Open the file at `path` once it exists."""
+    while True:
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            time.sleep(poll_interval)
+
+
+def _identity(stat: os.stat_result) -> Tuple[int, int]:
+    """Return what tells a file apart from one that replaced it."""
+    return stat.st_dev, stat.st_ino
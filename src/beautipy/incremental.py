@@ -0,0 +1,266 @@
+"""Keep the output up to date as a document is edited or appended to."""
+
+from typing import List, NamedTuple, Optional
+
+from beautipy.core import Style
+
+
+class OutputChange(NamedTuple):
+    """A change to the output of a `Document`.
+
+    `output[start:end]` before the change was replaced by `text`.
+    """
+
+    start: int
+    end: int
+    text: str
+
+
+class Document:
+    """A text and its formatted output, updated incrementally.
+
+    The input is kept in segments of about `checkpoint_interval`
+    characters, each with its output and the formatter state at its end.
+    An edit is formatted from the start of the segment it begins in, and
+    formatting stops at the first later segment boundary where the state
+    matches the one of the previous run again: from there on, the old
+    output is still valid and is kept. An edit inside a string literal or
+    a bracket pair typically re-formats one or two segments, whatever the
+    size of the document, and appending formats only the appended text.
+    `output` is always equal to `beautify(text, ...)`.
+
+    Args:
+        text: The initial input text. Defaults to `''`.
+        checkpoint_interval: Number of input characters between checkpoints.
+            Smaller intervals make edits cheaper and use more memory for the
+            saved states. Must be `>= 1`. Defaults to 16 KiB.
+        blank_line_depth: See `beautify()`.
+        opener_same_line: See `beautify()`.
+        compact_operators: See `beautify()`.
+        expand_empty: See `beautify()`.
+        indent: See `beautify()`.
+        max_indent_width: See `beautify()`.
+
+    Raises:
+        ValueError: If `blank_line_depth` or `max_indent_width` is negative,
+            or `checkpoint_interval` is less than 1.
+
+    Notes:
+        The `max_depth`, `max_items_per_container` and `max_string_length`
+        limits are not supported, as what they elide depends on everything
+        before it rather than on a small state.
+
+    Examples:
+        >>> doc = Document('[1, 2', compact_operators=True)
+        >>> doc.append(', {"a": 3}]')
+        OutputChange(start=14, end=14, text=',\\n    {\\n        "a":3\\n    }\\n]')
+        >>> doc.edit(1, 2, '"x"')
+        OutputChange(start=6, end=7, text='"x"')
+        >>> print(doc.output)
+        [
+            "x",
+            2,
+            {
+                "a":3
+            }
+        ]
+    """
+
+    def __init__(
+        self,
+        text: str = '',
+        *,
+        checkpoint_interval: int = 16 * 1024,
+        blank_line_depth: int = 0,
+        opener_same_line: bool = False,
+        compact_operators: bool = False,
+        expand_empty: bool = False,
+        indent: str = '    ',
+        max_indent_width: Optional[int] = None
+    ) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError('checkpoint_interval must be greater than or equal to 1')
+        self._formatter = Style(
+            blank_line_depth=blank_line_depth,
+            opener_same_line=opener_same_line,
+            compact_operators=compact_operators,
+            expand_empty=expand_empty,
+            indent=indent,
+            max_indent_width=max_indent_width,
+        ).formatter()
+        self._interval = checkpoint_interval
+        self._initial = self._formatter._checkpoint()
+        # Consecutive segments of the input, each as [text, output, state at
+        # its end]. The formatter is always in the state of the last one.
+        self._segments = [['', '', self._initial]]
+        self._length = 0
+        self._output_length = 0
+        # The output of `close()` in the current state.
+        self._closing = ''
+        if text:
+            self.append(text)
+
+    @property
+    def text(self) -> str:
+        """The current input text."""
+        return ''.join(segment[0] for segment in self._segments)
+
+    @property
+    def output(self) -> str:
+        """The formatted output of the current input."""
+        return ''.join(segment[1] for segment in self._segments) + self._closing
+
+    def append(self, text: str) -> OutputChange:
+        """Add `text` to the end of the input.
+
+        Only `text` is formatted, continuing from the state at the end of
+        the input.
+
+        Args:
+            text: The text to append.
+
+        Returns:
+            The change to `output`.
+        """
+        formatter = self._formatter
+        interval = self._interval
+        last = self._segments[-1]
+        outputs = []
+        pos = 0
+        while pos < len(text):
+            room = interval - len(last[0])
+            if room <= 0:
+                last = ['', '', None]
+                self._segments.append(last)
+                room = interval
+            piece = text[pos:pos + room]
+            output = formatter.feed(piece)
+            last[0] += piece
+            last[1] += output
+            last[2] = formatter._checkpoint()
+            outputs.append(output)
+            pos += len(piece)
+        output = ''.join(outputs)
+        start = self._output_length
+        end = start + len(self._closing)
+        self._length += len(text)
+        self._output_length += len(output)
+        self._closing = self._close()
+        return OutputChange(start, end, output + self._closing)
+
+    def edit(self, start: int, end: int, text: str) -> OutputChange:
+        """Replace `self.text[start:end]` with `text`.
+
+        Args:
+            start: Start of the replaced range of the input.
+            end: End of the replaced range of the input.
+            text: The replacement. May be empty, to delete the range.
+
+        Returns:
+            The change to `output`, trimmed to the part that differs.
+
+        Raises:
+            ValueError: Unless `0 <= start <= end <= len(self.text)`.
+        """
+        if not 0 <= start <= end <= self._length:
+            raise ValueError('edit range must satisfy 0 <= start <= end <= len(text)')
+        if start == self._length:
+            return self.append(text)
+        segments = self._segments
+        formatter = self._formatter
+
+        # The segment to resume at: the one `start` is in.
+        first = 0
+        in_pos = out_pos = 0
+        while in_pos + len(segments[first][0]) <= start:
+            in_pos += len(segments[first][0])
+            out_pos += len(segments[first][1])
+            first += 1
+        # The segment `end` is in, at whose end the states are first compared.
+        last = first
+        last_end = in_pos + len(segments[first][0])
+        while last_end < end:
+            last += 1
+            last_end += len(segments[last][0])
+
+        old_text = ''.join(segment[0] for segment in segments[first:last + 1])
+        head = old_text[:start - in_pos] + text + old_text[end - in_pos:]
+        formatter._restore(segments[first - 1][2] if first else self._initial)
+        replaced = [
+            self._feed(formatter, piece) for piece in _pieces(head, self._interval)
+        ]
+        # Formatting the following segments as they are, until the state
+        # at a segment end is the one the previous run had there.
+        while last + 1 < len(segments) and formatter._checkpoint() != segments[last][2]:
+            last += 1
+            replaced.append(self._feed(formatter, segments[last][0]))
+
+        old_output = ''.join(segment[1] for segment in segments[first:last + 1])
+        new_output = ''.join(segment[1] for segment in replaced)
+        if last + 1 == len(segments):
+            # The end of the input was reached, so the closing may change too.
+            old_output += self._closing
+            self._closing = self._close()
+            new_output += self._closing
+        segments[first:last + 1] = replaced
+        if not segments:
+            segments.append(['', '', self._initial])
+        formatter._restore(segments[-1][2])
+        self._length += len(text) - (end - start)
+        self._output_length = sum(len(segment[1]) for segment in segments)
+
+        prefix = _common_prefix(old_output, new_output)
+        suffix = _common_suffix(old_output[prefix:], new_output[prefix:])
+        return OutputChange(
+            out_pos + prefix,
+            out_pos + len(old_output) - suffix,
+            new_output[prefix:len(new_output) - suffix],
+        )
+
+    def _feed(self, formatter, text):
+        """Format one segment and return it."""
+        output = formatter.feed(text)
+        return [text, output, formatter._checkpoint()]
+
+    def _close(self):
+        """Return the output of `close()` in the current state, keeping the state."""
+        formatter = self._formatter
+        if not formatter._pending_opener:
+            return ''
+        state = formatter._checkpoint()
+        output = formatter._write_pending()
+        formatter._restore(state)
+        return output
+
+
+def _pieces(text: str, size: int) -> List[str]:
+    """Cut `text` into pieces of `size`, merging a short last one into the one before."""
+    pieces = [text[start:start + size] for start in range(0, len(text), size)]
+    if len(pieces) > 1 and len(pieces[-1]) < size // 2:
+        pieces[-2:] = [pieces[-2] + pieces[-1]]
+    return pieces
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Return the length of the common prefix of `a` and `b`."""
+    low, high = 0, min(len(a), len(b))
+    # Comparing slices is done in C, so halving beats a loop over characters.
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _common_suffix(a: str, b: str) -> int:
+    """Return the length of the common suffix of `a` and `b`."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a) - mid:len(a) - low] == b[len(b) - mid:len(b) - low]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
@@ -0,0 +1,306 @@
+"""Elide the deep, long and wide parts of the input before it is formatted."""
+
+import re
+
+_OPENERS = {'{', '[', '('}
+
+# Marker for the contents of a structure nested deeper than `max_depth`.
+DEPTH_MARKER = '...'
+
+# Runs of characters inside a string literal that neither end it nor start
+# an escape sequence.
+_STRING_RUNS = {
+    "'": re.compile(r"[^'\\]*"),
+    '"': re.compile(r'[^"\\]*'),
+}
+# Compiled segment patterns by `max_string_length`.
+_SEGMENTS = {}
+
+
+def _segment_pattern(max_string):
+    """Return the pattern for one step of the scanner.
+
+    Like the scanner of `beautipy.Formatter`, a step is a run of text and
+    whitespace followed by a string literal, a bracket, an unterminated
+    string literal or the end. String literals that are short enough and
+    hold no escapes or commas do not need to be looked at and stay in the
+    run.
+    """
+    pattern = _SEGMENTS.get(max_string)
+    if pattern is None:
+        length = '*' if max_string is None else '{0,%d}' % max_string
+        simple = r"""(?:'[^'\\,]%s'|"[^"\\,]%s")""" % (length, length)
+        pattern = _SEGMENTS[max_string] = re.compile(r"""
+            ([^'"{}\[\]()]*(?:%s[^'"{}\[\]()]*)*)
+            (?:('[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")
+            |([{}\[\]()]|['"].*|\Z))
+        """ % simple, re.VERBOSE | re.DOTALL)
+    return pattern
+
+
+def _marker(count, noun):
+    """Return the marker for `count` elided items or characters."""
+    return f'<+{count} {noun}{"" if count == 1 else "s"}>'
+
+
+class Limiter:
+    """Apply `max_depth`, `max_items_per_container` and `max_string_length`.
+
+    Sits in front of a `beautipy.Formatter`: text fed to the limiter is
+    passed on to the formatter with elided regions left out and replaced by
+    a marker. Elided regions are only scanned for the characters that end
+    them and are never formatted.
+
+    - A structure nested more than `max_depth` levels deep keeps its opening
+      and closing characters, and its contents become `...`.
+    - After `max_items_per_container` items of a structure, the remaining
+      items are replaced by `<+N items>`.
+    - A string literal is cut after `max_string_length` characters, and
+      `<+N chars>` is written after its closing quote.
+
+    Items are counted by their separating commas, and characters by the
+    text of the literal, so escape sequences count as written.
+
+    Args:
+        formatter: The formatter that receives the remaining text.
+        max_depth: See `beautify()`.
+        max_items: See `max_items_per_container` in `beautify()`.
+        max_string: See `max_string_length` in `beautify()`.
+    """
+
+    def __init__(self, formatter, max_depth=None, max_items=None, max_string=None):
+        self._formatter = formatter
+        self._max_depth = max_depth
+        self._max_items = max_items
+        self._max_string = max_string
+        self._segment = _segment_pattern(max_string)
+
+        self._depth = 0
+        # Number of commas seen in each open structure, when counting items.
+        self._commas = []
+        # The opening quote of a string literal that continues in the next
+        # chunk, and whether its last character started an escape sequence.
+        self._quote = None
+        self._escape = False
+        # Characters in that string literal, and how many of them were kept
+        # if it was cut.
+        self._length = 0
+        self._kept = None
+
+        # The depth of the structure whose contents are being elided, or
+        # None. Elision ends with the closing character of that structure.
+        self._skip = None
+        # True if elision is due to `max_depth` rather than to the items.
+        self._skip_depth = False
+        # Number of commas between the elided items, and whether any text
+        # follows the last of them.
+        self._skipped = 0
+        self._content = False
+
+    @property
+    def depth(self):
+        """The nesting depth of the input read so far."""
+        return self._depth
+
+    def feed(self, chunk):
+        """Pass on the next piece of input and return the formatted output."""
+        formatter = self._formatter
+        output = []
+        # Start of the text in `chunk` that is passed on, or None while it is
+        # elided.
+        start = None if self._skip is not None or self._kept is not None else 0
+        pos = 0
+        if self._quote:
+            pos, start = self._scan_string(chunk, 0, start, output)
+
+        for run, string, token in self._segment.findall(chunk, pos):
+            if run:
+                if self._skip is not None:
+                    self._skip_run(run)
+                elif self._commas:
+                    count = run.count(',')
+                    if count:
+                        seen = self._commas[-1]
+                        if seen + count < self._max_items:
+                            self._commas[-1] = seen + count
+                        else:
+                            cut = pos
+                            for _ in range(self._max_items - seen):
+                                cut = chunk.index(',', cut) + 1
+                            output.append(formatter._format(chunk[start:cut]))
+                            start = None
+                            self._commas[-1] = self._max_items
+                            self._start_skip(depth=False)
+                            if cut < pos + len(run):
+                                self._skip_run(chunk[cut:pos + len(run)])
+                pos += len(run)
+
+            if string:
+                if self._skip is not None:
+                    self._content = True
+                elif self._max_string is not None and len(string) - 2 > self._max_string:
+                    kept = self._kept_length(string)
+                    output.append(formatter._format(chunk[start:pos + 1 + kept] + string[0]))
+                    output.append(formatter._write_marker(_marker(len(string) - 2 - kept, 'char')))
+                    start = pos + len(string)
+                pos += len(string)
+            elif not token:
+                continue
+            elif token in _OPENERS:
+                self._depth += 1
+                pos += 1
+                if self._skip is not None:
+                    self._content = True
+                elif self._max_depth is not None and self._depth > self._max_depth:
+                    output.append(formatter._format(chunk[start:pos]))
+                    start = None
+                    self._start_skip(depth=True)
+                elif self._max_items is not None:
+                    self._commas.append(0)
+                    if not self._max_items:
+                        output.append(formatter._format(chunk[start:pos]))
+                        start = None
+                        self._start_skip(depth=False)
+            elif token[0] not in '\'"':
+                if self._skip == self._depth:
+                    output.append(self._end_skip())
+                    # The closing character is passed on with the text after it.
+                    start = pos
+                    self._depth -= 1
+                    if self._commas and not self._skip_depth:
+                        self._commas.pop()
+                elif self._depth:
+                    self._depth -= 1
+                    if self._commas and self._skip is None:
+                        self._commas.pop()
+                pos += 1
+            else:
+                # A string literal that continues in the next chunk.
+                self._quote = token[0]
+                self._length = 0
+                if self._skip is not None:
+                    self._content = True
+                pos, start = self._scan_string(chunk, pos + 1, start, output)
+
+        if start is not None and start < len(chunk):
+            output.append(formatter._format(chunk[start:]))
+        return ''.join(output)
+
+    def skip_items(self, count):
+        """Elide `count` more items of the innermost structure without text."""
+        if self._skip is None:
+            self._start_skip(depth=False)
+        if self._skip_depth:
+            self._content = True
+        elif count:
+            self._skipped += count - 1 + self._content
+            self._content = True
+
+    def close(self):
+        """Write the markers for an elided region that was not closed."""
+        output = ''
+        if self._kept is not None:
+            if self._length <= self._max_string:
+                # Only the backslash that ends the input was held back.
+                output = self._formatter._format('\\')
+            else:
+                output = self._formatter._write_marker(_marker(self._length - self._kept, 'char'))
+            self._kept = None
+        if self._skip is not None:
+            output += self._end_skip()
+        return output
+
+    def _start_skip(self, depth):
+        """Start eliding the contents of the innermost structure."""
+        self._skip = self._depth
+        self._skip_depth = depth
+        self._skipped = 0
+        self._content = False
+
+    def _end_skip(self):
+        """Stop eliding and return the marker for the elided contents."""
+        self._skip = None
+        if self._skip_depth:
+            return self._formatter._format(DEPTH_MARKER) if self._content else ''
+        count = self._skipped + self._content
+        return self._formatter._write_marker(_marker(count, 'item')) if count else ''
+
+    def _skip_run(self, run):
+        """Count the items in an elided run of text."""
+        if self._skip_depth or self._depth != self._skip:
+            if not self._content and not run.isspace():
+                self._content = True
+            return
+        count = run.count(',')
+        if count:
+            self._skipped += count
+            rest = run[run.rindex(',') + 1:]
+            self._content = bool(rest) and not rest.isspace()
+        elif not self._content and not run.isspace():
+            self._content = True
+
+    def _kept_length(self, string):
+        """Return how many characters of a too long string literal are kept."""
+        kept = self._max_string
+        body = string[1:kept + 1]
+        # Keep an escape sequence whole or not at all.
+        if (len(body) - len(body.rstrip('\\'))) % 2:
+            kept -= 1
+        return kept
+
+    def _scan_string(self, chunk, pos, start, output):
+        """Step over string literal text starting at `pos`.
+
+        Used for literals split between chunks. Returns the next position
+        and the new start of the text to pass on.
+        """
+        quote = self._quote
+        runs = _STRING_RUNS[quote]
+        limit = self._max_string if self._skip is None else None
+        end = len(chunk)
+        while pos < end:
+            if self._escape:
+                self._escape = False
+                self._length += 1
+                pos += 1
+                continue
+            run_end = runs.match(chunk, pos).end()
+            count = run_end - pos
+            if count:
+                if limit is not None and self._kept is None and self._length + count > limit:
+                    self._cut(chunk, pos + limit - self._length, limit, start, output)
+                    start = None
+                self._length += count
+                pos = run_end
+                if pos == end:
+                    break
+            if chunk[pos] == '\\':
+                if limit is not None and self._kept is None and self._length + 2 > limit:
+                    # Keep an escape sequence whole or not at all.
+                    self._cut(chunk, pos, self._length, start, output)
+                    start = None
+                self._escape = True
+                self._length += 1
+                pos += 1
+                continue
+
+            # The closing quote.
+            pos += 1
+            self._quote = None
+            if self._kept is not None:
+                # Pass on the closing quote, then the marker.
+                output.append(self._formatter._format(quote))
+                output.append(self._formatter._write_marker(_marker(self._length - self._kept, 'char')))
+                self._kept = None
+                return pos, pos
+            return pos, start
+        return pos, start
+
+    def _cut(self, chunk, pos, kept, start, output):
+        """Stop passing on the current string literal at `pos`.
+
+        `kept` is the number of characters of the literal passed on.
+        """
+        self._kept = kept
+        if start is not None and pos > start:
+            output.append(self._formatter._format(chunk[start:pos]))
@@ -0,0 +1,85 @@
+"""Format line-delimited input, one record per line."""
+
+from typing import Iterable, Iterator, Optional, Union
+
+from beautipy.core import Style
+from beautipy.parallel import beautify_many
+
+
+def beautify_lines(
+    source: Union[str, Iterable[str]],
+    *,
+    workers: Optional[int] = 1,
+    chunksize: int = 64,
+    **options: object
+) -> Iterator[str]:
+    """Format each line of the input as a document of its own.
+
+    Meant for input with one record per line, such as NDJSON or log files.
+    Every line is formatted with fresh state, so an unbalanced bracket in
+    one record does not affect the next. The records are formatted in
+    order and yielded one by one; with more than one worker, they are sent
+    to worker processes in batches as by `beautify_many()`.
+
+    Args:
+        source: The input text, or an iterable of consecutive pieces of it,
+            such as an open file or blocks read from a pipe. The pieces are
+            joined and split on `'\\n'`, and read lazily. A newline at the
+            very end does not start another record.
+        workers: Number of worker processes, as in `beautify_many()`.
+            Defaults to `1`, which formats each record in the calling
+            thread as soon as its line is complete.
+        chunksize: Number of records sent to a worker at a time. Must be
+            `>= 1`. Defaults to `64`.
+        **options: Options of `beautify()`.
+
+    Returns:
+        An iterator over the formatted records, one per line, in order.
+        Empty lines give empty strings.
+
+    Raises:
+        ValueError: If an option is invalid, or `workers` or `chunksize`
+            is less than 1. Raised immediately, not on the first iteration.
+        TypeError: If an option is unknown.
+
+    Examples:
+        >>> for record in beautify_lines('{a:1}\\n[2, 3\\n{b:[]}\\n', compact_operators=True):
+        ...     print(record)
+        {
+            a:1
+        }
+        [
+            2,
+            3
+        {
+            b:[]
+        }
+    """
+    pieces = [source] if isinstance(source, str) else source
+    if workers == 1:
+        if chunksize < 1:
+            raise ValueError('chunksize must be greater than or equal to 1')
+        return map(Style(**options).format, _split_lines(pieces))
+    return beautify_many(_split_lines(pieces), workers=workers, chunksize=chunksize, **options)
+
+
+def _split_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """Yield the lines of the text made of `pieces`, without their newlines."""
+    # The start of a line that continues in the next piece.
+    parts = []
+    for piece in pieces:
+        lines = piece.split('\n')
+        if len(lines) == 1:
+            if piece:
+                parts.append(piece)
+            continue
+        if parts:
+            parts.append(lines[0])
+            lines[0] = ''.join(parts)
+            parts.clear()
+        rest = lines.pop()
+        if rest:
+            parts.append(rest)
+        yield from lines
+    if parts:
+        yield ''.join(parts)
@@ -0,0 +1,423 @@
+"""Format many inputs, or one large input, on several processes."""
+
+import os
+import re
+import sys
+from collections import deque
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+from beautipy.core import _TEXT, Formatter, Style
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Batches submitted per worker before their results are consumed.
+_PREFETCH = 2
+# Number of input characters in a segment formatted by one worker.
+_SEGMENT_SIZE = 1 << 20
+
+# The brackets in a run of text, skipping complete string literals. A string
+# literal that does not end within the text is matched with the rest of it.
+_BRACKETS = re.compile(r"""
+    [^'"{}\[\]()]*(?:(?:'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")[^'"{}\[\]()]*)*
+    ([{}\[\]()]|['"].*|\Z)
+""", re.VERBOSE | re.DOTALL)
+# One step of the search for the end of a segment: a run of text and complete
+# string literals, followed by a bracket, a comma, the start of a string
+# literal that does not end within the text, or the end.
+_SPLIT_SCAN = re.compile(r"""
+    ([^'"{}\[\](),]*(?:(?:'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")[^'"{}\[\](),]*)*)
+    ([{}\[\](),]|['"]|\Z)
+""", re.VERBOSE | re.DOTALL)
+
+
+def beautify_many(
+    iterable: Iterable[object],
+    *,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    **options: object
+) -> Iterator[str]:
+    """Format many independent objects, spreading the work over workers.
+
+    Each object is formatted as by `beautify()` with the given options.
+    Objects are sent to the workers in batches of `chunksize`, which makes
+    the cost of sending them small next to the formatting, and at most a
+    few batches per worker are read ahead of the results consumed, so
+    memory use stays flat however long `iterable` is.
+
+    Args:
+        iterable: The objects to format. Read lazily.
+        workers: Number of worker processes. Defaults to `None`, the number
+            of CPUs. With `1`, or when the input fits in one batch, the
+            objects are formatted in the calling thread.
+        chunksize: Number of objects sent to a worker at a time.
+            Defaults to `64`.
+        ordered: If True, results are yielded in input order. Otherwise
+            each batch is yielded as soon as it is done. Defaults to `True`.
+        **options: Options of `beautify()`. Checked once, before any
+            object is read.
+
+    Returns:
+        An iterator over the formatted strings.
+
+    Raises:
+        ValueError: If an option is invalid, or `workers` or `chunksize`
+            is less than 1. Raised immediately, not on the first iteration.
+        TypeError: If an option is unknown.
+
+    Examples:
+        >>> for text in beautify_many([[1], {'a': 2}], indent='  '):
+        ...     print(text)
+        [
+          1
+        ]
+        {
+          'a': 2
+        }
+
+    Notes:
+        Objects are sent to worker processes with `pickle`, so they must
+        be picklable. On Python builds without the global interpreter lock,
+        threads are used instead, and nothing is copied.
+    """
+    Style(**options)
+    if workers is None:
+        workers = _cpu_count()
+    elif workers < 1:
+        raise ValueError('workers must be greater than or equal to 1')
+    if chunksize < 1:
+        raise ValueError('chunksize must be greater than or equal to 1')
+    return _iter_many(iter(iterable), workers, chunksize, ordered, options)
+
+
+def _iter_many(
+    items: Iterator[object], workers: int, chunksize: int, ordered: bool, options: dict
+) -> Iterator[str]:
+    """Format `items` in batches, on worker processes if it pays off."""
+    first = list(islice(items, chunksize))
+    if workers == 1 or len(first) < chunksize:
+        style = Style(**options)
+        for obj in chain(first, items):
+            yield style.format(obj)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    batches = chain([first], iter(lambda: list(islice(items, chunksize)), []))
+    executor = _executor(workers)
+    pending = deque()
+    try:
+        for batch in islice(batches, workers * _PREFETCH):
+            pending.append(executor.submit(_format_batch, batch, options))
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                pending.remove(future)
+            results = future.result()
+            # Keep the workers busy while the results are consumed.
+            for batch in islice(batches, 1):
+                pending.append(executor.submit(_format_batch, batch, options))
+            yield from results
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def _cpu_count() -> int:
+    """Return the number of CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _executor(workers: int) -> 'Executor':
+    """Return a pool of `workers` processes, or threads without a GIL."""
+    # Imported here, as it takes longer than the rest of the package.
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if not getattr(sys, '_is_gil_enabled', lambda: True)():
+        return ThreadPoolExecutor(workers)
+    return ProcessPoolExecutor(workers)
+
+
+def _format_batch(batch: List[object], options: dict) -> List[str]:
+    """Format each object in `batch`. Runs in a worker."""
+    style = Style(**options)
+    return [style.format(obj) for obj in batch]
+
+
+def beautify_parallel(
+    obj: object,
+    *,
+    workers: Optional[int] = None,
+    segment_size: int = _SEGMENT_SIZE,
+    **options: object
+) -> Iterator[str]:
+    """Format one large input on several processes, yielding the output in chunks.
+
+    A fast pre-scan splits the text into segments of about `segment_size`
+    characters, each ending after a comma or a closing bracket outside
+    string literals, and tracks the nesting depth at each split point.
+    The segments are formatted by worker processes, each starting at the
+    right indentation level, and the results are yielded in order. Joining
+    them gives exactly the result of `beautify()`.
+
+    Args:
+        obj: The object to format. If not a string, `str(obj)` is used.
+        workers: Number of worker processes. Defaults to `None`, the number
+            of CPUs. With `1`, or when the text fits in one segment, it is
+            formatted in the calling thread.
+        segment_size: Approximate number of input characters per segment.
+            Defaults to 1 MiB.
+        **options: Options of `beautify()`.
+
+    Returns:
+        An iterator over consecutive chunks of the formatted string.
+
+    Raises:
+        ValueError: If an option is invalid, or `workers` or `segment_size`
+            is less than 1. Raised immediately, not on the first iteration.
+        TypeError: If an option is unknown.
+
+    Notes:
+        With any of the `max_*` limits set, the input is formatted in the
+        calling thread, as the limits depend on all of the text before.
+    """
+    text = obj if isinstance(obj, str) else str(obj)
+    return iter_parallel([text], workers=workers, segment_size=segment_size, **options)
+
+
+def iter_parallel(
+    pieces: Iterable[str],
+    *,
+    workers: Optional[int] = None,
+    segment_size: int = _SEGMENT_SIZE,
+    **options: object
+) -> Iterator[str]:
+    """Format text that arrives in pieces on several processes.
+
+    Same as `beautify_parallel()`, for the text made of `pieces`, which are
+    read lazily. A few segments per worker are read ahead of the output
+    consumed, so memory use stays flat however long the input is.
+    """
+    Style(**options)
+    if workers is None:
+        workers = _cpu_count()
+    elif workers < 1:
+        raise ValueError('workers must be greater than or equal to 1')
+    if segment_size < 1:
+        raise ValueError('segment_size must be greater than or equal to 1')
+    if workers == 1 or any(options.get(name) is not None for name in _LIMITS):
+        return _iter_sequential(pieces, options)
+    return _iter_segments(pieces, workers, segment_size, options)
+
+
+# Options that make the output of a segment depend on the text before it.
+_LIMITS = ('max_depth', 'max_items_per_container', 'max_string_length')
+
+
+def _iter_sequential(pieces: Iterable[str], options: dict) -> Iterator[str]:
+    """Format `pieces` with one formatter in the calling thread."""
+    formatter = Formatter(**options)
+    for piece in pieces:
+        output = formatter.feed(piece)
+        if output:
+            yield output
+    output = formatter.close()
+    if output:
+        yield output
+
+
+def _iter_segments(
+    pieces: Iterable[str], workers: int, segment_size: int, options: dict
+) -> Iterator[str]:
+    """Split `pieces` into segments and format them on worker processes."""
+    splitter = _Splitter(segment_size)
+    segments = chain.from_iterable(map(splitter.feed, pieces))
+    first = next(segments, None)
+    if first is None:
+        # The text fits in one segment.
+        output = _format_segment(*splitter.close(), True, options)
+        if output:
+            yield output
+        return
+
+    executor = _executor(workers)
+    pending = deque()
+    try:
+        pending.append(executor.submit(_format_segment, *first, False, options))
+        for segment in segments:
+            pending.append(executor.submit(_format_segment, *segment, False, options))
+            if len(pending) >= workers * _PREFETCH:
+                output = pending.popleft().result()
+                if output:
+                    yield output
+        pending.append(executor.submit(_format_segment, *splitter.close(), True, options))
+        while pending:
+            output = pending.popleft().result()
+            if output:
+                yield output
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def _format_segment(text: str, level: int, tail: Optional[str], last: bool, options: dict) -> str:
+    """Format one segment of the input. Runs in a worker."""
+    formatter = Formatter(**options)
+    if tail is not None:
+        formatter._resume(level, tail)
+    output = formatter.feed(text)
+    if last:
+        output += formatter.close()
+    return output
+
+
+class _Splitter:
+    """Split input text at points where formatting can start afresh.
+
+    A segment ends after a comma or after the closing character of a
+    non-empty structure, outside string literals. The formatter state there
+    is only the indentation level and that character. The level equals the
+    nesting depth. Up to the length of a segment, the pre-scan only collects
+    the brackets outside string literals and counts them; after that, it
+    steps on to the next comma or closing character.
+    """
+
+    def __init__(self, segment_size: int) -> None:
+        self._size = segment_size
+        self._text = ''
+        # Start of the current segment in `_text`, and how far it was scanned.
+        self._start = 0
+        self._pos = 0
+        # The state at the start of the current segment.
+        self._level = 0
+        self._tail = None
+        # Nesting depth at `_pos`.
+        self._depth = 0
+        # The string literal `_pos` is in, and whether an escape is pending.
+        self._quote = None
+        self._escape = False
+        # True if nothing but whitespace follows the last opening character.
+        self._opened = False
+
+    def feed(self, piece: str) -> Iterator[tuple]:
+        """Add text and yield the segments that became complete.
+
+        Each segment is a tuple of its text, and the level and the last
+        character before it, or None for the first segment.
+        """
+        if self._start:
+            self._text = self._text[self._start:]
+            self._pos -= self._start
+            self._start = 0
+        self._text += piece
+        while True:
+            end = self._advance()
+            if end is None:
+                return
+            yield self._text[self._start:end], self._level, self._tail
+            self._start = end
+            self._level = self._depth
+            self._tail = self._text[end - 1]
+
+    def close(self) -> tuple:
+        """Return the last segment, which may be empty."""
+        return self._text[self._start:], self._level, self._tail
+
+    def _advance(self) -> Optional[int]:
+        """Scan on and return the end of the next segment, or None."""
+        text = self._text
+        end = len(text)
+        target = self._start + self._size
+        pos = self._pos
+        while pos < end:
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _TEXT.string_bodies[self._quote, False].match(text, pos)
+                pos = match.end()
+                if match.group(1) == '\\':
+                    # A backslash at the end of the text.
+                    self._escape = True
+                elif match.group(1):
+                    self._quote = None
+                continue
+
+            if pos < target:
+                pos = self._skip_to(pos, target)
+                continue
+            match = _SPLIT_SCAN.match(text, pos)
+            run, token = match.groups()
+            pos = match.end()
+            if self._opened and run and not run.isspace():
+                self._opened = False
+            if not token:
+                continue
+            if token in '{[(':
+                self._depth += 1
+                self._opened = True
+            elif token in '}])':
+                if self._depth:
+                    self._depth -= 1
+                if self._opened:
+                    self._opened = False
+                elif pos >= target:
+                    self._pos = pos
+                    return pos
+            elif token == ',':
+                self._opened = False
+                self._pos = pos
+                return pos
+            else:
+                self._quote = token
+                self._opened = False
+        self._pos = pos
+        return None
+
+    def _skip_to(self, pos: int, target: int) -> int:
+        """Scan from `pos` up to `target` and return the next position.
+
+        Only collects the brackets, so the depth is found by counting them.
+        """
+        brackets = _BRACKETS.findall(self._text, pos, target)
+        # The empty matches at the end.
+        while brackets and not brackets[-1]:
+            brackets.pop()
+        last = brackets.pop() if brackets and brackets[-1][0] in '\'"' else ''
+        if last:
+            # A string literal that goes on past `target`.
+            pos = min(target, len(self._text)) - len(last) + 1
+            self._quote = last[0]
+        else:
+            pos = min(target, len(self._text))
+        brackets = ''.join(brackets)
+
+        closers = brackets.count('}') + brackets.count(']') + brackets.count(')')
+        if closers <= self._depth:
+            self._depth += len(brackets) - 2 * closers
+        else:
+            # The depth does not go below 0.
+            depth = self._depth
+            for char in brackets:
+                if char in '{[(':
+                    depth += 1
+                elif depth:
+                    depth -= 1
+            self._depth = depth
+        if last:
+            self._opened = False
+        elif brackets:
+            # Whether text follows is not known, so an empty structure is
+            # assumed, and the closing character is not used as an end.
+            self._opened = brackets[-1] in '{[('
+        return pos
@@ -0,0 +1,392 @@
+"""Serve format requests from a long-lived process.
+
+Starting Python and importing the package takes far longer than formatting
+a snippet, so editor plugins and pipelines that format many small inputs
+can keep one process running and send it requests instead.
+
+Protocol:
+    Every message is a sequence of frames, and a frame is a 4-byte
+    big-endian length followed by that many bytes. A request is two frames:
+    a JSON object of `beautify()` options, and the UTF-8 input text. The
+    response is two frames: `ok` and the UTF-8 output, or `error` and a
+    message. Any number of requests may be sent on one connection, and the
+    responses come back in the same order.
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from beautipy.core import Style, beautify
+
+_LENGTH = struct.Struct('>I')
+# Options a request may set.
+_OPTIONS = frozenset(Style().options)
+
+
+def default_socket_path() -> str:
+    """Return the socket path used when none is given.
+
+    This is `$BEAUTIPY_SOCKET` if set, otherwise `beautipy.sock` in
+    `$XDG_RUNTIME_DIR`, or in a per-user directory in the temporary
+    directory. The server creates that directory, accessible to the
+    current user only; nothing is created here.
+    """
+    path = os.environ.get('BEAUTIPY_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'beautipy.sock')
+    return os.path.join(_private_directory(), 'beautipy.sock')
+
+
+def serve(path: Optional[str] = None, *, max_concurrent: int = 8, **options: object) -> None:
+    """Serve format requests on a Unix domain socket until interrupted.
+
+    Each connection is handled in its own thread, and at most
+    `max_concurrent` requests are formatted at a time. The socket is only
+    accessible to the current user, and it is removed when the server
+    stops. A socket file left behind by a server that is gone is replaced.
+
+    Args:
+        path: The socket path. Defaults to `default_socket_path()`.
+        max_concurrent: Maximum number of requests formatted at a time.
+            Must be `>= 1`. Defaults to `8`.
+        **options: Default options of `beautify()`, which requests can
+            override.
+
+    Raises:
+        OSError: If the socket cannot be created, or another server is
+            already listening on it. `PermissionError` if a file of another
+            user is in its place, or the per-user directory of the default
+            socket belongs to another user or is accessible to others.
+        ValueError: If `max_concurrent` is less than 1 or an option is
+            invalid.
+        TypeError: If an option is unknown.
+    """
+    with _make_server(path or default_socket_path(), max_concurrent, options) as server:
+        server.serve_forever()
+
+
+def serve_stdio(
+    stdin: Optional[BinaryIO] = None,
+    stdout: Optional[BinaryIO] = None,
+    *,
+    max_concurrent: int = 8,
+    **options: object
+) -> None:
+    """Serve format requests over a pair of binary streams until EOF.
+
+    Requests are read from `stdin` and formatted on up to `max_concurrent`
+    threads, and the responses are written to `stdout` in order, each as
+    soon as it and those before it are done.
+
+    Args:
+        stdin: The stream to read requests from. Defaults to the binary
+            buffer of `sys.stdin`.
+        stdout: The stream to write responses to. Defaults to the binary
+            buffer of `sys.stdout`.
+        max_concurrent: Maximum number of requests formatted at a time.
+            Must be `>= 1`. Defaults to `8`.
+        **options: Default options of `beautify()`, which requests can
+            override.
+
+    Raises:
+        OSError: If reading or writing fails.
+        EOFError: If the input ends in the middle of a request.
+        ValueError: If `max_concurrent` is less than 1 or an option is
+            invalid.
+        TypeError: If an option is unknown.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    defaults = _check(max_concurrent, options)
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else sys.stdout.buffer
+    # Responses not yet written, in request order. Bounded, so that reading
+    # stops while `max_concurrent` requests are waiting to be written.
+    pending = queue.Queue(max_concurrent)
+    errors = []
+
+    def write_responses() -> None:
+        while True:
+            future = pending.get()
+            if future is None:
+                return
+            if errors:
+                # Keep taking responses, so that reading does not block.
+                continue
+            try:
+                response = future.result()
+            except Exception as err:
+                response = _error_response(err)
+            try:
+                _write_response(stdout, *response)
+            except OSError as err:
+                errors.append(err)
+
+    writer = threading.Thread(target=write_responses, daemon=True)
+    writer.start()
+    with ThreadPoolExecutor(max_concurrent) as executor:
+        try:
+            while not errors:
+                frames = _read_request(stdin)
+                if frames is None:
+                    break
+                pending.put(executor.submit(_respond, *frames, defaults))
+        finally:
+            pending.put(None)
+            writer.join()
+    if errors:
+        raise errors[0]
+
+
+def request(
+    text: str,
+    *,
+    path: Optional[str] = None,
+    timeout: Optional[float] = 30.0,
+    **options: object
+) -> str:
+    """Format `text` on the server listening on `path`.
+
+    Args:
+        text: The input text.
+        path: The socket path. Defaults to `default_socket_path()`.
+        timeout: Seconds to wait for the connection and for each read,
+            which includes formatting on the server, or `None` to wait
+            forever. Defaults to `30.0`.
+        **options: Options of `beautify()`.
+
+    Returns:
+        The formatted string.
+
+    Raises:
+        OSError: If no server is listening on `path`, e.g.
+            `FileNotFoundError` or `ConnectionRefusedError`, or the
+            connection fails. `PermissionError` if the socket or the
+            per-user directory belongs to another user, who would receive
+            the input. `TimeoutError` if the server does not answer in
+            time.
+        ValueError: If the server rejects the request, e.g. because an
+            option is invalid.
+    """
+    path = path or default_socket_path()
+    if os.path.dirname(path) == _private_directory():
+        _check_private_directory()
+    _check_owner(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        _connect(sock, path, timeout)
+        with sock.makefile('rwb') as stream:
+            _write_frames(stream, json.dumps(options).encode('utf-8'), text.encode('utf-8'))
+            stream.flush()
+            response = _read_request(stream)
+    if response is None:
+        raise ConnectionError('the server closed the connection without a response')
+    status, payload = response
+    if status != b'ok':
+        raise ValueError(payload.decode('utf-8'))
+    return payload.decode('utf-8')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A Unix socket server with a limit on requests formatted at a time."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, max_concurrent: int, defaults: Dict[str, object]) -> None:
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.defaults = defaults
+        self.path = path
+        directory = _private_directory()
+        if os.path.dirname(path) == directory:
+            try:
+                os.mkdir(directory, 0o700)
+            except FileExistsError:
+                pass
+            _check_private_directory()
+        _remove_stale_socket(path)
+        mask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(mask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer the requests of one connection in turn."""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                frames = _read_request(self.rfile)
+            except (EOFError, OSError):
+                return
+            if frames is None:
+                return
+            with self.server.slots:
+                response = _respond(*frames, self.server.defaults)
+            try:
+                _write_response(self.wfile, *response)
+            except OSError:
+                # The client is gone.
+                return
+
+
+def _connect(sock: socket.socket, path: str, timeout: Optional[float]) -> None:
+    """Connect `sock` to `path`, waiting at most `timeout` seconds."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            sock.connect(path)
+            return
+        except BlockingIOError:
+            # With a timeout, connecting fails at once while the backlog of
+            # the server is full, instead of waiting.
+            if time.monotonic() >= deadline:
+                raise TimeoutError('timed out connecting to the server') from None
+            time.sleep(0.01)
+
+
+def _make_server(path: str, max_concurrent: int, options: Dict[str, object]) -> _Server:
+    """Check the arguments and return a server bound to `path`."""
+    return _Server(path, max_concurrent, _check(max_concurrent, options))
+
+
+def _check(max_concurrent: int, options: Dict[str, object]) -> Dict[str, object]:
+    """Validate the server arguments and return the default options."""
+    if max_concurrent < 1:
+        raise ValueError('max_concurrent must be greater than or equal to 1')
+    Style(**options)
+    return dict(options)
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove the socket at `path` unless a server is listening on it."""
+    if not os.path.exists(path):
+        return
+    _check_owner(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise OSError(f'a server is already listening on {path}')
+
+
+def _private_directory() -> str:
+    """Return the per-user directory of the default socket."""
+    user = os.getuid() if hasattr(os, 'getuid') else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f'beautipy-{user}')
+
+
+def _check_private_directory() -> None:
+    """Raise PermissionError unless the per-user directory is private."""
+    directory = _private_directory()
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or not _owned(info) or info.st_mode & 0o077:
+        raise PermissionError(f'{directory} must be a directory accessible only to the current user')
+
+
+def _owned(info: os.stat_result) -> bool:
+    """Return whether the file with `info` belongs to the current user."""
+    return not hasattr(os, 'getuid') or info.st_uid == os.getuid()
+
+
+def _check_owner(path: str) -> None:
+    """Raise PermissionError if the file at `path` belongs to another user."""
+    if not _owned(os.stat(path)):
+        raise PermissionError(f'{path} belongs to another user')
+
+
+def _respond(options: bytes, text: bytes, defaults: Dict[str, object]) -> Tuple[bytes, bytes]:
+    """Format one request and return the status and the payload."""
+    try:
+        options = json.loads(options)
+        if not isinstance(options, dict):
+            raise TypeError('options must be a JSON object')
+        for name in options:
+            if name not in _OPTIONS:
+                raise TypeError(f'unknown option {name!r}')
+        output = beautify(text.decode('utf-8'), **{**defaults, **options})
+    except (TypeError, ValueError) as err:
+        # Invalid JSON and UTF-8 raise subclasses of ValueError.
+        return b'error', str(err).encode('utf-8')
+    except Exception as err:
+        # Any other failure only fails this request, so that the server
+        # keeps answering the others.
+        return _error_response(err)
+    return b'ok', output.encode('utf-8')
+
+
+def _error_response(err: Exception) -> Tuple[bytes, bytes]:
+    """Return the response for a request that failed unexpectedly."""
+    return b'error', f'{type(err).__name__}: {err}'.encode('utf-8')
+
+
+def _read_request(stream: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    """Read the two frames of a message, or return None at EOF."""
+    first = _read_frame(stream)
+    if first is None:
+        return None
+    second = _read_frame(stream)
+    if second is None:
+        raise EOFError('the input ended in the middle of a message')
+    return first, second
+
+
+def _read_frame(stream: BinaryIO) -> Optional[bytes]:
+    """Read one frame, or return None at EOF before it."""
+    header = _read_exact(stream, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    data = _read_exact(stream, length) if length else b''
+    if data is None:
+        raise EOFError('the input ended in the middle of a frame')
+    return data
+
+
+def _read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    """Read exactly `size` bytes, or return None at EOF before any."""
+    data = stream.read(size)
+    if not data:
+        return None
+    while len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            raise EOFError('the input ended in the middle of a frame')
+        data += more
+    return data
+
+
+def _write_frames(stream: BinaryIO, *frames: bytes) -> None:
+    """Write `frames` to `stream`."""
+    for frame in frames:
+        stream.write(_LENGTH.pack(len(frame)))
+        stream.write(frame)
+
+
+def _write_response(stream: BinaryIO, status: bytes, payload: bytes) -> None:
+    """Write a response and flush it."""
+    _write_frames(stream, status, payload)
+    stream.flush()
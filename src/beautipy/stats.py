@@ -0,0 +1,127 @@
+"""Counters and timings of one formatting job."""
+
+import re
+
+# A run of text outside string literals, followed by a string literal, a
+# bracket, an unterminated string literal or the end.
+_TOKENS = re.compile(r"""
+    ([^'"{}\[\]()]*)
+    (?:('[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")
+    |([{}\[\]()]|['"].*|\Z))
+""", re.VERBOSE | re.DOTALL)
+
+
+class FormatStats:
+    """Sizes, token counts and a timing split of a call to `beautify()`.
+
+    Pass an instance as `stats` to `beautify()` to have it filled in. The
+    counts describe the input text, before any limits are applied, and are
+    gathered in a separate pass that is not part of the timings.
+
+    Attributes:
+        input_chars: Length of the input text.
+        output_chars: Length of the formatted output.
+        max_depth: Deepest nesting of brackets in the input.
+        openers: Number of opening characters outside string literals.
+        closers: Number of closing characters outside string literals.
+        commas: Number of commas outside string literals.
+        strings: Number of string literals.
+        empty_structures: Number of structures with nothing but whitespace
+            inside, which are collapsed to e.g. `{}` unless `expand_empty`
+            is set.
+        read_seconds: Time spent reading the input. Only set by the CLI.
+        repr_seconds: Time spent converting the object with `str()`.
+        scan_seconds: Time spent scanning and formatting the text.
+        join_seconds: Time spent joining the output chunks.
+        write_seconds: Time spent writing the output. Only set by the CLI.
+
+    Examples:
+        >>> from beautipy import beautify
+        >>> stats = FormatStats()
+        >>> _ = beautify({'a': [1, 2], 'b': {}}, stats=stats)
+        >>> stats.openers, stats.commas, stats.max_depth, stats.empty_structures
+        (3, 2, 2, 1)
+    """
+
+    __slots__ = (
+        'input_chars',
+        'output_chars',
+        'max_depth',
+        'openers',
+        'closers',
+        'commas',
+        'strings',
+        'empty_structures',
+        'read_seconds',
+        'repr_seconds',
+        'scan_seconds',
+        'join_seconds',
+        'write_seconds',
+    )
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, 0.0 if name.endswith('_seconds') else 0)
+
+    @property
+    def total_seconds(self) -> float:
+        """The sum of the timed phases."""
+        return self.read_seconds + self.repr_seconds + self.scan_seconds + self.join_seconds + self.write_seconds
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'FormatStats({fields})'
+
+    def summary(self) -> str:
+        """Return the counters and timings as aligned lines of text."""
+        lines = []
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if name.endswith('_seconds'):
+                lines.append(f'{name[:-8] + " time":<18}{value * 1000:12.3f} ms')
+            else:
+                lines.append(f'{name.replace("_", " "):<18}{value:12,}')
+        lines.append(f'{"total time":<18}{self.total_seconds * 1000:12.3f} ms')
+        return '\n'.join(lines)
+
+    def _count(self, text: str, output: str) -> None:
+        """Set the sizes and the token counts for `text` and its `output`."""
+        self.input_chars = len(text)
+        self.output_chars = len(output)
+        openers = closers = commas = strings = empty = 0
+        depth = max_depth = 0
+        # True while only whitespace follows the last opening character.
+        opened = False
+        for run, string, token in _TOKENS.findall(text):
+            if run:
+                commas += run.count(',')
+                if opened and not run.isspace():
+                    opened = False
+            if string:
+                strings += 1
+                opened = False
+            elif not token:
+                continue
+            elif token in '{[(':
+                openers += 1
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+                opened = True
+            elif token in '}])':
+                closers += 1
+                if opened:
+                    empty += 1
+                    opened = False
+                if depth:
+                    depth -= 1
+            else:
+                # A string literal that is not closed.
+                strings += 1
+                opened = False
+        self.openers = openers
+        self.closers = closers
+        self.commas = commas
+        self.strings = strings
+        self.empty_structures = empty
+        self.max_depth = max_depth
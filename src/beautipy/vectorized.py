@@ -0,0 +1,374 @@
+"""Format large pieces of text with array operations, using NumPy.
+
+The Python scanner in `beautipy.core` steps through the text with regular
+expressions, and its cost grows with the number of structural characters.
+Here a chunk is handled as a whole: the text is encoded into an array of
+character codes, the structural characters are classified at once, string
+literals and nesting depth are worked out with cumulative operations, and
+the output is assembled by copying the kept characters and the inserted
+line breaks into place in an output array.
+
+NumPy is imported on first use. Chunks shorter than `_MIN_LENGTH`, where
+the fixed cost of the array operations outweighs the gain, are formatted by
+the Python scanner. The Python scanner is the reference; the output of both
+must always be identical.
+"""
+
+# Chunks shorter than this are formatted by the Python scanner.
+_MIN_LENGTH = 16 * 1024
+
+# NumPy once imported, or False if it is not installed.
+_numpy = None
+
+# Character classes, by code point up to 127.
+_OTHER, _SPACE, _OPENER, _CLOSER, _COMMA, _COLON, _EQUALS = range(7)
+
+# No character above this code point is whitespace.
+_MAX_SPACE = 0x3000
+
+# Quote states: outside string literals, inside '...' and inside "...".
+_QUOTES = (None, "'", '"')
+
+_OPENERS = '{[('
+_CLOSERS = '}])'
+
+# Kinds of pieces written for structural characters.
+_PIECE_COMMA, _PIECE_COLON, _PIECE_EQUALS, _PIECE_CLOSER, _PIECE_OPENER, _PIECE_EMPTY = range(6)
+
+
+def load():
+    """Return the NumPy module, or None if it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        if numpy:
+            _build_tables(numpy)
+        _numpy = numpy
+    return _numpy or None
+
+
+def _build_tables(np):
+    """Set up the lookup tables, once NumPy is loaded."""
+    global _CLASSES, _BRACKETS, _WIDE_SPACES, _STEPS, _KINDS
+    classes = np.zeros(128, np.int8)
+    brackets = np.zeros(128, np.int64)
+    for code in range(128):
+        if chr(code).isspace():
+            classes[code] = _SPACE
+    for index, (opener, closer) in enumerate(zip(_OPENERS, _CLOSERS)):
+        classes[ord(opener)] = _OPENER
+        classes[ord(closer)] = _CLOSER
+        brackets[ord(opener)] = brackets[ord(closer)] = index
+    classes[ord(',')] = _COMMA
+    classes[ord(':')] = _COLON
+    classes[ord('=')] = _EQUALS
+    _CLASSES = classes
+    _BRACKETS = brackets
+    # Larger code points map to the last entry, which is not whitespace.
+    _WIDE_SPACES = np.array([chr(code).isspace() for code in range(_MAX_SPACE + 2)])
+    # The change of depth and the kind of piece written, by class.
+    _STEPS = np.zeros(7, np.int64)
+    _STEPS[_OPENER], _STEPS[_CLOSER] = 1, -1
+    _KINDS = np.zeros(7, np.int64)
+    _KINDS[[_COMMA, _COLON, _EQUALS, _CLOSER, _OPENER]] = [
+        _PIECE_COMMA, _PIECE_COLON, _PIECE_EQUALS, _PIECE_CLOSER, _PIECE_OPENER,
+    ]
+
+
+def format_chunk(formatter, chunk):
+    """Format `chunk` as `formatter._format()` does for text.
+
+    Reads the state kept on `formatter` and stores the new state back, so
+    that it can be used in place of the Python scanner at any point of an
+    input.
+    """
+    if not chunk or len(chunk) < _MIN_LENGTH:
+        return formatter._scan_python(chunk)
+    np = load()
+    if np is None:
+        return formatter._scan_python(chunk)
+
+    prefix = ''
+    if formatter._string_opener and formatter._last_was_escape:
+        # The escaped character, which cannot end the literal.
+        prefix = chunk[0]
+        chunk = chunk[1:]
+        formatter._last_was_escape = False
+        formatter._last = prefix
+    if formatter._pending_opener:
+        # Formatting the opening character again has the same effect.
+        chunk = formatter._pending_opener + chunk
+        formatter._pending_opener = None
+    return prefix + _format(np, formatter, chunk)
+
+
+def _format(np, formatter, chunk):
+    """Format `chunk`, which does not start with a pending escape or opener."""
+    indent = formatter._indent
+    ascii = chunk.isascii() and indent.isascii()
+    if ascii:
+        encoding = 'ascii'
+        codes = np.frombuffer(chunk.encode(encoding), np.uint8)
+        classes = _CLASSES[codes]
+    else:
+        encoding = 'utf-32-le'
+        codes = np.frombuffer(chunk.encode(encoding, 'surrogatepass'), np.uint32)
+        classes = _CLASSES[np.minimum(codes, 127)]
+        wide = np.flatnonzero(codes > 127)
+        classes[wide[_WIDE_SPACES[np.minimum(codes[wide], _MAX_SPACE + 1)]]] = _SPACE
+
+    quoted, state, escaped = _string_literals(np, codes, _QUOTES.index(formatter._string_opener))
+    if quoted is not None:
+        classes[quoted] = _OTHER
+    if formatter._compact_operators:
+        classes[(classes == _COLON) | (classes == _EQUALS)] = _OTHER
+
+    # Everything but whitespace is written, the openers of empty structures
+    # together with their closer. From here on, characters are numbered by
+    # their index in `written`, and structural ones by their index in
+    # `tokens`.
+    written = np.flatnonzero(classes != _SPACE)
+    classes = classes[written]
+    codes = codes[written]
+    count = len(written)
+    tokens = np.flatnonzero(classes != _OTHER)
+    token_classes = classes[tokens]
+    pending = None
+    if count and classes[-1] == _OPENER:
+        pending = chunk[written[-1]]
+        tokens = tokens[:-1]
+        token_classes = token_classes[:-1]
+    # An opener directly followed by a closer makes an empty structure.
+    empty = np.zeros(len(tokens), bool)
+    empty[:-1] = (token_classes[:-1] == _OPENER) & (token_classes[1:] == _CLOSER) & (tokens[1:] == tokens[:-1] + 1)
+    emptied = np.zeros(len(tokens), bool)
+    emptied[1:] = empty[:-1]
+
+    # The depth before each token: the running sum of openers and closers,
+    # held at zero from below.
+    steps = _STEPS[token_classes]
+    steps[empty | emptied] = 0
+    depths = np.cumsum(steps)
+    depths += formatter._indent_level
+    level = formatter._indent_level
+    if len(depths):
+        level = int(depths[-1]) - min(int(depths.min()), 0)
+        depths -= steps
+        depths -= np.minimum(np.minimum.accumulate(depths), 0)
+
+    # Tell the pieces apart by kind, depth and brackets, by index in
+    # `_OPENERS` and `_CLOSERS`, and for an empty structure 3 times the
+    # opener's plus the closer's.
+    dropped = tokens[empty]
+    indices = np.flatnonzero(~empty)
+    tokens, token_classes, depths, emptied = tokens[indices], token_classes[indices], depths[indices], emptied[indices]
+    kinds = _KINDS[token_classes]
+    kinds[emptied] = _PIECE_EMPTY
+    subs = _BRACKETS[codes[tokens] & 127]
+    subs[emptied] += 3 * _BRACKETS[codes[tokens[emptied] - 1] & 127]
+    base = top = 0
+    if len(tokens):
+        base = int(depths.min())
+        top = int(depths.max()) + 1
+    keys = ((depths - base) * 6 + kinds) * 9 + subs
+    if (top - base) * 54 <= 4 * len(keys) + 4096:
+        present = np.zeros((top - base) * 54, bool)
+        present[keys] = True
+        unique = np.flatnonzero(present)
+        inverse = (np.cumsum(present) - 1)[keys]
+    else:
+        unique, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+    if top >= len(formatter._breaks):
+        formatter._grow_tables(top)
+    pieces, tails, lined = _pieces(formatter, unique.tolist(), base)
+
+    # A line break is written before an opener unless the output before it
+    # ends with the indentation. The output before an empty structure is
+    # that before its opener.
+    tail_indented = np.array([tail.endswith(indent) for tail in tails], bool)
+    lines = np.array(lined, bool)[inverse]
+    candidates = np.flatnonzero(lines)
+    before = tokens[candidates] - 1 - emptied[candidates]
+    last = formatter._last
+    indented = np.full(len(candidates), last is None or last.endswith(indent))
+    found = before >= 0
+    before = before[found]
+    if not indent:
+        char_indented = True
+    elif len(indent) == 1:
+        char_indented = codes[before] == ord(indent)
+    else:
+        char_indented = False
+    after_token = np.minimum(np.searchsorted(tokens, before), max(len(tokens) - 1, 0))
+    indented[found] = np.where(
+        classes[before] == _OTHER, char_indented, tail_indented[inverse[after_token]] if len(tokens) else False
+    )
+    lines[candidates] = ~indented
+    choices = inverse * 2 + lines
+
+    # The output as runs of one character repeated: one for each kept
+    # character, and those of the pieces, which are mostly indentation.
+    table = np.frombuffer(''.join(pieces).encode(encoding, 'surrogatepass'), codes.dtype)
+    piece_lengths = np.array([len(piece) for piece in pieces], np.int64)
+    piece_ends = np.cumsum(piece_lengths)
+    firsts = np.ones(len(table), bool)
+    firsts[1:] = table[1:] != table[:-1]
+    firsts[piece_ends[:-1][piece_lengths[1:] > 0]] = True
+    run_starts = np.flatnonzero(firsts)
+    run_chars = table[run_starts]
+    run_lengths = np.diff(np.append(run_starts, len(table)))
+    piece_runs = np.searchsorted(run_starts, piece_ends - piece_lengths)
+    piece_run_counts = np.searchsorted(run_starts, piece_ends) - piece_runs
+    counts = piece_run_counts[choices]
+    sizes = np.ones(count, np.int64)
+    sizes[tokens] = counts
+    sizes[dropped] = 0
+    if pending is not None:
+        sizes[-1] = 0
+    chars = np.repeat(codes, sizes)
+    lengths = np.ones(len(chars), np.int64)
+    total = int(counts.sum())
+    if total:
+        # Before a token come the kept characters and the runs of the
+        # tokens before it.
+        ends = np.cumsum(counts)
+        offsets = tokens - indices + ends - counts
+        within = np.arange(total) - np.repeat(ends - counts, counts)
+        targets = np.repeat(offsets, counts) + within
+        sources = np.repeat(piece_runs[choices], counts) + within
+        chars[targets] = run_chars[sources]
+        lengths[targets] = run_lengths[sources]
+
+    formatter._indent_level = level
+    formatter._string_opener = _QUOTES[state]
+    formatter._last_was_escape = escaped
+    formatter._pending_opener = pending
+    end = count - 1 - (pending is not None)
+    if end >= 0:
+        if classes[end] == _OTHER:
+            formatter._last = chunk[written[end]]
+        else:
+            formatter._last = tails[inverse[-1]]
+    return np.repeat(chars, lengths).tobytes().decode(encoding, 'surrogatepass')
+
+
+def _string_literals(np, codes, state):
+    """Find the characters of `codes` that belong to string literals.
+
+    `state` is the quote state at the start. Returns the mask of quoted
+    characters, quotes included, or None if there are none, the quote state
+    at the end, and whether the last character escapes the next one.
+    """
+    n = len(codes)
+    quotes = np.flatnonzero((codes == ord("'")) | (codes == ord('"')))
+    backslashes = np.flatnonzero(codes == ord('\\'))
+    # The first backslash of the run each backslash is in.
+    firsts = np.ones(len(backslashes), bool)
+    firsts[1:] = backslashes[1:] != backslashes[:-1] + 1
+    run_starts = backslashes[firsts][np.cumsum(firsts) - 1]
+    quoted = None
+    if len(quotes):
+        escaped = np.zeros(len(quotes), bool)
+        if len(backslashes):
+            # In a literal, a quote after an odd number of backslashes is
+            # escaped.
+            found = np.minimum(np.searchsorted(backslashes, quotes - 1), len(backslashes) - 1)
+            after = backslashes[found] == quotes - 1
+            escaped = after & ((quotes - run_starts[found]) & 1).astype(bool)
+        states = _quote_states(np, codes[quotes] == ord('"'), escaped, state)
+        quoted = np.repeat(np.append(state, states), np.diff(quotes, prepend=-1, append=n - 1)) != 0
+        quoted[quotes] = True
+        state = int(states[-1])
+    elif state:
+        quoted = np.ones(n, bool)
+    escape = bool(state and len(backslashes) and backslashes[-1] == n - 1 and (n - run_starts[-1]) & 1)
+    return quoted, state, escape
+
+
+def _quote_states(np, double, escaped, state):
+    """Return the quote state after each quote, starting from `state`.
+
+    `double` tells the double quotes from the single ones, and `escaped` the
+    quotes that follow an odd number of backslashes.
+    """
+    count = len(double)
+    kinds = double + 1
+    if double.all() or not double.any():
+        # With one kind of quote, each unescaped quote opens or closes a
+        # literal. An escaped one is skipped unless it opens a literal.
+        quote = int(kinds[0])
+        if state in (0, quote):
+            inside = (np.cumsum(~escaped) & 1).astype(bool) ^ (state != 0)
+            if inside[escaped].all():
+                return inside * quote
+    # A literal ends at the next unescaped quote of the kind it started
+    # with, and the quote after it starts the next one. Only the literals
+    # are stepped through.
+    closing = np.full(count + 1, count)
+    firsts = {}
+    for quote in (1, 2):
+        of_kind = np.flatnonzero(kinds == quote)
+        ends = of_kind[~escaped[of_kind]]
+        found = np.searchsorted(ends, of_kind, 'right')
+        closing[of_kind] = np.append(ends, count)[found]
+        firsts[quote] = int(ends[0]) if len(ends) else count
+    marks = np.zeros(count + 1, np.int64)
+    start = 0
+    if state:
+        start = firsts[state] + 1
+        marks[0] += state
+        marks[start - 1] -= state
+    following = closing.tolist()
+    starts = []
+    while start < count:
+        starts.append(start)
+        start = following[start] + 1
+    starts = np.array(starts, np.int64)
+    marks[starts] += kinds[starts]
+    marks[closing[starts]] -= kinds[starts]
+    return np.cumsum(marks[:count])
+
+
+def _pieces(formatter, keys, base):
+    """Return the text written for each structural key.
+
+    Returns the pieces, each followed by its variant with a line break in
+    front or an empty string, the output fragment each leaves as `_last`,
+    and whether each can have a line break in front.
+    """
+    lines, breaks, closings = formatter._lines, formatter._breaks, formatter._closings
+    new_line = not formatter._opener_same_line
+    pieces, tails, lined = [], [], []
+    for key in keys:
+        depth, rest = divmod(key, 54)
+        depth += base
+        kind, sub = divmod(rest, 9)
+        line = False
+        if kind == _PIECE_COMMA:
+            tail = piece = ',' + breaks[depth]
+        elif kind == _PIECE_COLON:
+            tail = piece = ': '
+        elif kind == _PIECE_EQUALS:
+            tail = piece = ' = '
+        elif kind == _PIECE_CLOSER:
+            tail = _CLOSERS[sub]
+            piece = closings[depth] + tail
+        elif kind == _PIECE_OPENER:
+            tail = piece = _OPENERS[sub] + breaks[depth + 1]
+            line = new_line
+        else:
+            opener, closer = divmod(sub, 3)
+            if formatter._expand_empty:
+                tail = piece = _OPENERS[opener] + breaks[depth] + _CLOSERS[closer]
+                line = new_line
+            else:
+                tail = piece = _OPENERS[opener] + _CLOSERS[closer]
+        pieces.append(piece)
+        pieces.append(lines[depth] + piece if line else '')
+        tails.append(tail)
+        lined.append(line)
+    return pieces, tails, lined
@@ -0,0 +1,242 @@
+"""Format built-in containers without building their `repr()` first."""
+
+import sys
+from itertools import chain, islice
+from typing import Iterator, List, Optional, Set
+
+from beautipy.limits import DEPTH_MARKER
+
+# Number of pieces of text collected before they are formatted, and of items
+# written at once from a container of atoms.
+_FLUSH_PIECES = 4096
+# Containers holding at most this many items in total, nested ones included,
+# are printed with `repr()` and scanned, which is faster than walking them.
+_SMALL_ITEMS = 256
+
+# Types walked directly. Subclasses are not, as they may print differently.
+_OPENERS = {dict: '{', list: '[', tuple: '(', set: '{', frozenset: '{'}
+_CLOSERS = {dict: '}', list: ']', tuple: ')', set: '}', frozenset: '}'}
+# Types whose `repr()` has no whitespace or structural characters outside
+# one complete string literal. Containers of these are written without
+# scanning their text.
+_ATOMS = {int, float, bool, type(None), str, bytes}
+# Text used by `repr()` when a container is reached again inside itself.
+_RECURSIVE = {
+    dict: '{...}',
+    list: '[...]',
+    tuple: '(...)',
+    set: 'set(...)',
+    frozenset: 'frozenset(...)',
+}
+
+
+def walk(formatter, obj: object, slice_size: Optional[int] = None) -> Iterator[str]:
+    """Format `obj` with `formatter`, yielding the output in chunks.
+
+    The output equals feeding `str(obj)` to `formatter`, but instances of
+    `dict`, `list`, `tuple`, `set` and `frozenset` are walked directly: the
+    text is fed in pieces as it is produced, and the representation of the
+    whole structure is never built.
+
+    Args:
+        formatter: A `beautipy.Formatter`. It is not closed.
+        obj: The container to format.
+        slice_size: If given, at most this many characters of text, or
+            items of a container of atoms, are formatted for each chunk,
+            so the time spent between chunks stays bounded.
+
+    Returns:
+        An iterator over chunks of formatted output.
+
+    Notes:
+        With limits set on `formatter`, the walker leaves out the items and
+        containers they elide without calling `repr()` on them. Items are
+        counted as objects, so an object whose `repr()` holds commas or
+        brackets of its own may be cut where the text would not be.
+        Like `repr()`, a container reached again inside itself is shown as
+        `[...]`, `{...}` and so on. An object whose own `repr()` prints one
+        of its enclosing containers shows that container once more before
+        the recursion is detected.
+    """
+    flush = _FLUSH_PIECES if slice_size is None else min(slice_size, _FLUSH_PIECES)
+    text = []
+    append = text.append
+    active = set()
+    limiter = formatter._limiter
+    # Containers nested deeper than this are elided without `repr()`.
+    max_depth = limiter._max_depth if limiter and limiter._max_depth is not None else sys.maxsize
+    # One entry per container being written: its type, an iterator over its
+    # contents (keys and values alternate for a dict), the index of the next
+    # item, the container, the nesting depth of its contents and the number
+    # of items left out by `max_items_per_container`. The type is None for
+    # containers of atoms, whose contents are batches of item representations.
+    stack = []
+    depth = limiter.depth if limiter else 0
+    if depth < max_depth and is_small(obj):
+        append(repr(obj))
+    else:
+        _enter(obj, text, stack, active, depth, limiter, flush)
+
+    while stack:
+        frame = stack[-1]
+        kind = frame[0]
+        for item in frame[1]:
+            index = frame[2]
+            frame[2] = index + 1
+            if index:
+                append(': ' if kind is dict and index & 1 else ', ')
+
+            if kind is None:
+                yield from _feed(formatter, text, slice_size)
+                output = formatter._write_items(*item)
+                if output:
+                    yield output
+                continue
+
+            if type(item) in _OPENERS and (frame[4] >= max_depth or _count_items(item, _SMALL_ITEMS) < 0):
+                if _enter(item, text, stack, active, frame[4], limiter, flush):
+                    break
+            else:
+                append(repr(item))
+
+            if len(text) >= flush:
+                yield from _feed(formatter, text, slice_size)
+        else:
+            stack.pop()
+            if frame[5]:
+                if frame[2]:
+                    append(', ')
+                yield from _feed(formatter, text, slice_size)
+                limiter.skip_items(frame[5])
+            _leave(frame[3], text, active)
+
+    yield from _feed(formatter, text, slice_size)
+
+
+def _feed(formatter, text: List[str], slice_size: Optional[int]) -> Iterator[str]:
+    """Feed the pieces in `text` to `formatter`, `slice_size` characters at a time, and clear it."""
+    joined = ''.join(text)
+    text.clear()
+    size = slice_size or len(joined) or 1
+    for start in range(0, len(joined), size):
+        output = formatter.feed(joined[start:start + size])
+        if output:
+            yield output
+
+
+def is_small(obj: object) -> bool:
+    """Return True if the container `obj` is best formatted from its `repr()`."""
+    return _count_items(obj, _SMALL_ITEMS) >= 0
+
+
+def _count_items(obj: object, budget: int) -> int:
+    """Subtract the number of items in `obj` and its containers from `budget`.
+
+    Stops as soon as the result is negative, so this is cheap for large and
+    recursive containers alike.
+    """
+    budget -= len(obj)
+    if budget < 0:
+        return budget
+    if type(obj) is dict:
+        for key, value in obj.items():
+            if type(key) in _OPENERS:
+                budget = _count_items(key, budget)
+                if budget < 0:
+                    return budget
+            if type(value) in _OPENERS:
+                budget = _count_items(value, budget)
+                if budget < 0:
+                    return budget
+    else:
+        for item in obj:
+            if type(item) in _OPENERS:
+                budget = _count_items(item, budget)
+                if budget < 0:
+                    return budget
+    return budget
+
+
+def _enter(obj: object, text: List[str], stack: list, active: Set[int], depth: int, limiter, batch_size: int) -> bool:
+    """Start writing a container whose opening character is at `depth` + 1.
+
+    Returns True if a frame was pushed for its contents, or False if it was
+    written completely. Containers of atoms are written `batch_size` items
+    at a time.
+    """
+    kind = type(obj)
+    if id(obj) in active:
+        text.append(_RECURSIVE[kind])
+        return False
+    if not obj:
+        text.append(repr(obj))
+        return False
+
+    inner = depth + 2 if kind is frozenset else depth + 1
+    extra = 0
+    if limiter is not None:
+        max_depth = limiter._max_depth
+        if max_depth is not None and inner > max_depth:
+            if kind is not frozenset:
+                text.append(_OPENERS[kind] + DEPTH_MARKER + _CLOSERS[kind])
+            elif depth < max_depth:
+                text.append('frozenset({' + DEPTH_MARKER + '})')
+            else:
+                text.append('frozenset(' + DEPTH_MARKER + ')')
+            return False
+        max_items = limiter._max_items
+        if max_items == 0 and kind is frozenset:
+            # The set is the only item between the parentheses.
+            text.append('frozenset({' + DEPTH_MARKER + '})')
+            return False
+        if max_items is not None and len(obj) > max_items:
+            extra = len(obj) - max_items
+
+    text.append(_OPENERS[kind] if kind is not frozenset else 'frozenset({')
+    if kind is dict:
+        contents = chain.from_iterable(obj.items())
+        if extra:
+            contents = islice(contents, 2 * (len(obj) - extra))
+        elif limiter is None and all(type(key) in _ATOMS and type(value) in _ATOMS for key, value in obj.items()):
+            kind = None
+            contents = _dict_batches(obj, batch_size)
+    elif extra:
+        contents = islice(obj, len(obj) - extra)
+    elif limiter is None and all(type(item) in _ATOMS for item in obj):
+        kind = None
+        contents = _batches(obj, batch_size)
+    else:
+        contents = iter(obj)
+    stack.append([kind, contents, 0, obj, inner, extra])
+    active.add(id(obj))
+    return True
+
+
+def _batches(obj: object, size: int) -> Iterator[tuple]:
+    """Yield the representations of the items in `obj` in batches of `size`."""
+    items = iter(obj)
+    while True:
+        batch = list(map(repr, islice(items, size)))
+        if not batch:
+            return
+        yield batch, None
+
+
+def _dict_batches(obj: dict, size: int) -> Iterator[tuple]:
+    """Yield the representations of the keys and values in `obj` in batches of `size`."""
+    items = iter(obj.items())
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield [repr(key) for key, _ in batch], [repr(value) for _, value in batch]
+
+
+def _leave(obj: object, text: List[str], active: Set[int]) -> None:
+    """Finish writing a container."""
+    kind = type(obj)
+    if kind is tuple and len(obj) == 1:
+        text.append(',)')
+    else:
+        text.append(_CLOSERS[kind] if kind is not frozenset else '})')
+    active.discard(id(obj))
@@ -0,0 +1,118 @@
+"""Write formatted output to a stream without building it as one string."""
+
+import codecs
+import io
+from typing import BinaryIO, Callable, Iterable, Optional, TextIO, Union
+
+from beautipy.core import beautify_iter
+from beautipy.parallel import beautify_parallel
+
+# Default number of characters, or bytes, collected before each write.
+_BUFFER_SIZE = 64 * 1024
+
+
+def beautify_to(
+    obj: object,
+    fp: Union[TextIO, BinaryIO],
+    *,
+    buffer_size: int = _BUFFER_SIZE,
+    encoding: str = 'utf-8',
+    errors: str = 'strict',
+    workers: Optional[int] = 1,
+    **options: object
+) -> None:
+    """Format an object and write the output to a file-like object.
+
+    The output is written while the input is scanned, through a buffer of
+    about `buffer_size` characters, or bytes for a binary stream, so the
+    whole output never exists in memory and the stream sees few, large
+    writes. `fp` is neither flushed nor closed.
+
+    Args:
+        obj: The object to format. If not a string, `str(obj)` is used
+            internally, except for built-in containers, which are walked as
+            by `beautify()`.
+        fp: A text stream, or a binary stream such as a socket file or a
+            file opened with `'wb'`, which receives the output encoded.
+        buffer_size: Number of characters, or bytes, collected before they
+            are written. Must be `>= 1`. Defaults to 64 KiB.
+        encoding: Encoding of the output for a binary `fp`. Defaults to
+            `'utf-8'`.
+        errors: How encoding errors are handled for a binary `fp`, as in
+            `str.encode()`. Defaults to `'strict'`.
+        workers: Number of worker processes, as in `beautify_parallel()`.
+            Defaults to `1`, which formats in the calling thread.
+        **options: Options of `beautify()`.
+
+    Raises:
+        OSError: If writing to `fp` fails.
+        ValueError: If an option is invalid, or `buffer_size` or `workers`
+            is less than 1.
+        TypeError: If an option is unknown.
+
+    Examples:
+        >>> import sys
+        >>> beautify_to({'a': [1, 2]}, sys.stdout, indent='  ')
+        {
+          'a': 
+          [
+            1,
+            2
+          ]
+        }
+    """
+    if buffer_size < 1:
+        raise ValueError('buffer_size must be greater than or equal to 1')
+    if workers == 1:
+        chunks = beautify_iter(obj, **options)
+    else:
+        chunks = beautify_parallel(obj, workers=workers, **options)
+    if not _is_binary(fp):
+        _write_buffered(chunks, fp.write, buffer_size, '')
+        return
+    encoder = codecs.getincrementalencoder(encoding)(errors)
+    encoded = map(encoder.encode, chunks)
+    _write_buffered(encoded, fp.write, buffer_size, b'')
+    tail = encoder.encode('', final=True)
+    if tail:
+        fp.write(tail)
+
+
+def _is_binary(fp: Union[TextIO, BinaryIO]) -> bool:
+    """Return True if `fp` takes bytes rather than text."""
+    if isinstance(fp, io.TextIOBase):
+        return False
+    if isinstance(fp, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    return 'b' in getattr(fp, 'mode', '')
+
+
+def _write_buffered(
+    chunks: Iterable[Union[str, bytes]],
+    write: Callable[[Union[str, bytes]], object],
+    buffer_size: int,
+    empty: Union[str, bytes],
+) -> None:
+    """Pass `chunks` to `write`, joined into blocks of about `buffer_size`.
+
+    Chunks of at least `buffer_size` are written on their own, after the
+    buffered ones, without being copied.
+    """
+    parts = []
+    length = 0
+    for chunk in chunks:
+        if len(chunk) >= buffer_size:
+            if parts:
+                write(empty.join(parts))
+                parts.clear()
+                length = 0
+            write(chunk)
+            continue
+        parts.append(chunk)
+        length += len(chunk)
+        if length >= buffer_size:
+            write(empty.join(parts))
+            parts.clear()
+            length = 0
+    if parts:
+        write(empty.join(parts))
@@ -0,0 +1,134 @@
+"""Pytest tests for beautipy.aio."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from beautipy import beautify
+from beautipy.aio import abeautify, abeautify_stream
+
+DATA = [{"name": "café ☃", "tags": ["a", "b"], "empty": {}, "nested": [(1, 2)]} for _ in range(2000)]
+
+
+class Writer:
+    """Collects what is written, like an `asyncio.StreamWriter`."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        self.drains += 1
+
+
+def reader(data: bytes) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return stream
+
+
+@pytest.mark.parametrize("obj", [DATA, str(DATA), 12345, "", []])
+def test_matches_beautify(obj: object) -> None:
+    options = {"indent": "  ", "expand_empty": True}
+    assert asyncio.run(abeautify(obj, slice_size=100, **options)) == beautify(obj, **options)
+
+
+def test_gives_control_back() -> None:
+    ticks: List[int] = []
+
+    async def tick(done: asyncio.Event) -> None:
+        while not done.is_set():
+            ticks.append(1)
+            await asyncio.sleep(0)
+
+    async def run() -> str:
+        done = asyncio.Event()
+        task = asyncio.create_task(tick(done))
+        await asyncio.sleep(0)
+        ticks.clear()
+        try:
+            return await abeautify(str(DATA), slice_size=1000, budget=0)
+        finally:
+            done.set()
+            await task
+
+    assert asyncio.run(run()) == beautify(DATA)
+    assert len(ticks) >= len(str(DATA)) // 1000
+
+
+def test_gives_control_back_while_walking() -> None:
+    data = [list(range(300)) for _ in range(50)] + ["x" * 5000]
+    ticks: List[int] = []
+
+    async def tick(done: asyncio.Event) -> None:
+        while not done.is_set():
+            ticks.append(1)
+            await asyncio.sleep(0)
+
+    async def run() -> str:
+        done = asyncio.Event()
+        task = asyncio.create_task(tick(done))
+        await asyncio.sleep(0)
+        ticks.clear()
+        try:
+            return await abeautify(data, slice_size=100, budget=0)
+        finally:
+            done.set()
+            await task
+
+    assert asyncio.run(run()) == beautify(data)
+    assert len(ticks) >= len(str(data)) // 1000
+
+
+def test_stream() -> None:
+    async def run() -> Writer:
+        writer = Writer()
+        text = str(DATA).replace(", ", ",\r\n")
+        await abeautify_stream(reader(text.encode()), writer, slice_size=1000, opener_same_line=True)
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.data.decode() == beautify(str(DATA).replace(", ", ",\n"), opener_same_line=True)
+    assert writer.drains > 1
+
+
+def test_stream_encoding() -> None:
+    async def run() -> Writer:
+        writer = Writer()
+        await abeautify_stream(reader("['é']".encode("latin-1")), writer, encoding="latin-1")
+        return writer
+
+    assert asyncio.run(run()).data == beautify("['é']").encode("latin-1")
+
+
+def test_stream_empty() -> None:
+    async def run() -> Writer:
+        writer = Writer()
+        await abeautify_stream(reader(b""), writer)
+        return writer
+
+    assert asyncio.run(run()).data == b""
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"slice_size": 0}, "slice_size"),
+        ({"budget": -1}, "budget"),
+        ({"max_depth": -1}, "max_depth"),
+    ],
+)
+def test_invalid_arguments(kwargs: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(abeautify([1], **kwargs))
+
+    async def run() -> None:
+        await abeautify_stream(reader(b"[1]"), Writer(), **kwargs)  # type: ignore[arg-type]
+
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(run())
@@ -0,0 +1,115 @@
+"""Pytest tests for beautipy.binary."""
+
+import array
+import random
+
+import pytest
+
+import beautipy.binary
+import beautipy.core
+from beautipy import beautify, beautify_bytes
+
+TEXT = str([{"name": "café ☃", "path": "a\\b", "it's": ['x"y', (1, 2)], "empty": {}} for _ in range(50)])
+OPTIONS = [
+    {},
+    {"indent": "\t", "compact_operators": True},
+    {"opener_same_line": True, "expand_empty": True, "blank_line_depth": 2},
+    {"indent": "→ "},
+    {"indent": "→ ", "max_indent_width": 2, "blank_line_depth": 3},
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_matches_text(options: dict) -> None:
+    data = TEXT.encode("utf-8")
+    assert beautify_bytes(data, **options) == beautify(TEXT, **options).encode("utf-8")
+
+
+@pytest.mark.parametrize("kind", [bytes, bytearray, memoryview])
+def test_accepts_buffers(kind: type) -> None:
+    data = kind(b"x = {'a': [1, 2]}")
+    assert beautify_bytes(data) == beautify("x = {'a': [1, 2]}").encode()
+
+
+def test_accepts_buffers_of_other_item_sizes() -> None:
+    data = array.array("H", b"[1,2]\n")
+    assert beautify_bytes(data) == beautify("[1,2]\n").encode()
+
+
+def test_split_between_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Strings, escapes and characters split between chunks."""
+    rng = random.Random(0)
+    data = TEXT.encode("utf-8")
+    expected = beautify(TEXT).encode("utf-8")
+    for size in [1, 2, 3, 7, rng.randint(8, 100), rng.randint(100, 1000)]:
+        monkeypatch.setattr(beautipy.core, "_CHUNK_SIZE", size)
+        monkeypatch.setattr(beautipy.binary, "_CHUNK_SIZE", size)
+        assert beautify_bytes(data) == expected, size
+
+
+def test_single_byte_encoding() -> None:
+    text = "{'café': 'ü'}"
+    output = beautify_bytes(text.encode("cp1252"), encoding="cp1252", indent="·")
+    assert output == beautify(text, indent="·").encode("cp1252")
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "shift_jis", "cp037"])
+def test_rejects_unsafe_encodings(encoding: str) -> None:
+    with pytest.raises(ValueError, match="encoding must be"):
+        beautify_bytes(b"[]", encoding=encoding)
+
+
+def test_rejects_text() -> None:
+    with pytest.raises(TypeError):
+        beautify_bytes("[1, 2]")  # type: ignore[arg-type]
+
+
+def test_only_ascii_whitespace() -> None:
+    data = "[1,\u00a0 2]".encode()
+    assert beautify_bytes(data) == "[\n    1,\n    \u00a02\n]".encode()
+    assert beautify(data.decode()) == "[\n    1,\n    2\n]"
+
+
+def test_limits_fall_back_to_text() -> None:
+    options = {"max_items_per_container": 1, "max_string_length": 3}
+    assert beautify_bytes(TEXT.encode(), **options) == beautify(TEXT, **options).encode()
+
+
+def test_writes_into_buffer() -> None:
+    expected = beautify(TEXT).encode()
+    out = bytearray(len(expected) + 10)
+    assert beautify_bytes(TEXT.encode(), out) == len(expected)
+    assert out[:len(expected)] == expected
+
+    view = memoryview(out)[5:]
+    assert beautify_bytes(b"[1]", view) == 9
+    assert out[5:14] == b"[\n    1\n]"
+
+
+def test_writes_into_too_small_buffer() -> None:
+    with pytest.raises(ValueError, match="out is too small"):
+        beautify_bytes(b"[1, 2]", bytearray(5))
+
+
+def test_writes_into_read_only_buffer() -> None:
+    with pytest.raises(TypeError, match="writable"):
+        beautify_bytes(b"[1, 2]", b" " * 100)
+
+
+def test_empty_input() -> None:
+    assert beautify_bytes(b"") == b""
+
+
+@pytest.mark.parametrize("indent", ["é", "→", "\U0001f600", "é→"])
+def test_non_ascii_indent(indent: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    texts = ["é(1)", "a→(1)", "x = é[2, é{}]", "'é'é(3), →, {é: →}", TEXT[:300]]
+    for text in texts:
+        for options in ({}, {"expand_empty": True}, {"compact_operators": True}):
+            expected = beautify(text, indent=indent, **options).encode("utf-8")
+            assert beautify_bytes(text.encode("utf-8"), indent=indent, **options) == expected, text
+    # Characters split between chunks.
+    for size in [1, 2, 3]:
+        monkeypatch.setattr(beautipy.core, "_CHUNK_SIZE", size)
+        monkeypatch.setattr(beautipy.binary, "_CHUNK_SIZE", size)
+        for text in texts:
+            assert beautify_bytes(text.encode("utf-8"), indent=indent) == beautify(text, indent=indent).encode("utf-8")
@@ -0,0 +1,92 @@
+"""Pytest tests for beautipy.cache."""
+
+import sys
+
+import pytest
+
+from beautipy import ResultCache, beautify, beautify_cached
+
+
+def test_hit_returns_same_output() -> None:
+    cache = ResultCache()
+    first = cache.beautify("{a:[1,2]}", indent="  ")
+    assert first == beautify("{a:[1,2]}", indent="  ")
+    assert cache.beautify("{a:[1,2]}", indent="  ") is first
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+
+
+def test_options_are_part_of_the_key() -> None:
+    cache = ResultCache()
+    assert cache.beautify("{a:1}") == beautify("{a:1}")
+    assert cache.beautify("{a:1}", compact_operators=True) == beautify("{a:1}", compact_operators=True)
+    assert cache.cache_info().entries == 2
+
+
+def test_objects_are_keyed_by_text() -> None:
+    cache = ResultCache()
+    assert cache.beautify({"id": 1}) == beautify({"id": 1})
+    assert cache.beautify("{'id': 1}") == beautify({"id": 1})
+    assert cache.cache_info().hits == 1
+
+
+def test_evicts_least_recently_used() -> None:
+    cache = ResultCache(max_entries=2)
+    cache.beautify("[1]")
+    cache.beautify("[2]")
+    cache.beautify("[1]")
+    cache.beautify("[3]")
+    assert cache.cache_info().evictions == 1
+    cache.beautify("[1]")
+    cache.beautify("[2]")
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries) == (2, 4, 2)
+
+
+def test_evicts_to_stay_within_max_bytes() -> None:
+    size = sys.getsizeof("[1]") + sys.getsizeof(beautify("[1]"))
+    cache = ResultCache(max_bytes=2 * size)
+    for text in ("[1]", "[2]", "[3]"):
+        cache.beautify(text)
+    info = cache.cache_info()
+    assert info.entries == 2
+    assert info.bytes == 2 * size
+    assert info.evictions == 1
+
+
+def test_large_inputs_bypass_the_cache() -> None:
+    cache = ResultCache(max_input_length=10)
+    cache.beautify("[1]")
+    text = str(list(range(100)))
+    assert cache.beautify(text) == beautify(text)
+    assert cache.beautify(list(range(1000))) == beautify(list(range(1000)))
+    info = cache.cache_info()
+    assert (info.misses, info.entries, info.evictions) == (3, 1, 0)
+
+
+def test_cache_clear() -> None:
+    cache = ResultCache()
+    cache.beautify("[1]")
+    cache.beautify("[1]")
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 0, 0, 0)
+
+
+def test_beautify_cached() -> None:
+    beautify_cached.cache_clear()
+    assert beautify_cached("[1, 2]", max_items_per_container=1) == beautify("[1, 2]", max_items_per_container=1)
+    beautify_cached("[1, 2]", max_items_per_container=1)
+    assert beautify_cached.cache_info().hits == 1
+    beautify_cached.cache_clear()
+    assert beautify_cached.cache_info().entries == 0
+
+
+@pytest.mark.parametrize("name", ["max_entries", "max_bytes", "max_input_length"])
+def test_negative_bound_raises(name: str) -> None:
+    with pytest.raises(ValueError, match=name):
+        ResultCache(**{name: -1})
+
+
+def test_invalid_option_raises() -> None:
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        ResultCache().beautify("[1]", blank_line_depth=-1)
@@ -1,10 +1,14 @@
 """Pytest tests for beautipy.cli."""
 
-from io import StringIO
+import socket
+import struct
+from io import BytesIO, StringIO, TextIOWrapper
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
+from beautipy import beautify
 from beautipy.cli import EXIT_ERROR, EXIT_OK, main, parse_args
 
 
@@ -19,6 +23,12 @@ class TestParseArgs:
         assert ns.compact_operators is False
         assert ns.expand_empty is False
         assert ns.indent == "    "
+        assert ns.max_depth is None
+        assert ns.max_items is None
+        assert ns.max_string is None
+        assert ns.jobs == 1
+        assert ns.file is None
+        assert ns.stats is False
 
     def test_positional_text(self) -> None:
         ns = parse_args(["  { 'a': 1 }  "])
@@ -58,6 +68,20 @@ class TestParseArgs:
         ns = parse_args(["--indent", "  "])
         assert ns.indent == "  "
 
+    def test_max_indent_width(self) -> None:
+        assert parse_args([]).max_indent_width is None
+        assert parse_args(["--max-indent-width", "8"]).max_indent_width == 8
+
+    def test_limits(self) -> None:
+        ns = parse_args(["--max-depth", "2", "--max-items", "10", "--max-string", "80"])
+        assert ns.max_depth == 2
+        assert ns.max_items == 10
+        assert ns.max_string == 80
+
+    def test_jobs(self) -> None:
+        assert parse_args(["-j", "4"]).jobs == 4
+        assert parse_args(["--jobs", "0"]).jobs == 0
+
     def test_combined_flags(self) -> None:
         ns = parse_args(["-e", "-o", "-b", "1", "{}"])
         assert ns.expand_empty is True
@@ -127,6 +151,18 @@ class TestMain:
         assert "a" in out and "1" in out
         assert err == ""
 
+    def test_main_limits(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--max-items", "1", "--max-string", "2", "{'abc': [1, 2]}"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == "{\n    'ab'<+1 char>: \n    [\n        1,\n        <+1 item>\n    ]\n}\n"
+
+    def test_main_max_indent_width(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--max-indent-width", "0", "[[1]]"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == "[\n|1|    [\n|2|    1\n|1|    ]\n]\n"
+
     def test_main_multiple_positional_joined(
         self, capsys: pytest.CaptureFixture[str]
     ) -> None:
@@ -169,3 +205,279 @@ class TestMain:
         _, err = capsys.readouterr()
         assert code == EXIT_ERROR
         assert "blank_line_depth" in err
+
+    def test_main_jobs(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["-j", "2", "-s", "{a:[1,2],b:()}"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("{a:[1,2],b:()}", opener_same_line=True) + "\n"
+
+    def test_main_negative_jobs(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["-j", "-1", "{}"])
+        _, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert "--jobs" in err
+
+    def test_main_version(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--version"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out.startswith("beautipy ")
+
+
+    def test_main_stats(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--stats", "{a:[1,2]}"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("{a:[1,2]}") + "\n"
+        assert "commas" in err
+        assert "scan time" in err
+
+    def test_stdin_stats(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("sys.stdin", StringIO("[1, 2]")):
+            code = main(["--stats", "-o"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("[1, 2]", compact_operators=True) + "\n"
+        assert "read time" in err
+
+    def test_main_file(
+        self, capsys: pytest.CaptureFixture[str], tmp_path: Path
+    ) -> None:
+        path = tmp_path / "in.txt"
+        path.write_text("{'a': [1, 2]}", encoding="utf-8")
+        code = main(["-f", str(path), "-o"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("{'a': [1, 2]}", compact_operators=True) + "\n"
+
+    def test_main_file_missing(
+        self, capsys: pytest.CaptureFixture[str], tmp_path: Path
+    ) -> None:
+        code = main(["--file", str(tmp_path / "missing.txt")])
+        _, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert "missing.txt" in err
+
+    def test_main_file_with_text(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["-f", "in.txt", "[1]"])
+        _, err = capsys.readouterr()
+        assert code != EXIT_OK
+        assert "--file" in err
+
+
+class TestStreaming:
+    """Tests for the block-wise stdin path of main()."""
+
+    def test_stdin_matches_beautify(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        text = str({"a": [1, 2, {"b": ()}], "c": "x, {y}"}) * 50
+        with patch("beautipy.cli.READ_SIZE", 7), patch("sys.stdin", StringIO(text)):
+            code = main(["-e", "-b", "1"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify(text, expand_empty=True, blank_line_depth=1) + "\n"
+        assert err == ""
+
+    def test_stdin_reads_binary_buffer(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        text = "{'k': 'caf\u00e9\r\n', 'v': [ ]}\r\n"
+        stdin = TextIOWrapper(BytesIO(text.encode("utf-8")), encoding="utf-8")
+        with patch("beautipy.cli.READ_SIZE", 3), patch("sys.stdin", stdin):
+            code = main([])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify(text.replace("\r\n", "\n")) + "\n"
+
+    def test_stdin_limits(self, capsys: pytest.CaptureFixture[str]) -> None:
+        text = str([{"id": i, "tags": ["a", "b"]} for i in range(100)])
+        with patch("beautipy.cli.READ_SIZE", 5), patch("sys.stdin", StringIO(text)):
+            code = main(["--max-depth", "2", "--max-items", "3"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify(text, max_depth=2, max_items_per_container=3) + "\n"
+        assert "<+97 items>" in out
+
+    def test_stdin_jobs(self, capsys: pytest.CaptureFixture[str]) -> None:
+        text = str([{"id": i, "tags": ["a", "b"]} for i in range(100)])
+        with patch("beautipy.cli.READ_SIZE", 50), patch("sys.stdin", StringIO(text)):
+            code = main(["--jobs", "2", "-e"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify(text, expand_empty=True) + "\n"
+
+    def test_stdin_value_error(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("sys.stdin", StringIO("{}")):
+            code = main(["-b", "-1"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert out == ""
+        assert "blank_line_depth" in err
+
+
+class TestLines:
+    """Tests for the --lines mode of main()."""
+
+    RECORDS = ['{"id": 1, "tags": ["a"]}', '{"id": 2, "broken": [', "", "plain (text)"]
+
+    def expected(self, **options: object) -> str:
+        return "".join(beautify(record, **options) + "\n" for record in self.RECORDS)
+
+    def test_stdin(self, capsys: pytest.CaptureFixture[str]) -> None:
+        text = "\n".join(self.RECORDS) + "\n"
+        with patch("beautipy.cli.READ_SIZE", 5), patch("sys.stdin", StringIO(text)):
+            code = main(["--lines", "-s"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == self.expected(opener_same_line=True)
+        assert err == ""
+
+    def test_jobs(self, capsys: pytest.CaptureFixture[str]) -> None:
+        text = "\n".join(self.RECORDS * 50)
+        with patch("sys.stdin", StringIO(text)):
+            code = main(["--lines", "--jobs", "2"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == self.expected() * 50
+
+    def test_file(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        path = tmp_path / "records.ndjson"
+        path.write_text("\n".join(self.RECORDS), encoding="utf-8")
+        code = main(["--lines", "-f", str(path), "--max-items", "1"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == self.expected(max_items_per_container=1)
+
+    def test_no_input(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("sys.stdin", StringIO("")):
+            code = main(["--lines"])
+        _, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert "no input" in err
+
+    def test_with_stats(self, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--lines", "--stats", "{}"])
+        _, err = capsys.readouterr()
+        assert code != EXIT_OK
+        assert "--stats cannot be used with --lines" in err
+
+
+class TestServer:
+    """Tests for the --serve and --client modes of main()."""
+
+    def test_client_without_server(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--client", "--socket", str(tmp_path / "missing.sock"), "-s", "{'a': [1]}"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("{'a': [1]}", opener_same_line=True) + "\n"
+        assert err == ""
+
+    def test_client_with_server(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("beautipy.server.request", return_value="formatted") as request:
+            code = main(["--client", "--socket", str(tmp_path / "s.sock"), "[1]"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == "formatted\n"
+        assert request.call_args.kwargs["path"] == str(tmp_path / "s.sock")
+        assert request.call_args.kwargs["indent"] == "    "
+
+    def test_client_without_unix_sockets(
+        self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+        with patch("beautipy.server.request") as request:
+            code = main(["--client", "[1]"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == beautify("[1]") + "\n"
+        request.assert_not_called()
+
+    def test_client_bug_is_not_hidden(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("beautipy.server.request", side_effect=AttributeError("oops")):
+            code = main(["--client", "[1]"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert out == ""
+        assert "oops" in err
+
+    def test_serve_stdio(self) -> None:
+        request = b"".join(struct.pack(">I", len(part)) + part for part in (b"{}", b"[1, 2]"))
+        stdout = TextIOWrapper(BytesIO())
+        with patch("sys.stdin", TextIOWrapper(BytesIO(request))), patch("sys.stdout", stdout):
+            code = main(["--serve", "--socket", "-", "-i", "\t"])
+        assert code == EXIT_OK
+        expected = beautify("[1, 2]", indent="\t").encode()
+        assert stdout.buffer.getvalue() == b"\0\0\0\x02ok" + struct.pack(">I", len(expected)) + expected
+
+    @pytest.mark.parametrize(
+        "args, message",
+        [
+            (["--serve", "--client"], "--serve cannot be used with --client"),
+            (["--serve", "--lines"], "--serve cannot be used with --lines"),
+            (["--client", "--stats"], "--client cannot be used with --lines"),
+            (["--serve", "[1]"], "--serve does not take input"),
+            (["--client", "--socket", "-"], "--client needs a socket path"),
+            (["--client", "--timeout", "0"], "--timeout must be greater than 0"),
+        ],
+    )
+    def test_invalid(self, args: list, message: str, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(args)
+        _, err = capsys.readouterr()
+        assert code != EXIT_OK
+        assert message in err
+
+    def test_client_timeout(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        path = str(tmp_path / "stalled.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+            # Accepts connections into the backlog, but never answers.
+            stalled.bind(path)
+            stalled.listen()
+            code = main(["--client", "--socket", path, "--timeout", "0.05", "[1]"])
+        out, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert out == ""
+        assert "timed out" in err
+
+    def test_serve_invalid_max_concurrent(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with patch("sys.stdin", TextIOWrapper(BytesIO())):
+            code = main(["--serve", "--socket", "-", "--max-concurrent", "0"])
+        _, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert "max_concurrent" in err
+
+
+class TestFollow:
+    """Tests for the --follow mode of main()."""
+
+    def test_follow(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        path = str(tmp_path / "app.log")
+        with patch("beautipy.follow.follow_file", return_value=iter(["a", "b"])) as follow_file:
+            code = main(["--follow", path, "--lines", "-s"])
+        out, _ = capsys.readouterr()
+        assert code == EXIT_OK
+        assert out == "ab"
+        assert follow_file.call_args.args == (path,)
+        assert follow_file.call_args.kwargs["lines"] is True
+        assert follow_file.call_args.kwargs["opener_same_line"] is True
+
+    def test_missing_file(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--follow", str(tmp_path / "missing.log")])
+        _, err = capsys.readouterr()
+        assert code == EXIT_ERROR
+        assert "No such file" in err
+
+    @pytest.mark.parametrize(
+        "args, message",
+        [
+            (["[1]"], "--follow does not take other input"),
+            (["--stats"], "--follow cannot be used with --stats"),
+            (["--jobs", "2"], "--follow cannot be used with --jobs"),
+        ],
+    )
+    def test_invalid(self, args: list, message: str, capsys: pytest.CaptureFixture[str]) -> None:
+        code = main(["--follow", "app.log", *args])
+        _, err = capsys.readouterr()
+        assert code != EXIT_OK
+        assert message in err
@@ -1,8 +1,10 @@
 """Pytest tests for beautipy.core."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from beautipy import beautify
+from beautipy import Formatter, Style, beautify, beautify_iter
 
 
 def test_dict_basic() -> None:
@@ -129,3 +131,153 @@ def test_empty_indent() -> None:
     result = beautify({"a": 1}, indent="")
     assert "'a'" in result
     assert "1" in result
+
+
+def test_beautify_iter_matches_beautify() -> None:
+    data = {"a": [1, 2, {"b": ()}], "c": "x, y"}
+    chunks = list(beautify_iter(data, blank_line_depth=1, expand_empty=True))
+    assert "".join(chunks) == beautify(data, blank_line_depth=1, expand_empty=True)
+
+
+def test_beautify_iter_yields_multiple_chunks() -> None:
+    data = list(range(50000))
+    chunks = list(beautify_iter(data))
+    assert len(chunks) > 1
+    assert "".join(chunks) == beautify(data)
+
+
+def test_beautify_iter_empty_input() -> None:
+    assert list(beautify_iter("")) == []
+
+
+def test_beautify_iter_raises_eagerly() -> None:
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        beautify_iter({}, blank_line_depth=-1)
+
+
+def _feed_all(formatter: Formatter, chunks: list) -> str:
+    out = [formatter.feed(chunk) for chunk in chunks]
+    out.append(formatter.close())
+    return "".join(out)
+
+
+def test_formatter_single_chunk_matches_beautify() -> None:
+    text = 'User(id:123,name:"John",roles:{},tags:[ ])'
+    assert _feed_all(Formatter(), [text]) == beautify(text)
+
+
+@pytest.mark.parametrize("expand_empty", [False, True])
+def test_formatter_any_split_matches_beautify(expand_empty: bool) -> None:
+    text = "items:[1,{ },'a\\'b,c', ( \n ) ],meta:{k=v}"
+    expected = beautify(text, expand_empty=expand_empty, blank_line_depth=1)
+    for i in range(len(text) + 1):
+        for j in range(i, len(text) + 1):
+            formatter = Formatter(expand_empty=expand_empty, blank_line_depth=1)
+            chunks = [text[:i], text[i:j], text[j:]]
+            assert _feed_all(formatter, chunks) == expected
+
+
+def test_formatter_character_by_character() -> None:
+    text = str({"a": [1, 2, {"b": ()}], "c": "x, {y}"})
+    assert _feed_all(Formatter(), list(text)) == beautify(text)
+
+
+def test_formatter_holds_back_pending_opener() -> None:
+    formatter = Formatter()
+    assert formatter.feed("[") == ""
+    assert formatter.feed("  ") == ""
+    assert formatter.feed("]") == "[]"
+
+
+def test_formatter_close_flushes_pending_opener() -> None:
+    formatter = Formatter()
+    assert formatter.feed("x[") == "x"
+    assert formatter.close() == beautify("x[")[1:]
+
+
+def test_formatter_feed_after_close_raises() -> None:
+    formatter = Formatter()
+    formatter.close()
+    with pytest.raises(ValueError, match="close"):
+        formatter.feed("{}")
+
+
+def test_formatter_raises_on_negative_blank_line_depth() -> None:
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        Formatter(blank_line_depth=-1)
+
+
+def test_empty_structure_across_whitespace_run() -> None:
+    text = "[" + " \n" * 1000 + "]"
+    assert beautify(text) == "[]"
+    assert beautify("x" + text, expand_empty=True) == "x\n[\n]"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"blank_line_depth": 2, "indent": "\t", "expand_empty": True},
+        {"indent": ""},
+        {"max_items_per_container": 1},
+        {"max_indent_width": 6, "blank_line_depth": 3},
+    ],
+)
+def test_style_matches_beautify(options: dict) -> None:
+    style = Style(**options)
+    for obj in ["{a:[1,2],b:()}", [1, [2, [3, [4, [5]]]]], {"k": ("v", {})}, "[" * 40 + "]" * 40, list(range(300)), 1.5]:
+        assert style.format(obj) == beautify(obj, **options)
+        assert "".join(style.format_iter(obj)) == beautify(obj, **options)
+        formatter = style.formatter()
+        assert formatter.feed(str(obj)) + formatter.close() == beautify(obj, **options)
+
+
+def test_style_options() -> None:
+    style = Style(indent="  ", max_depth=3)
+    assert style.options == {
+        "blank_line_depth": 0,
+        "opener_same_line": False,
+        "compact_operators": False,
+        "expand_empty": False,
+        "indent": "  ",
+        "max_indent_width": None,
+        "max_depth": 3,
+        "max_items_per_container": None,
+        "max_string_length": None,
+    }
+    assert beautify([[[[1]]]], **style.options) == style.format([[[[1]]]])
+    assert repr(style).startswith("Style(blank_line_depth=0, ")
+
+
+def test_style_validates_options() -> None:
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        Style(blank_line_depth=-1)
+    with pytest.raises(ValueError, match="max_string_length"):
+        Style(max_string_length=-1)
+    with pytest.raises(ValueError, match="max_indent_width"):
+        Style(max_indent_width=-1)
+    with pytest.raises(AttributeError):
+        Style().indent = "  "  # type: ignore[attr-defined]
+
+
+def test_style_shared_between_threads() -> None:
+    style = Style(blank_line_depth=3)
+    inputs = ["[" * depth + "1, 2" + "]" * depth for depth in range(200)]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(style.format, inputs))
+    assert results == [beautify(text, blank_line_depth=3) for text in inputs]
+
+
+def test_max_indent_width() -> None:
+    result = beautify([[{"a": [1, {}]}]], indent="  ", max_indent_width=4)
+    assert result == (
+        "[\n  [\n    {\n|3|  'a': \n|3|  [\n|4|  1,\n|4|  {}\n|3|  ]\n    }\n  ]\n]"
+    )
+    assert beautify([[1]], max_indent_width=0) == "[\n|1|    [\n|2|    1\n|1|    ]\n]"
+    assert beautify([[[1]]], indent="", max_indent_width=0) == beautify([[[1]]], indent="")
+
+
+def test_max_indent_width_with_blank_lines() -> None:
+    # Blank lines stay empty instead of holding a depth marker.
+    result = beautify([[1, [2]]], indent="  ", max_indent_width=0, blank_line_depth=3)
+    assert result == "[\n\n|1|  [\n\n|2|  1,\n\n|2|  [\n|3|  2\n|2|  ]\n\n|1|  ]\n\n]"
@@ -0,0 +1,122 @@
+"""Differential tests: beautipy engines against the reference formatter."""
+
+import random
+import re
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from beautipy import Formatter, Style, beautify
+
+from .reference import reference_beautify
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+# Characters that exercise every branch of the scanner, including Unicode
+# whitespace and escapes inside and outside string literals.
+ALPHABET = list("{}[](),=:'\"\\ \n\tab1") + [
+    "  ", "xy", "\x1c", "\xa0", "\u2028", "\x85", "\u00e9",
+]
+INDENTS = ["    ", "", " ", "\t", "\n", "ab", "|   "]
+
+
+def random_options(rng: random.Random) -> dict:
+    return {
+        "blank_line_depth": rng.randint(0, 3),
+        "opener_same_line": rng.random() < 0.5,
+        "compact_operators": rng.random() < 0.5,
+        "expand_empty": rng.random() < 0.5,
+        "indent": rng.choice(INDENTS),
+    }
+
+
+def random_cases(seed: int, count: int) -> Iterator[tuple]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+        yield text, random_options(rng), rng
+
+
+def corpus() -> list:
+    data = {
+        "id": 7,
+        "name": "user 7",
+        "tags": ["a", "b,c", ""],
+        "meta": {"active": True, "roles": [], "note": None, "ratio": 0.5},
+        "path": "C:\\temp\\x",
+        "quote": "it's \"quoted\"",
+    }
+    return [
+        str(data),
+        repr([data] * 3),
+        (EXAMPLES / "json" / "input.json").read_text(encoding="utf-8"),
+        (EXAMPLES / "txt" / "input.txt").read_text(encoding="utf-8"),
+        "Error: {code:500,msg:\"Not found\"} at (x = 1 , y = [ ] )",
+    ]
+
+
+@pytest.mark.parametrize("text", corpus())
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"blank_line_depth": 2, "expand_empty": True},
+        {"opener_same_line": True, "compact_operators": True, "indent": "\t"},
+        {"indent": ""},
+    ],
+)
+def test_corpus_matches_reference(text: str, options: dict) -> None:
+    assert beautify(text, **options) == reference_beautify(text, **options)
+
+
+def test_random_input_matches_reference() -> None:
+    for text, options, _ in random_cases(seed=0, count=3000):
+        assert beautify(text, **options) == reference_beautify(text, **options), (
+            text,
+            options,
+        )
+
+
+def test_random_split_input_matches_reference() -> None:
+    for text, options, rng in random_cases(seed=1, count=3000):
+        formatter = Formatter(**options)
+        output = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(0, 6)
+            output.append(formatter.feed(text[pos:pos + size]))
+            pos += size
+        output.append(formatter.close())
+        assert "".join(output) == reference_beautify(text, **options), (
+            text,
+            options,
+        )
+
+
+def expand_depth_markers(output: str, indent: str) -> str:
+    return re.sub(r"\n\|(\d+)\|" + re.escape(indent), lambda match: "\n" + int(match[1]) * indent, output)
+
+
+def empty_blank_lines(output: str, indent: str) -> str:
+    # Blank lines at marked depths are left empty.
+    return re.sub(r"\n(?:" + re.escape(indent) + r")+(?=\n)", "\n", output)
+
+
+def test_depth_markers_replace_indentation() -> None:
+    for text, options, rng in random_cases(seed=2, count=3000):
+        style = Style(max_indent_width=rng.randint(0, 9), **options)
+        formatter = style.formatter()
+        output = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(0, 6)
+            output.append(formatter.feed(text[pos:pos + size]))
+            pos += size
+        output.append(formatter.close())
+        expected = reference_beautify(text, **options)
+        indent = options["indent"]
+        assert empty_blank_lines(expand_depth_markers("".join(output), indent), indent) == empty_blank_lines(
+            expected, indent
+        ), (text, options)
+        assert style.format(text) == "".join(output)
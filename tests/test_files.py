@@ -0,0 +1,76 @@
+"""Pytest tests for beautipy.files."""
+
+import mmap
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+import beautipy.files
+from beautipy import beautify, beautify_file
+
+TEXT = str([{"name": "café ☃", "tags": ["a", "bé"], "empty": {}} for _ in range(1000)])
+
+
+@pytest.fixture
+def dump(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A file spanning several windows, with characters split between them."""
+    monkeypatch.setattr(beautipy.files, "_WINDOW_SIZE", mmap.PAGESIZE)
+    path = tmp_path / "dump.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    data = TEXT.encode("utf-8")
+    # Some window starts in the middle of a character.
+    assert any(byte & 0xC0 == 0x80 for byte in data[mmap.PAGESIZE::mmap.PAGESIZE])
+    return path
+
+
+def test_returns_output(dump: Path) -> None:
+    assert beautify_file(dump, indent="  ") == beautify(TEXT, indent="  ")
+
+
+def test_writes_to_path(dump: Path, tmp_path: Path) -> None:
+    out = tmp_path / "out.txt"
+    assert beautify_file(dump, out, expand_empty=True) is None
+    assert out.read_text(encoding="utf-8") == beautify(TEXT, expand_empty=True)
+
+
+def test_writes_to_stream(dump: Path) -> None:
+    out = StringIO()
+    beautify_file(str(dump), out, workers=2, opener_same_line=True)
+    assert out.getvalue() == beautify(TEXT, opener_same_line=True)
+
+
+def test_empty_file(tmp_path: Path) -> None:
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    assert beautify_file(path) == ""
+
+
+def test_translates_line_endings(tmp_path: Path) -> None:
+    path = tmp_path / "crlf.txt"
+    path.write_bytes(b"{'a': 'x\r\ny', 'b': [1,\r\n2]}\r\n")
+    assert beautify_file(path) == beautify("{'a': 'x\ny', 'b': [1,\n2]}\n")
+
+
+def test_encoding(tmp_path: Path) -> None:
+    path = tmp_path / "latin1.txt"
+    path.write_bytes("['é']".encode("latin-1"))
+    assert beautify_file(path, encoding="latin-1") == beautify("['é']")
+    with pytest.raises(UnicodeDecodeError):
+        beautify_file(path)
+
+
+def test_invalid_option_leaves_output_untouched(dump: Path, tmp_path: Path) -> None:
+    out = tmp_path / "out.txt"
+    out.write_text("keep")
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        beautify_file(dump, out, blank_line_depth=-1)
+    assert out.read_text() == "keep"
+
+
+def test_rejects_input_as_output(dump: Path) -> None:
+    with pytest.raises(ValueError, match="out"):
+        beautify_file(dump, dump)
+    with pytest.raises(ValueError, match="out"):
+        beautify_file(dump, str(dump.parent / "." / dump.name))
+    assert dump.read_text(encoding="utf-8") == TEXT
@@ -0,0 +1,90 @@
+"""Pytest tests for beautipy.follow."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+import beautipy.follow
+from beautipy import beautify
+from beautipy.follow import follow_file
+
+
+def append(path: Path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def test_follows_appended_text(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_text("{'a': [1, ", encoding="utf-8")
+    output = follow_file(path, poll_interval=0.01, indent="  ")
+    first = next(output)
+    append(path, "2], 'b': 'x\ny'}")
+    second = next(output)
+    assert first + second == beautify("{'a': [1, 2], 'b': 'x\ny'}", indent="  ")
+    output.close()
+
+
+def test_lines(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_text('{"id": 1}\r\n{"id": ', encoding="utf-8")
+    output = follow_file(path, lines=True, poll_interval=0.01)
+    assert next(output) == beautify('{"id": 1}') + "\n"
+    append(path, '2}\n\n[3]\n')
+    assert next(output) == beautify('{"id": 2}') + "\n\n" + beautify("[3]") + "\n"
+    output.close()
+
+
+def test_lines_across_reads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(beautipy.follow, "_READ_SIZE", 5)
+    records = ['{"id": 1, "tags": ["a", "b"], "note": "%s"}' % ("x" * 40), "[2, 3]", "", "{}"]
+    path = tmp_path / "app.log"
+    path.write_text("\n".join(records) + "\n", encoding="utf-8")
+    output = follow_file(path, lines=True, poll_interval=0.01)
+    expected = "".join(beautify(record) + "\n" for record in records)
+    text = ""
+    while len(text) < len(expected):
+        text += next(output)
+    assert text == expected
+    output.close()
+
+
+def test_truncation(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_text("[1, 2, 3, 4, [", encoding="utf-8")
+    output = follow_file(path, poll_interval=0.01)
+    assert next(output) == beautify("[1, 2, 3, 4, ")
+    path.write_text("{x: 1}", encoding="utf-8")
+    # The pending opening bracket is written when the old contents end.
+    assert next(output) == beautify("[1, 2, 3, 4, [")[len(beautify("[1, 2, 3, 4, ")):] + "\n"
+    assert next(output) == beautify("{x: 1}")
+    output.close()
+
+
+def test_rotation(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_text('{"id": 1}\n', encoding="utf-8")
+    output = follow_file(path, lines=True, poll_interval=0.01)
+    assert next(output) == beautify('{"id": 1}') + "\n"
+    append(path, '{"id": 2}')
+    os.replace(path, tmp_path / "app.log.1")
+    (tmp_path / "app.log.new").write_text("[3]\n", encoding="utf-8")
+    os.replace(tmp_path / "app.log.new", path)
+    # What was written before the rotation is not lost.
+    assert next(output) == beautify('{"id": 2}') + "\n"
+    assert next(output) == beautify("[3]") + "\n"
+    output.close()
+
+
+def test_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        follow_file(tmp_path / "missing.log")
+
+
+@pytest.mark.parametrize("kwargs, message", [({"poll_interval": 0}, "poll_interval"), ({"max_depth": -1}, "max_depth")])
+def test_invalid_arguments(tmp_path: Path, kwargs: dict, message: str) -> None:
+    path = tmp_path / "app.log"
+    path.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        follow_file(path, **kwargs)
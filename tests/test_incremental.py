@@ -0,0 +1,97 @@
+"""Pytest tests for beautipy.incremental."""
+
+import random
+
+import pytest
+
+from beautipy import Document, beautify
+
+DATA = str([{"id": i, "name": f"item {i}", "tags": ["a", "b"], "nested": {"x": (i, {})}} for i in range(300)])
+
+
+def apply(output: str, change: tuple) -> str:
+    start, end, text = change
+    return output[:start] + text + output[end:]
+
+
+@pytest.mark.parametrize("text", ["", "[1, 2", DATA])
+def test_initial_output(text: str) -> None:
+    doc = Document(text, checkpoint_interval=100, opener_same_line=True)
+    assert doc.text == text
+    assert doc.output == beautify(text, opener_same_line=True)
+
+
+def test_append() -> None:
+    doc = Document(checkpoint_interval=50)
+    output = ""
+    for start in range(0, len(DATA), 37):
+        output = apply(output, doc.append(DATA[start:start + 37]))
+        assert output == doc.output == beautify(DATA[:start + 37])
+
+
+def test_append_formats_only_appended_text() -> None:
+    doc = Document(DATA, checkpoint_interval=100)
+    old = doc._segments[:-1]
+    change = doc.append(", {}]")
+    assert doc._segments[:len(old)] == old
+    assert change.start == len(beautify(DATA))
+
+
+def test_edit_inside_string() -> None:
+    doc = Document(DATA, checkpoint_interval=100)
+    pos = DATA.index("item 150")
+    output = doc.output
+    change = doc.edit(pos, pos + 4, "entry")
+    assert apply(output, change) == doc.output == beautify(DATA[:pos] + "entry" + DATA[pos + 4:])
+    assert change.text == "entry"
+    # Only the segment with the edit was formatted again.
+    assert doc._segments[-1][0] == DATA[-len(doc._segments[-1][0]):]
+
+
+def test_edit_changing_the_rest() -> None:
+    doc = Document(DATA, checkpoint_interval=100)
+    pos = DATA.index("[", 10)
+    output = doc.output
+    change = doc.edit(pos, pos + 1, "")
+    assert apply(output, change) == doc.output == beautify(DATA[:pos] + DATA[pos + 1:])
+    # The rest of the input is indented one level less.
+    assert len(change.text) > len(output) // 2
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits(seed: int) -> None:
+    rnd = random.Random(seed)
+    alphabet = "{}[](),:= \"'\\ab1\n"
+    options = rnd.choice([{}, {"opener_same_line": True}, {"expand_empty": True, "compact_operators": True}])
+    text = "".join(rnd.choice(alphabet) for _ in range(200))
+    doc = Document(text, checkpoint_interval=rnd.randrange(1, 40), **options)
+    for _ in range(50):
+        output = doc.output
+        start = rnd.randrange(len(text) + 1)
+        end = rnd.randrange(start, min(len(text), start + 20) + 1)
+        new = "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(10)))
+        change = doc.edit(start, end, new)
+        text = text[:start] + new + text[end:]
+        assert doc.text == text
+        assert doc.output == apply(output, change) == beautify(text, **options)
+
+
+def test_delete_everything() -> None:
+    doc = Document(DATA, checkpoint_interval=100)
+    doc.edit(0, len(DATA), "")
+    assert doc.output == ""
+    doc.append("[1]")
+    assert doc.output == beautify("[1]")
+
+
+@pytest.mark.parametrize("start, end", [(-1, 0), (2, 1), (0, 4)])
+def test_invalid_range(start: int, end: int) -> None:
+    with pytest.raises(ValueError, match="edit range"):
+        Document("[1]").edit(start, end, "")
+
+
+def test_invalid_options() -> None:
+    with pytest.raises(ValueError, match="checkpoint_interval"):
+        Document(checkpoint_interval=0)
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        Document(blank_line_depth=-1)
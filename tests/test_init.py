@@ -0,0 +1,37 @@
+"""Pytest tests for the lazily loaded attributes of beautipy."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import beautipy
+
+
+@pytest.mark.parametrize("name", beautipy.__all__)
+def test_exports(name: str) -> None:
+    assert getattr(beautipy, name) is not None
+    assert name in dir(beautipy)
+
+
+def test_version() -> None:
+    assert isinstance(beautipy.__version__, str)
+
+
+def test_unknown_attribute() -> None:
+    with pytest.raises(AttributeError, match="no_such_name"):
+        beautipy.no_such_name  # type: ignore[attr-defined]
+
+
+def test_cli_import_is_light() -> None:
+    """Importing the CLI does not load what only some modes need."""
+    code = (
+        "import sys, beautipy.cli; "
+        "print(sorted(m for m in ('asyncio', 'concurrent.futures', 'importlib.metadata', 'multiprocessing') "
+        "if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=str(Path(beautipy.__file__).parent.parent))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,245 @@
+"""Pytest tests for the max_depth, max_items_per_container and max_string_length limits."""
+
+import random
+from typing import Optional
+
+import pytest
+
+import beautipy.walker
+from beautipy import Formatter, beautify
+
+from .reference import reference_beautify
+from .test_differential import random_options
+
+
+def reference_elide(
+    text: str,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+) -> str:
+    """Apply the limits one character at a time.
+
+    Markers are written with `_` instead of a space, so that formatting the
+    result with `reference_beautify()` keeps them intact.
+    """
+    out = []
+    depth = 0
+    commas = []
+    skip = None
+    skip_depth = False
+    skipped = 0
+    content = False
+
+    def end_skip() -> None:
+        if skip_depth:
+            if content:
+                out.append("...")
+        elif skipped + content:
+            count = skipped + content
+            out.append(f"<+{count}_item{'' if count == 1 else 's'}>")
+
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in "'\"":
+            j = i + 1
+            escape = False
+            while j < len(text) and (escape or text[j] != char):
+                escape = not escape and text[j] == "\\"
+                j += 1
+            body = text[i + 1:j]
+            closing = char if j < len(text) else ""
+            if skip is not None:
+                content = True
+            elif max_string is not None and len(body) > max_string:
+                kept = max_string
+                pos = 0
+                while pos < len(body):
+                    if body[pos] == "\\" and pos == kept - 1:
+                        kept -= 1
+                    pos += 2 if body[pos] == "\\" else 1
+                count = len(body) - kept
+                out.append(f"{char}{body[:kept]}{closing}<+{count}_char{'' if count == 1 else 's'}>")
+            else:
+                out.append(text[i:j + 1])
+            i = j + 1
+            continue
+        i += 1
+
+        if skip is not None:
+            if char in "{[(":
+                depth += 1
+                content = True
+            elif char in "}])":
+                if depth == skip:
+                    end_skip()
+                    skip = None
+                    out.append(char)
+                    if not skip_depth:
+                        commas.pop()
+                depth -= 1
+            elif char == "," and depth == skip and not skip_depth:
+                skipped += 1
+                content = False
+            elif not char.isspace() and (skip_depth or depth == skip):
+                content = True
+            continue
+
+        out.append(char)
+        if char in "{[(":
+            depth += 1
+            if max_depth is not None and depth > max_depth:
+                skip, skip_depth, skipped, content = depth, True, 0, False
+            elif max_items is not None:
+                commas.append(0)
+                if max_items == 0:
+                    skip, skip_depth, skipped, content = depth, False, 0, False
+        elif char in "}])":
+            if depth:
+                depth -= 1
+                if commas:
+                    commas.pop()
+        elif char == "," and commas:
+            commas[-1] += 1
+            if commas[-1] == max_items:
+                skip, skip_depth, skipped, content = depth, False, 0, False
+
+    if skip is not None:
+        end_skip()
+    return "".join(out)
+
+
+def limited(text: str) -> str:
+    """Return `text` with the markers written as `reference_elide()` does."""
+    for noun in ("items>", "item>", "chars>", "char>"):
+        text = text.replace(" " + noun, "_" + noun)
+    return text
+
+
+ALPHABET = list("{}[](),:'\"\\ ab1") + ["  ", "xy", "\xa0", "'abcdef'", '"a,b\\"c"']
+
+
+def random_limits(rng: random.Random) -> dict:
+    return {
+        "max_depth": rng.choice([None, 0, 1, 2, 3]),
+        "max_items_per_container": rng.choice([None, 0, 1, 2, 3]),
+        "max_string_length": rng.choice([None, 0, 1, 2, 5]),
+    }
+
+
+def test_max_depth() -> None:
+    data = {"a": {"b": {"c": 1}}, "d": []}
+    assert beautify(data, max_depth=2, opener_same_line=True) == (
+        "{\n"
+        "    'a': {\n"
+        "        'b': {\n"
+        "            ...\n"
+        "        }\n"
+        "    },\n"
+        "    'd': []\n"
+        "}"
+    )
+
+
+def test_max_depth_zero() -> None:
+    assert beautify([1, [2]], max_depth=0) == "[\n    ...\n]"
+
+
+def test_max_items_per_container() -> None:
+    assert beautify(list(range(1000)), max_items_per_container=2) == (
+        "[\n    0,\n    1,\n    <+998 items>\n]"
+    )
+
+
+def test_max_items_counts_dict_entries() -> None:
+    assert beautify({"a": 1, "b": 2, "c": 3}, max_items_per_container=1) == (
+        "{\n    'a': 1,\n    <+2 items>\n}"
+    )
+
+
+def test_max_items_in_text() -> None:
+    text = "Error: {code:500, msg:'x', at:[1, 2, 3]}"
+    assert beautify(text, max_items_per_container=1, compact_operators=True) == (
+        "Error:\n{\n    code:500,\n    <+2 items>\n}"
+    )
+
+
+def test_max_string_length() -> None:
+    assert beautify(["abcdefgh", "abc"], max_string_length=3) == (
+        "[\n    'abc'<+5 chars>,\n    'abc'\n]"
+    )
+
+
+def test_max_string_length_keeps_escapes_whole() -> None:
+    assert beautify(r"'ab\ncd'", max_string_length=3) == r"'ab'<+4 chars>"
+
+
+def test_max_string_length_singular_marker() -> None:
+    assert beautify("'abcd'", max_string_length=3) == "'abc'<+1 char>"
+
+
+@pytest.mark.parametrize("name", ["max_depth", "max_items_per_container", "max_string_length"])
+def test_negative_limit_raises(name: str) -> None:
+    with pytest.raises(ValueError, match=name):
+        beautify([1], **{name: -1})
+
+
+def test_elided_items_are_not_converted() -> None:
+    class Explodes:
+        def __repr__(self) -> str:
+            raise AssertionError("repr() called on an elided item")
+
+    data = {"keep": [1, 2], "deep": [[Explodes()]], "wide": [0] + [Explodes()] * 1000}
+    assert beautify(data, max_depth=2, max_items_per_container=1) == (
+        "{\n"
+        "    'keep': \n"
+        "    [\n"
+        "        1,\n"
+        "        <+1 item>\n"
+        "    ],\n"
+        "    <+2 items>\n"
+        "}"
+    )
+
+
+@pytest.mark.parametrize("small_items", [-1, 256])
+def test_walked_containers_match_text(monkeypatch: pytest.MonkeyPatch, small_items: int) -> None:
+    monkeypatch.setattr(beautipy.walker, "_SMALL_ITEMS", small_items)
+    rng = random.Random(2)
+    data = {
+        "rows": [{"id": i, "name": f"user {i}", "tags": ("x", "y" * i)} for i in range(300)],
+        "flat": list(range(2000)),
+        "sets": [frozenset({1}), {2, 3}, (4,), [], {}],
+    }
+    for _ in range(100):
+        limits = random_limits(rng)
+        assert beautify(data, **limits) == beautify(str(data), **limits), limits
+
+
+def test_random_input_matches_reference() -> None:
+    rng = random.Random(3)
+    for _ in range(3000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+        options = random_options(rng)
+        limits = random_limits(rng)
+        expected = reference_beautify(
+            reference_elide(
+                text,
+                limits["max_depth"],
+                limits["max_items_per_container"],
+                limits["max_string_length"],
+            ),
+            **options,
+        )
+        assert limited(beautify(text, **options, **limits)) == expected, (text, options, limits)
+
+        formatter = Formatter(**options, **limits)
+        output = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(1, 6)
+            output.append(formatter.feed(text[pos:pos + size]))
+            pos += size
+        output.append(formatter.close())
+        assert limited("".join(output)) == expected, (text, options, limits)
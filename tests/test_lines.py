@@ -0,0 +1,67 @@
+"""Pytest tests for beautipy.lines."""
+
+from io import StringIO
+
+import pytest
+
+from beautipy import beautify, beautify_lines
+
+RECORDS = [
+    '{"id": 1, "msg": "a, b", "tags": ["x"]}',
+    '{"id": 2, "broken": [1, 2',
+    "",
+    "ERROR request={path: '/x', code: 500}",
+    '{"id": 3, "text": "line \\"quoted\\""}',
+]
+TEXT = "\n".join(RECORDS) + "\n"
+
+
+def test_formats_each_line_on_its_own() -> None:
+    assert list(beautify_lines(TEXT, indent="  ")) == [beautify(record, indent="  ") for record in RECORDS]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 17, 1000])
+def test_pieces(size: int) -> None:
+    pieces = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+    assert list(beautify_lines(pieces)) == [beautify(record) for record in RECORDS]
+
+
+def test_file_object() -> None:
+    assert list(beautify_lines(StringIO(TEXT))) == [beautify(record) for record in RECORDS]
+
+
+@pytest.mark.parametrize(
+    "text, count",
+    [("", 0), ("\n", 1), ("a", 1), ("a\n", 1), ("a\n\n", 2), ("\na", 2)],
+)
+def test_line_count(text: str, count: int) -> None:
+    assert len(list(beautify_lines(text))) == count
+
+
+def test_lazy() -> None:
+    """A record is yielded as soon as its line is complete."""
+    read = []
+
+    def pieces():
+        for record in RECORDS:
+            read.append(record)
+            yield record + "\n"
+
+    records = beautify_lines(pieces())
+    assert next(records) == beautify(RECORDS[0])
+    assert len(read) == 1
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 64])
+def test_workers(chunksize: int) -> None:
+    records = list(beautify_lines(TEXT * 20, workers=2, chunksize=chunksize, compact_operators=True))
+    assert records == [beautify(record, compact_operators=True) for record in RECORDS] * 20
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [({"workers": 0}, "workers"), ({"chunksize": 0}, "chunksize"), ({"max_depth": -1}, "max_depth")],
+)
+def test_invalid_arguments(kwargs: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        beautify_lines(TEXT, **kwargs)
@@ -0,0 +1,115 @@
+"""Pytest tests for beautipy.parallel."""
+
+import random
+from itertools import count, islice
+
+import pytest
+
+from beautipy import beautify, beautify_many, beautify_parallel
+from beautipy.parallel import _format_segment, _Splitter, iter_parallel
+
+from .test_differential import random_options
+from .test_limits import ALPHABET
+
+
+def records() -> list:
+    return [{"id": i, "tags": ["a", "b"][: i % 3], "note": f"item {i}"} for i in range(300)] + [
+        "Error: {code:500}",
+        42,
+        "",
+        [],
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_beautify(workers: int) -> None:
+    data = records()
+    expected = [beautify(obj, indent="  ", max_items_per_container=2) for obj in data]
+    result = beautify_many(data, workers=workers, chunksize=16, indent="  ", max_items_per_container=2)
+    assert list(result) == expected
+
+
+def test_unordered_yields_every_result() -> None:
+    data = records()
+    result = beautify_many(data, workers=2, chunksize=16, ordered=False)
+    assert sorted(result) == sorted(beautify(obj) for obj in data)
+
+
+def test_single_batch_is_formatted_in_process() -> None:
+    class Local:
+        """Cannot be pickled, so this only works without worker processes."""
+
+        def __repr__(self) -> str:
+            return "Local(x=1)"
+
+    assert list(beautify_many([Local(), [1]], workers=4)) == [
+        beautify("Local(x=1)"),
+        beautify([1]),
+    ]
+
+
+def test_reads_input_lazily() -> None:
+    result = beautify_many(([i] for i in count()), workers=1, chunksize=4)
+    assert list(islice(result, 3)) == [beautify([0]), beautify([1]), beautify([2])]
+
+
+def test_empty_input() -> None:
+    assert list(beautify_many([], workers=2)) == []
+
+
+def test_invalid_options_raise_eagerly() -> None:
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        beautify_many([], blank_line_depth=-1)
+    with pytest.raises(TypeError):
+        beautify_many([], colour=True)
+
+
+@pytest.mark.parametrize("name", ["workers", "chunksize"])
+def test_invalid_pool_settings_raise(name: str) -> None:
+    with pytest.raises(ValueError, match=name):
+        beautify_many([], **{name: 0})
+
+
+def test_parallel_matches_beautify() -> None:
+    data = records() + [{"deep": [[[{"x": "a, (b"}]]], "empty": ([], {})}] * 50
+    options = {"indent": "\t", "blank_line_depth": 2, "expand_empty": True}
+    chunks = list(beautify_parallel(data, workers=2, segment_size=500, **options))
+    assert len(chunks) > 1
+    assert "".join(chunks) == beautify(data, **options)
+
+
+def test_parallel_reads_pieces_lazily() -> None:
+    text = str(list(range(1000)))
+    pieces = (text[i:i + 100] for i in range(0, len(text), 100))
+    result = iter_parallel(pieces, workers=2, segment_size=300, compact_operators=True)
+    assert "".join(result) == beautify(text, compact_operators=True)
+
+
+def test_parallel_with_limits_is_sequential() -> None:
+    data = [{"id": i, "name": "x" * i} for i in range(100)]
+    options = {"max_items_per_container": 5, "max_string_length": 3}
+    result = beautify_parallel(data, workers=2, segment_size=50, **options)
+    assert "".join(result) == beautify(data, **options)
+
+
+def test_segments_match_beautify() -> None:
+    rng = random.Random(4)
+    for _ in range(2000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+        options = random_options(rng)
+        splitter = _Splitter(rng.randint(1, 10))
+        segments = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(1, 15)
+            segments.extend(splitter.feed(text[pos:pos + size]))
+            pos += size
+        output = [_format_segment(*segment, False, options) for segment in segments]
+        output.append(_format_segment(*splitter.close(), True, options))
+        assert "".join(output) == beautify(text, **options), (text, options, segments)
+
+
+@pytest.mark.parametrize("name", ["workers", "segment_size"])
+def test_invalid_parallel_settings_raise(name: str) -> None:
+    with pytest.raises(ValueError, match=name):
+        beautify_parallel("[]", **{name: 0})
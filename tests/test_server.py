@@ -0,0 +1,240 @@
+"""Pytest tests for beautipy.server."""
+
+import os
+import socket
+import struct
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, List, Tuple
+
+import pytest
+
+import beautipy.server
+from beautipy import beautify
+from beautipy.server import _Handler, _make_server, default_socket_path, request, serve_stdio
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def frames(*parts: bytes) -> bytes:
+    return b"".join(struct.pack(">I", len(part)) + part for part in parts)
+
+
+def read_frames(data: bytes) -> List[bytes]:
+    parts = []
+    while data:
+        (length,) = struct.unpack(">I", data[:4])
+        parts.append(data[4:4 + length])
+        data = data[4 + length:]
+    return parts
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[str]:
+    path = str(tmp_path / "beautipy.sock")
+    with _make_server(path, 2, {"indent": "  "}) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            yield path
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_request(server: str) -> None:
+    text = "{'a': [1, 2], 'b': {}}"
+    assert request(text, path=server) == beautify(text, indent="  ")
+    assert request(text, path=server, indent="\t", compact_operators=True) == beautify(
+        text, indent="\t", compact_operators=True
+    )
+
+
+def test_concurrent_clients(server: str) -> None:
+    texts = [str(list(range(n))) for n in range(40)]
+    with ThreadPoolExecutor(8) as executor:
+        outputs = list(executor.map(lambda text: request(text, path=server), texts))
+    assert outputs == [beautify(text, indent="  ") for text in texts]
+
+
+def test_many_requests_on_one_connection(server: str) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server)
+        with sock.makefile("rwb") as stream:
+            stream.write(frames(b"{}", b"[1]", b'{"max_items_per_container": 1}', b"[1, 2]"))
+            stream.flush()
+            sock.shutdown(socket.SHUT_WR)
+            responses = read_frames(stream.read())
+    assert responses == [
+        b"ok",
+        beautify("[1]", indent="  ").encode(),
+        b"ok",
+        beautify("[1, 2]", indent="  ", max_items_per_container=1).encode(),
+    ]
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({"max_depth": -1}, "max_depth"),
+        ({"stats": None}, "unknown option 'stats'"),
+    ],
+)
+def test_request_errors(server: str, options: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        request("[1]", path=server, **options)
+    assert request("[1]", path=server) == beautify("[1]", indent="  ")
+
+
+def test_client_gone_before_response() -> None:
+    connection, client = socket.socketpair()
+    client.sendall(frames(b"{}", b"[1]") * 2)
+    client.close()
+    server = SimpleNamespace(slots=threading.BoundedSemaphore(1), defaults={})
+    with connection:
+        # Returns without raising, so no traceback is printed.
+        _Handler(connection, "", server)  # type: ignore[arg-type]
+
+
+def test_no_server(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        request("[1]", path=str(tmp_path / "missing.sock"))
+
+
+def test_socket_is_private(server: str) -> None:
+    assert Path(server).stat().st_mode & 0o077 == 0
+
+
+def test_already_running(server: str) -> None:
+    with pytest.raises(OSError, match="already listening"):
+        _make_server(server, 1, {})
+
+
+def test_stale_socket_is_replaced(tmp_path: Path) -> None:
+    path = str(tmp_path / "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    with _make_server(path, 1, {}) as server:
+        assert server.path == path
+    assert not Path(path).exists()
+
+
+def test_default_socket_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BEAUTIPY_SOCKET", "/run/custom.sock")
+    assert default_socket_path() == "/run/custom.sock"
+    monkeypatch.delenv("BEAUTIPY_SOCKET")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+    assert default_socket_path() == "/run/user/1000/beautipy.sock"
+
+
+def test_default_socket_path_in_private_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("BEAUTIPY_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    path = Path(default_socket_path())
+    assert path.parent.parent == tmp_path
+    # Only the server creates the directory.
+    with pytest.raises(FileNotFoundError):
+        request("[1]")
+    assert not path.parent.exists()
+    with _make_server(str(path), 1, {}):
+        assert path.parent.stat().st_mode & 0o777 == 0o700
+        path.parent.chmod(0o755)
+        with pytest.raises(PermissionError):
+            request("[1]")
+    with pytest.raises(PermissionError):
+        _make_server(str(path), 1, {})
+
+
+def test_request_timeout(tmp_path: Path) -> None:
+    path = str(tmp_path / "stalled.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.bind(path)
+        stalled.listen()
+        with pytest.raises(TimeoutError):
+            request("[1]", path=path, timeout=0.05)
+
+
+def test_socket_of_another_user(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(os, "getuid", lambda: Path(server).stat().st_uid + 1)
+    with pytest.raises(PermissionError, match="another user"):
+        request("[1]", path=server)
+    with pytest.raises(PermissionError, match="another user"):
+        _make_server(server, 1, {})
+
+
+def stdio(data: bytes, **kwargs: object) -> List[bytes]:
+    output = BytesIO()
+    serve_stdio(BytesIO(data), output, **kwargs)  # type: ignore[arg-type]
+    return read_frames(output.getvalue())
+
+
+def test_stdio() -> None:
+    texts = [str(list(range(n))) for n in range(30)]
+    data = b"".join(frames(b'{"expand_empty": true}', text.encode()) for text in texts)
+    responses = stdio(data + frames(b"[]", b"{}"), max_concurrent=3, opener_same_line=True)
+    expected: List[Tuple[bytes, bytes]] = [
+        (b"ok", beautify(text, opener_same_line=True, expand_empty=True).encode()) for text in texts
+    ]
+    expected.append((b"error", b"options must be a JSON object"))
+    assert responses == [part for pair in expected for part in pair]
+
+
+def test_stdio_truncated() -> None:
+    with pytest.raises(EOFError):
+        stdio(frames(b"{}", b"[1, 2]")[:-2])
+
+
+def test_stdio_responds_before_next_request() -> None:
+    class Stream:
+        """Blocks the next read until the previous response is written."""
+
+        def __init__(self, output: BytesIO) -> None:
+            self.requests = [frames(b"{}", b"[1]"), frames(b"{}", b"[2]")]
+            self.output = output
+
+        def read(self, size: int) -> bytes:
+            if not self.requests:
+                return b""
+            if len(self.requests) == 1:
+                while not self.output.getvalue():
+                    threading.Event().wait(0.01)
+            data, self.requests[0] = self.requests[0][:size], self.requests[0][size:]
+            if not self.requests[0]:
+                self.requests.pop(0)
+            return data
+
+    output = BytesIO()
+    serve_stdio(Stream(output), output)  # type: ignore[arg-type]
+    assert read_frames(output.getvalue()) == [b"ok", beautify("[1]").encode(), b"ok", beautify("[2]").encode()]
+
+
+def test_formatter_failure(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(text: str, **options: object) -> str:
+        if text == "[boom]":
+            raise RuntimeError("boom")
+        return beautify(text, **options)
+
+    monkeypatch.setattr(beautipy.server, "beautify", fail)
+    with pytest.raises(ValueError, match="RuntimeError: boom"):
+        request("[boom]", path=server)
+    assert request("[1]", path=server) == beautify("[1]", indent="  ")
+    data = frames(b"{}", b"[boom]") * 5 + frames(b"{}", b"[1]")
+    responses = stdio(data, max_concurrent=1)
+    assert responses == [b"error", b"RuntimeError: boom"] * 5 + [b"ok", beautify("[1]").encode()]
+
+
+@pytest.mark.parametrize("kwargs, message", [({"max_concurrent": 0}, "max_concurrent"), ({"max_depth": -1}, "max_depth")])
+def test_invalid_arguments(tmp_path: Path, kwargs: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        serve_stdio(BytesIO(), BytesIO(), **kwargs)
+    options = dict(kwargs)
+    max_concurrent = options.pop("max_concurrent", 1)
+    with pytest.raises(ValueError, match=message):
+        _make_server(str(tmp_path / "invalid.sock"), max_concurrent, options)
+    assert not (tmp_path / "invalid.sock").exists()
@@ -0,0 +1,87 @@
+"""Differential tests: the compiled scanner against the Python scanner."""
+
+import random
+from typing import Optional
+
+import pytest
+
+from beautipy import Style, beautify, core, use_engine
+
+from .test_differential import ALPHABET, corpus, random_options
+
+needs_speedups = pytest.mark.skipif(core._compiled_format is None, reason="beautipy._speedups is not built")
+
+# Adds characters outside the Basic Multilingual Plane and other kinds of
+# string storage.
+WIDE_ALPHABET = ALPHABET + ["\U0001f600", "中", "　"]
+
+
+def formatter(style: Style, scan: Optional[object]):
+    result = style.formatter()
+    result._scan = scan
+    return result
+
+
+def assert_same(text: str, options: dict, rng: random.Random, scan: object = None) -> None:
+    style = Style(**options)
+    python = formatter(style, None)
+    compiled = formatter(style, scan or core._compiled_format)
+    pos = 0
+    while pos < len(text):
+        end = pos + rng.randint(0, 8)
+        assert compiled.feed(text[pos:end]) == python.feed(text[pos:end]), (text, options)
+        assert compiled._checkpoint() == python._checkpoint(), (text, options)
+        pos = end
+    assert compiled.close() == python.close(), (text, options)
+
+
+@needs_speedups
+@pytest.mark.parametrize("seed", range(10))
+def test_random_input(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(300):
+        text = "".join(rng.choice(WIDE_ALPHABET) for _ in range(rng.randint(0, 80)))
+        options = random_options(rng)
+        options["max_indent_width"] = rng.choice([None, 0, 5])
+        assert_same(text, options, rng)
+
+
+@needs_speedups
+@pytest.mark.parametrize("text", corpus())
+def test_corpus(text: str) -> None:
+    rng = random.Random(text)
+    for _ in range(5):
+        options = random_options(rng)
+        options["max_indent_width"] = rng.choice([None, 0, 5])
+        assert_same(text, options, rng)
+
+
+@needs_speedups
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"max_depth": 2}, {"max_items_per_container": 1, "max_string_length": 3}],
+)
+def test_objects_and_limits(options: dict) -> None:
+    data = [{"a": [1, (2, 3)], "b": "x, y", "c": {}, "d": {"e": ["it's", None]}}] * 30
+    results = []
+    for engine in ("python", "c"):
+        use_engine(engine)
+        try:
+            results.append((beautify(data, **options), beautify(str(data), **options)))
+        finally:
+            use_engine("auto")
+    assert results[0] == results[1]
+
+
+def test_use_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    use_engine("python")
+    try:
+        assert Style().formatter()._scan is None
+    finally:
+        use_engine("auto")
+    assert Style().formatter()._scan is core._compiled_format
+    monkeypatch.setattr(core, "_compiled_format", None)
+    with pytest.raises(ImportError, match="_speedups"):
+        use_engine("c")
+    with pytest.raises(ValueError, match="engine"):
+        use_engine("rust")
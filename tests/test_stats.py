@@ -0,0 +1,45 @@
+"""Pytest tests for beautipy.stats."""
+
+from beautipy import FormatStats, beautify
+
+
+def test_counts() -> None:
+    stats = FormatStats()
+    text = "Error: {code:500, msg:'a, {b}', at:[1, 2, [ ]], x:()}"
+    assert beautify(text, stats=stats) == beautify(text)
+    assert stats.input_chars == len(text)
+    assert stats.output_chars == len(beautify(text))
+    assert (stats.openers, stats.closers) == (4, 4)
+    assert stats.commas == 5
+    assert stats.strings == 1
+    assert stats.max_depth == 3
+    assert stats.empty_structures == 2
+
+
+def test_unbalanced_and_unterminated_input() -> None:
+    stats = FormatStats()
+    beautify("]] [[ 'open, [", stats=stats)
+    assert (stats.openers, stats.closers, stats.max_depth) == (2, 2, 2)
+    assert stats.strings == 1
+    assert stats.commas == 0
+
+
+def test_object_input_and_timings() -> None:
+    stats = FormatStats()
+    data = {"rows": [{"id": i, "name": f"n{i}"} for i in range(500)]}
+    assert beautify(data, stats=stats, max_items_per_container=3) == beautify(data, max_items_per_container=3)
+    assert stats.input_chars == len(str(data))
+    assert stats.openers == 502
+    assert stats.repr_seconds > 0
+    assert stats.scan_seconds > 0
+    assert stats.total_seconds >= stats.scan_seconds
+    assert stats.read_seconds == stats.write_seconds == 0
+
+
+def test_summary() -> None:
+    stats = FormatStats()
+    beautify("[1]", stats=stats)
+    summary = stats.summary()
+    assert "openers" in summary
+    assert "scan time" in summary
+    assert repr(stats).startswith("FormatStats(input_chars=3, ")
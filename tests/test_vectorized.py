@@ -0,0 +1,74 @@
+"""Differential tests: the NumPy engine against the Python scanner."""
+
+import random
+
+import pytest
+
+from beautipy import Style, beautify, core, use_engine, vectorized
+
+from .test_differential import corpus, random_options
+from .test_speedups import WIDE_ALPHABET, assert_same
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def all_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Use the engine for the short chunks of these tests too.
+    monkeypatch.setattr(vectorized, "_MIN_LENGTH", 0)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_input(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(300):
+        text = "".join(rng.choice(WIDE_ALPHABET) for _ in range(rng.randint(0, 80)))
+        options = random_options(rng)
+        options["max_indent_width"] = rng.choice([None, 0, 5])
+        assert_same(text, options, rng, vectorized.format_chunk)
+
+
+@pytest.mark.parametrize("text", corpus())
+def test_corpus(text: str) -> None:
+    rng = random.Random(text)
+    for _ in range(5):
+        options = random_options(rng)
+        options["max_indent_width"] = rng.choice([None, 0, 5])
+        assert_same(text, options, rng, vectorized.format_chunk)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "'a\\\\' , \"b\\\"\" , 'c" * 50,
+        "[" * 300 + "]" * 350 + "{" * 20,
+        "{'k': \"it's\"}, " * 200 + '"\\',
+        " \u3000\u2028".join(["[x:\U0001f600]", "(中 = 1)"] * 100),
+    ],
+)
+def test_whole_chunks(text: str) -> None:
+    for options in ({}, {"compact_operators": True, "expand_empty": True}, {"indent": "\t", "opener_same_line": True}):
+        python = Style(**options).formatter()
+        python._scan = None
+        engine = Style(**options).formatter()
+        engine._scan = vectorized.format_chunk
+        assert engine.feed(text) + engine.close() == python.feed(text) + python.close()
+
+
+def test_short_chunks_use_python(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(vectorized, "_MIN_LENGTH", 10)
+    monkeypatch.setattr(vectorized, "_format", None)
+    assert vectorized.format_chunk(Style().formatter(), "[1, 2]") == Style().formatter().feed("[1, 2]")
+
+
+def test_use_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    use_engine("numpy")
+    try:
+        assert Style().formatter()._scan is vectorized.format_chunk
+        assert beautify("{'a': [1, {}]}" * 100) == beautify("{'a': [1, {}]}" * 100, max_depth=1000)
+    finally:
+        use_engine("auto")
+    assert Style().formatter()._scan is core._compiled_format
+    monkeypatch.setattr(vectorized, "_numpy", False)
+    with pytest.raises(ImportError, match="numpy"):
+        use_engine("numpy")
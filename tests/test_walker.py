@@ -0,0 +1,109 @@
+"""Pytest tests for beautipy.walker."""
+
+from collections import OrderedDict
+
+import pytest
+
+import beautipy.walker
+from beautipy import Formatter, beautify, beautify_iter
+from beautipy.walker import walk
+
+from .reference import reference_beautify
+
+
+class Odd:
+    """An object whose representation is not valid syntax."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __repr__(self) -> str:
+        return self.text
+
+
+def objects() -> list:
+    recursive = [1, 2]
+    recursive.append(recursive)
+    nested = {"self": None}
+    nested["self"] = nested
+    return [
+        {"id": 7, "tags": ["a", "b,c", ""], "meta": {"on": True, "roles": []}},
+        [(), (1,), (1, 2), set(), frozenset(), frozenset({3}), {4}, {}, []],
+        {(1, "x"): b"q'\x00", None: 1.5, "it's": 'x"y\\z', 0: float("inf")},
+        [Odd("'open"), Odd(" ) "), Odd("a b"), [Odd("{"), 1], Odd("}")],
+        [{"k": [i, str(i), (i, None)]} for i in range(30)],
+        OrderedDict(a=1),
+        recursive,
+        nested,
+        [[[[[]]]], {"": {"": ()}}],
+    ]
+
+
+@pytest.fixture
+def walk_everything(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(beautipy.walker, "_SMALL_ITEMS", -1)
+    monkeypatch.setattr(beautipy.walker, "_FLUSH_PIECES", 3)
+
+
+@pytest.mark.parametrize("obj", objects())
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"blank_line_depth": 2, "expand_empty": True},
+        {"opener_same_line": True, "compact_operators": True, "indent": "\t"},
+        {"indent": ""},
+    ],
+)
+def test_walked_output_matches_reference(walk_everything: None, obj: object, options: dict) -> None:
+    assert beautify(obj, **options) == reference_beautify(str(obj), **options)
+
+
+@pytest.mark.parametrize("obj", objects())
+def test_small_containers_match_reference(obj: object) -> None:
+    assert beautify(obj) == reference_beautify(str(obj))
+
+
+def test_large_containers_match_reference() -> None:
+    data = {
+        "rows": [{"id": i, "name": f"user {i}", "tags": ["x", "y"]} for i in range(300)],
+        "flat": list(range(10000)),
+        "table": {str(i): i / 3 for i in range(5000)},
+    }
+    assert beautify(data) == reference_beautify(str(data))
+
+
+def test_recursive_container_is_marked() -> None:
+    data = {"items": list(range(300))}
+    data["items"].append(data)
+    result = beautify(data)
+    assert result.endswith("{\n            ...\n        }\n    ]\n}")
+    assert result == reference_beautify(str(data))
+
+
+def test_large_container_is_not_formatted_in_one_piece() -> None:
+    data = [list(range(300)) for _ in range(50)]
+    chunks = list(beautify_iter(data))
+    assert len(chunks) >= 50
+    assert "".join(chunks) == reference_beautify(str(data))
+
+
+@pytest.mark.parametrize("obj", [[list(range(300)) for _ in range(50)], {"text": "x" * 5000, "n": list(range(2000))}])
+def test_slice_size_bounds_the_work_per_chunk(obj: object) -> None:
+    formatter = Formatter()
+    sizes = []
+    feed, write_items = formatter.feed, formatter._write_items
+
+    def counted_feed(text: str) -> str:
+        sizes.append(len(text))
+        return feed(text)
+
+    def counted_write_items(keys: list, values: object = None) -> str:
+        sizes.append(len(keys))
+        return write_items(keys, values)
+
+    formatter.feed = counted_feed
+    formatter._write_items = counted_write_items
+    result = "".join(walk(formatter, obj, 100)) + formatter.close()
+    assert max(sizes) <= 100
+    assert result == reference_beautify(str(obj))
@@ -0,0 +1,90 @@
+"""Pytest tests for beautipy.writer."""
+
+from io import BytesIO, StringIO
+from pathlib import Path
+from typing import List, Union
+
+import pytest
+
+from beautipy import beautify, beautify_to
+
+DATA = [{"name": "café ☃", "tags": ["a", "b"], "empty": {}} for _ in range(2000)]
+
+
+class Recorder:
+    """A duck-typed stream that records each write."""
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.writes: List[Union[str, bytes]] = []
+
+    def write(self, data: Union[str, bytes]) -> None:
+        self.writes.append(data)
+
+
+def test_text_stream() -> None:
+    out = StringIO()
+    assert beautify_to(DATA, out, indent="  ") is None
+    assert out.getvalue() == beautify(DATA, indent="  ")
+
+
+def test_binary_stream() -> None:
+    out = BytesIO()
+    beautify_to(str(DATA), out, expand_empty=True)
+    assert out.getvalue() == beautify(DATA, expand_empty=True).encode("utf-8")
+
+
+def test_binary_encoding() -> None:
+    out = BytesIO()
+    beautify_to(DATA, out, encoding="utf-16", buffer_size=100)
+    assert out.getvalue() == beautify(DATA).encode("utf-16")
+
+
+def test_binary_errors() -> None:
+    out = BytesIO()
+    beautify_to(["é"], out, encoding="ascii", errors="replace")
+    assert out.getvalue() == b"[\n    '?'\n]"
+    with pytest.raises(UnicodeEncodeError):
+        beautify_to(["é"], BytesIO(), encoding="ascii")
+
+
+def test_file(tmp_path: Path) -> None:
+    path = tmp_path / "out.txt"
+    with open(path, "wb") as fp:
+        beautify_to(DATA, fp, opener_same_line=True)
+    assert path.read_text(encoding="utf-8") == beautify(DATA, opener_same_line=True)
+
+
+@pytest.mark.parametrize("buffer_size", [1, 10, 1000, 1 << 20])
+def test_writes_in_blocks(buffer_size: int) -> None:
+    out = Recorder("w")
+    beautify_to(DATA, out, buffer_size=buffer_size)
+    assert "".join(out.writes) == beautify(DATA)
+    # Every write but the last fills the buffer.
+    assert all(len(data) >= buffer_size for data in out.writes[:-1])
+    if buffer_size > 1:
+        assert len(out.writes) < len(DATA)
+
+
+def test_duck_typed_binary_stream() -> None:
+    out = Recorder("wb")
+    beautify_to([1, 2], out)
+    assert b"".join(out.writes) == b"[\n    1,\n    2\n]"  # type: ignore[arg-type]
+
+
+def test_workers() -> None:
+    out = StringIO()
+    beautify_to(str(DATA), out, workers=2, buffer_size=10)
+    assert out.getvalue() == beautify(DATA)
+
+
+def test_invalid_buffer_size() -> None:
+    with pytest.raises(ValueError, match="buffer_size"):
+        beautify_to([1], StringIO(), buffer_size=0)
+
+
+def test_invalid_option() -> None:
+    out = StringIO()
+    with pytest.raises(ValueError, match="blank_line_depth"):
+        beautify_to([1], out, blank_line_depth=-1)
+    assert out.getvalue() == ""